@@ -0,0 +1,10 @@
+# benchmarks/__init__.py
+import os
+
+import django
+
+
+def setup_django():
+    """Initialiser Django pour un script de benchmark lancé depuis bourses_backend/"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bourses_backend.settings')
+    django.setup()
@@ -0,0 +1,245 @@
+# benchmarks/bench_asgi.py
+"""
+Comparer la tenue en concurrence des routes d'entrées/sorties sous les deux
+déploiements:
+
+- asgi: uvicorn bourses_backend.asgi:application, vues asynchrones
+  (users/async_views.py, BOURSES_ASYNC_VIEWS actif par défaut sous ASGI);
+- wsgi: gunicorn bourses_backend.wsgi:application, vues synchrones, workers
+  à threads (gthread).
+
+Pour chaque serveur, chaque route et chaque niveau de concurrence, N
+connexions HTTP/1.1 keep-alive envoient des requêtes en boucle pendant
+--duration secondes: débit, latences p50/p95/p99 et erreurs. Le générateur de
+charge est en asyncio (bibliothèque standard), dans ce processus.
+
+Les serveurs sont lancés en sous-processus sur la base configurée ici
+(uvicorn et gunicorn s'installent avec `pip install uvicorn gunicorn`;
+un serveur absent est ignoré), ou désignés par --asgi-url / --wsgi-url s'ils
+tournent déjà. Sous ASGI, l'ORM tourne dans les threads de sync_to_async,
+chacun avec sa connexion: préférer le pool (BOURSES_DB_POOL=true) aux
+connexions persistantes.
+
+Prérequis: base remplie avec `python -m benchmarks.seed` (compte
+bench_student_0). Un document de --file-size octets est créé pour la route
+de téléchargement, puis supprimé.
+
+Usage (depuis bourses_backend/):
+    python -m benchmarks.bench_asgi --concurrency 10,100,500 --duration 10
+    python -m benchmarks.bench_asgi --servers asgi --asgi-url http://127.0.0.1:8001
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from benchmarks import setup_django
+
+HOST = '127.0.0.1'
+API_PREFIX = '/api/users/'
+ROUTES = ('status/', 'me/', 'student/notifications/', 'documents/download/{document}/')
+
+# (module à installer, commande) par déploiement
+SERVERS = {
+    'asgi': ('uvicorn', ['-m', 'uvicorn', 'bourses_backend.asgi:application', '--host', HOST,
+                         '--port', '{port}', '--workers', '{workers}', '--log-level', 'warning', '--no-access-log']),
+    'wsgi': ('gunicorn', ['-m', 'gunicorn', 'bourses_backend.wsgi:application', '--bind', f'{HOST}:{{port}}',
+                          '--workers', '{workers}', '--threads', '{threads}', '--log-level', 'warning']),
+}
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def prepare(username, file_size):
+    """En-têtes d'authentification de l'utilisateur et document à télécharger"""
+    from django.conf import settings
+    from django.core.files.base import ContentFile
+    from django.test import Client
+    from users.authentication import jwt_enabled, tokens_for_user
+    from users.models import CustomUser, StudentDocument
+
+    user = CustomUser.objects.get(username=username)
+    if jwt_enabled():
+        headers = {'Authorization': f"Bearer {tokens_for_user(user)['access']}"}
+    else:
+        client = Client()
+        client.force_login(user)
+        headers = {'Cookie': f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"}
+
+    document = StudentDocument(student=user, document_type='other', original_filename='bench_asgi.pdf',
+                               file_size=file_size)
+    document.file.save('bench_asgi.pdf', ContentFile(os.urandom(file_size)), save=False)
+    document.save()
+    return headers, document
+
+
+def start_server(name, port, workers, threads):
+    module, command = SERVERS[name]
+    if importlib.util.find_spec(module) is None:
+        return None, f"{module} non installé (pip install {module})"
+    env = os.environ.copy()
+    # Une ligne de log par requête fausserait la mesure
+    env.setdefault('BOURSES_REQUEST_LOG_LEVEL', 'WARNING')
+    env['BOURSES_ASYNC_VIEWS'] = 'true' if name == 'asgi' else 'false'
+    args = [arg.format(port=port, workers=workers, threads=threads) for arg in command]
+    process = subprocess.Popen([sys.executable] + args, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return None, f"{module} arrêté au démarrage (code {process.returncode})"
+        try:
+            socket.create_connection((HOST, port), timeout=0.5).close()
+            return process, None
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    return None, f"{module} ne répond pas sur le port {port}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def read_response(reader):
+    """(statut, connexion réutilisable) d'une réponse HTTP/1.1, corps lu et ignoré"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection') != 'close'
+
+
+async def connection_loop(host, port, request, deadline, measure_after, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        if writer is None:
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+            except OSError:
+                errors['connect'] += 1
+                await asyncio.sleep(0.05)
+                continue
+        started = time.perf_counter()
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors['connection'] += 1
+            writer.close()
+            writer = None
+            continue
+        if started >= measure_after:
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors[status] += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(base_url, path, headers, concurrency, duration, warmup):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    lines = [f'GET {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: keep-alive']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    latencies, errors = [], Counter()
+    measure_after = time.perf_counter() + warmup
+    deadline = measure_after + duration
+    await asyncio.gather(*(
+        connection_loop(host, port, request, deadline, measure_after, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    latencies.sort()
+    if not latencies:
+        return {'requests': 0, 'errors': sum(errors.values()), 'detail': dict(errors)}
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'detail': dict(errors),
+        'throughput': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', default='asgi,wsgi')
+    parser.add_argument('--asgi-url', help="serveur ASGI déjà lancé (sinon uvicorn est démarré)")
+    parser.add_argument('--wsgi-url', help="serveur WSGI déjà lancé (sinon gunicorn est démarré)")
+    parser.add_argument('--workers', type=int, default=2, help="processus par serveur")
+    parser.add_argument('--threads', type=int, default=8, help="threads par worker gunicorn")
+    parser.add_argument('--concurrency', default='10,100,500', help="connexions simultanées (liste)")
+    parser.add_argument('--duration', type=float, default=10.0, help="secondes mesurées par palier")
+    parser.add_argument('--warmup', type=float, default=2.0, help="secondes ignorées avant chaque mesure")
+    parser.add_argument('--routes', default=','.join(ROUTES))
+    parser.add_argument('--username', default='bench_student_0')
+    parser.add_argument('--file-size', type=int, default=1024 * 1024, help="taille du document téléchargé")
+    args = parser.parse_args()
+
+    setup_django()
+    headers, document = prepare(args.username, args.file_size)
+    routes = [route.format(document=document.pk) for route in args.routes.split(',')]
+    levels = [int(level) for level in args.concurrency.split(',')]
+    urls = {'asgi': args.asgi_url, 'wsgi': args.wsgi_url}
+
+    print(f"{args.workers} worker(s) par serveur, gunicorn: {args.threads} threads par worker, "
+          f"{args.duration:g}s par palier\n")
+    print(f"{'serveur':<8} {'route':<32} {'conn.':>6} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'erreurs':>8}")
+    try:
+        for name in args.servers.split(','):
+            process, base_url = None, urls[name]
+            if base_url is None:
+                port = free_port()
+                process, error = start_server(name, port, args.workers, args.threads)
+                if process is None:
+                    print(f"{name:<8} ignoré ({error})")
+                    continue
+                base_url = f'http://{HOST}:{port}'
+            try:
+                for route in routes:
+                    for concurrency in levels:
+                        result = asyncio.run(run_load(base_url, API_PREFIX + route, headers, concurrency,
+                                                      args.duration, args.warmup))
+                        if not result['requests']:
+                            print(f"{name:<8} {route:<32} {concurrency:>6} aucune réponse {result['detail']}")
+                            continue
+                        print(f"{name:<8} {route:<32} {concurrency:>6} {result['throughput']:>9} "
+                              f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+                              f"{result['errors']:>8}")
+            finally:
+                if process is not None:
+                    process.terminate()
+                    process.wait(timeout=30)
+    finally:
+        document.file.delete(save=False)
+        document.delete()
+
+
+if __name__ == '__main__':
+    main()
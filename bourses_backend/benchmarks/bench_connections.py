@@ -0,0 +1,166 @@
+# benchmarks/bench_connections.py
+"""
+Comparer la latence de get_student_notifications selon la gestion des
+connexions à la base:
+
+- per-request: CONN_MAX_AGE = 0, une connexion ouverte et fermée par requête
+  (configuration d'origine);
+- persistent: CONN_MAX_AGE = 60, connexion gardée par thread;
+- pool: pool psycopg de Django 5.1+ (PostgreSQL seulement).
+
+Chaque mode tourne dans un processus séparé. Les requêtes passent par le
+WSGIHandler de Django, avec les signaux request_started/request_finished qui
+ouvrent et ferment les connexions comme en production (le client de test
+Django, lui, les désactive).
+
+Prérequis: une base PostgreSQL configurée dans les settings et remplie avec
+`python -m benchmarks.seed` (compte bench_student_0).
+
+Usage (depuis bourses_backend/):
+    python -m benchmarks.bench_connections --threads 8 --requests 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import setup_django
+
+MODES = ('per-request', 'persistent', 'pool')
+PATH = '/api/users/student/notifications/'
+
+
+def configure(mode, threads):
+    """Réglages de connexion du mode, appliqués avant la première connexion"""
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    options = dict(database.get('OPTIONS') or {})
+    options.pop('pool', None)
+    database['CONN_HEALTH_CHECKS'] = True
+    if mode == 'pool':
+        database['CONN_MAX_AGE'] = 0
+        options['pool'] = {'min_size': threads, 'max_size': threads}
+    else:
+        database['CONN_MAX_AGE'] = 60 if mode == 'persistent' else 0
+    database['OPTIONS'] = options
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run_child(mode, threads, requests, username):
+    configure(mode, threads)
+    setup_django()
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection, connections
+    from django.db.backends.signals import connection_created
+    from django.test import Client, RequestFactory
+    from users.authentication import jwt_enabled, tokens_for_user
+    from users.metrics import pool_stats
+    from users.models import CustomUser
+
+    if mode == 'pool' and connection.vendor != 'postgresql':
+        return {'mode': mode, 'skipped': f"pool indisponible avec {connection.vendor}"}
+
+    user = CustomUser.objects.get(username=username)
+    headers = {'HTTP_HOST': 'localhost'}
+    if jwt_enabled():
+        headers['HTTP_AUTHORIZATION'] = f"Bearer {tokens_for_user(user)['access']}"
+    else:
+        client = Client()
+        client.force_login(user)
+        headers['HTTP_COOKIE'] = f"sessionid={client.cookies['sessionid'].value}"
+    environ = RequestFactory().get(PATH, **headers).environ
+    connections.close_all()
+
+    handler = WSGIHandler()
+    opened = []
+    connection_created.connect(lambda sender, connection, **kwargs: opened.append(1), weak=False)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def start_response(status, response_headers, exc_info=None):
+        if not status.startswith('200'):
+            errors.append(status)
+
+    def worker():
+        local = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = handler(dict(environ), start_response)
+            b''.join(response)
+            # Déclenche request_finished (fermeture ou restitution de la connexion)
+            response.close()
+            local.append((time.perf_counter() - started) * 1000)
+        connections.close_all()
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    stats = pool_stats().get('default', {})
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        # Avec le pool, connection_created compte les emprunts: connexions réelles = connections_num
+        'connections': stats.get('connections_num', len(opened)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help="requêtes par thread")
+    parser.add_argument('--username', default='bench_student_0')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.threads, args.requests, args.username)))
+        return
+
+    print(f"GET {PATH}: {args.threads} threads x {args.requests} requêtes\n")
+    print(f"{'mode':<12} {'req/s':>8} {'moyenne':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'connexions':>11} {'erreurs':>8}")
+    baseline = None
+    for mode in args.modes.split(','):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_connections', '--child', mode, '--threads', str(args.threads),
+             '--requests', str(args.requests), '--username', args.username],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if output.returncode != 0:
+            print(f"{mode:<12} échec:\n{output.stderr[-2000:]}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        if 'skipped' in result:
+            print(f"{mode:<12} ignoré ({result['skipped']})")
+            continue
+        baseline = baseline or result
+        gain = f"  x{baseline['mean_ms'] / result['mean_ms']:.2f}" if result is not baseline else ''
+        print(f"{mode:<12} {result['throughput']:>8} {result['mean_ms']:>9} {result['p50_ms']:>8} "
+              f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['connections']:>11} {result['errors']:>8}{gain}")
+
+
+if __name__ == '__main__':
+    main()
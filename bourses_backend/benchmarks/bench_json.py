@@ -0,0 +1,100 @@
+# benchmarks/bench_json.py
+"""
+Comparer le temps d'encodage JSON de 10k demandes de bourse sérialisées.
+
+Usage (depuis bourses_backend/):
+    python -m benchmarks.bench_json --rows 10000 --repeat 5
+"""
+import argparse
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import setup_django
+
+
+def build_applications(rows):
+    """Construire des demandes en mémoire (aucun accès à la base)"""
+    from django.utils import timezone
+    from users.models import CustomUser, ScholarshipApplication
+
+    student = CustomUser(id=1, username='etudiant', first_name='Amina', last_name='Ben Salah')
+    now = timezone.now()
+    statuses = [code for code, _ in ScholarshipApplication.APPLICATION_STATUS_CHOICES]
+    types = [code for code, _ in ScholarshipApplication.SCHOLARSHIP_TYPES]
+
+    applications = []
+    for i in range(rows):
+        application = ScholarshipApplication(
+            id=i + 1,
+            student=student,
+            scholarship_type=types[i % len(types)],
+            title=f"Demande de bourse n°{i + 1}",
+            description="Demande déposée pour l'année universitaire en cours.",
+            amount_requested=Decimal('1500.00') + i,
+            final_amount=Decimal('1200.50') if i % 3 == 0 else None,
+            status=statuses[i % len(statuses)],
+            submitted_at=now - timedelta(days=i % 30),
+        )
+        application.created_at = now - timedelta(hours=i)
+        application.updated_at = now
+        applications.append(application)
+    return applications
+
+
+def timed(label, func, repeat):
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(func())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<40} {best * 1000:9.1f} ms  {size / 1024:9.0f} KiB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import override_settings
+    from rest_framework.renderers import JSONRenderer
+    from users import renderers
+    from users.serializers import ScholarshipApplicationSerializer
+
+    applications = build_applications(args.rows)
+    serialized = ScholarshipApplicationSerializer(applications, many=True).data
+    # Lignes « natives » (Decimal et datetime non convertis), comme celles de .values()
+    native = [
+        {
+            'id': a.id, 'title': a.title, 'status': a.status, 'amount_requested': a.amount_requested,
+            'final_amount': a.final_amount, 'submitted_at': a.submitted_at, 'created_at': a.created_at,
+        }
+        for a in applications
+    ]
+
+    print(f"Encodage de {args.rows} demandes (meilleur temps sur {args.repeat} essais)\n")
+    baseline = timed("DRF JSONRenderer (sérialisées)", lambda: JSONRenderer().render(serialized), args.repeat)
+
+    with override_settings(BOURSES_JSON_BACKEND='stdlib'):
+        timed("FastJSONRenderer stdlib (sérialisées)", lambda: renderers.FastJSONRenderer().render(serialized), args.repeat)
+        timed("FastJSONRenderer stdlib (natives)", lambda: renderers.FastJSONRenderer().render(native), args.repeat)
+
+    if renderers.orjson is None:
+        print("\norjson non installé: pip install orjson pour comparer le backend rapide")
+        return
+
+    with override_settings(BOURSES_JSON_BACKEND='auto'):
+        fast = timed("FastJSONRenderer orjson (sérialisées)", lambda: renderers.FastJSONRenderer().render(serialized), args.repeat)
+        timed("FastJSONRenderer orjson (natives)", lambda: renderers.FastJSONRenderer().render(native), args.repeat)
+
+    print(f"\nGain orjson vs DRF JSONRenderer: x{baseline / fast:.1f}")
+
+
+if __name__ == '__main__':
+    main()
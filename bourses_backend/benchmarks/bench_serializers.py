@@ -0,0 +1,93 @@
+# benchmarks/bench_serializers.py
+"""
+Comparer ScholarshipApplicationSerializer / StudentNotificationSerializer (DRF)
+avec les serializers de liste rapides de users/lean_serializers.py.
+
+Les deux chemins partent des mêmes données en mémoire: instances de modèles
+pour DRF, lignes .values() équivalentes pour le chemin rapide.
+
+Usage (depuis bourses_backend/):
+    python -m benchmarks.bench_serializers --rows 10000 --repeat 5
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from benchmarks import setup_django
+
+
+def rows_from_instances(instances, value_fields):
+    """Reproduire les lignes que renverrait queryset.values(*value_fields)"""
+    rows = []
+    for instance in instances:
+        row = {}
+        for field in value_fields:
+            value = instance
+            for part in field.split('__'):
+                value = getattr(value, part, None) if value is not None else None
+            row[field] = value
+        rows.append(row)
+    return rows
+
+
+def build_notifications(rows):
+    from django.utils import timezone
+    from users.models import CustomUser, StudentNotification
+
+    student = CustomUser(id=1, username='etudiant', first_name='Amina', last_name='Ben Salah')
+    now = timezone.now()
+    types = [code for code, _ in StudentNotification.NOTIFICATION_TYPES]
+
+    notifications = []
+    for i in range(rows):
+        notification = StudentNotification(
+            id=i + 1,
+            student=student,
+            notification_type=types[i % len(types)],
+            title=f"Notification {i + 1}",
+            message="Votre dossier a été mis à jour.",
+            is_read=bool(i % 2),
+        )
+        notification.created_at = now - timedelta(minutes=37 * i)
+        notifications.append(notification)
+    return notifications
+
+
+def timed(label, func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<45} {best * 1000:9.1f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from benchmarks.bench_json import build_applications
+    from users.lean_serializers import LeanApplicationSerializer, LeanStudentNotificationSerializer
+    from users.serializers import ScholarshipApplicationSerializer, StudentNotificationSerializer
+
+    cases = [
+        ('demandes', build_applications(args.rows), ScholarshipApplicationSerializer, LeanApplicationSerializer),
+        ('notifications', build_notifications(args.rows), StudentNotificationSerializer, LeanStudentNotificationSerializer),
+    ]
+
+    print(f"Sérialisation de {args.rows} lignes (meilleur temps sur {args.repeat} essais)\n")
+    for name, instances, serializer_class, lean_class in cases:
+        rows = rows_from_instances(instances, lean_class.value_fields)
+        drf = timed(f"DRF {serializer_class.__name__}", lambda: serializer_class(instances, many=True).data, args.repeat)
+        lean = timed(f"Rapide {lean_class.__name__}", lambda: lean_class().serialize(rows), args.repeat)
+        print(f"{'':<45} gain x{drf / lean:.1f} ({name})\n")
+
+
+if __name__ == '__main__':
+    main()
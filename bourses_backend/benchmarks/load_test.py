@@ -0,0 +1,432 @@
+# benchmarks/load_test.py
+"""
+Test de charge de l'API sur des données générées (benchmarks/seed.py).
+
+Scénarios (trafic réel de l'application):
+- dashboard: onglets ouverts qui rafraîchissent le tableau de bord toutes les
+  --poll-interval secondes (étudiants: stats, notifications, documents;
+  un onglet admin pour 20: stats, documents, notifications, infos système).
+- uploads: rafale d'uploads simultanés (--uploads étudiants, démarrage
+  synchronisé), comme à l'approche d'une date limite.
+- admin: listes admin et exports en boucle par --admin-workers administrateurs.
+
+Rapport par route: débit, latences p50/p95/p99 et requêtes SQL par requête
+(lues dans l'en-tête Server-Timing de InstrumentationMiddleware), comparé à
+une référence enregistrée (--save-baseline, puis --baseline).
+
+Deux modes:
+- par défaut, en processus: base de test créée (PostgreSQL ou fichier SQLite)
+  et remplie, requêtes via le client de test Django dans des threads. Mesure
+  le coût applicatif (latence, requêtes SQL) plutôt que la capacité serveur.
+- --url http://localhost:8000: serveur lancé à part (runserver, gunicorn...),
+  sur la base configurée ici et remplie au préalable avec benchmarks.seed;
+  BOURSES_SERVER_TIMING doit être actif côté serveur pour compter les
+  requêtes SQL.
+
+Usage (depuis bourses_backend/):
+    python -m benchmarks.load_test --students 2000 --tabs 100 --duration 60
+    python -m benchmarks.load_test --scenarios uploads,admin --save-baseline
+    python -m benchmarks.seed --students 2000
+    python -m benchmarks.load_test --url http://localhost:8000 --fail-on-regression
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from benchmarks import setup_django
+from benchmarks.seed import ADMIN_PREFIX, BENCH_PASSWORD, STUDENT_PREFIX, add_arguments, seed_from_args
+
+API_PREFIX = '/api/users/'
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+STUDENT_POLL = ['student/stats/', 'student/notifications/', 'documents/',
+                # Navbar: rafraîchissement indépendant des notifications
+                'student/notifications/']
+ADMIN_POLL = ['admin/stats/', 'admin/documents/', 'admin/notifications/', 'admin/system/info/',
+              'admin/notifications/']
+ADMIN_LISTINGS = [
+    'all/',
+    'admin/documents/',
+    'admin/applications/',
+    'admin/notifications/',
+    'v2/documents/?page=2',
+    'v2/applications/?status=submitted',
+    'admin/export-data/?type=users',
+    'admin/export-data/?type=applications&export_format=jsonl',
+]
+
+
+def percentile(values, p):
+    """Percentile par rang le plus proche (valeurs triées)"""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def query_count(server_timing):
+    match = QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+class Recorder:
+    """Mesures brutes par (scénario, route), partagées entre threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.elapsed = {}
+
+    def add(self, scenario, label, seconds, status, queries):
+        with self.lock:
+            self.samples[(scenario, label)].append((seconds, status, queries))
+
+    def summary(self):
+        results = {}
+        for (scenario, label), samples in sorted(self.samples.items()):
+            latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+            queries = [q for _, _, q in samples if q is not None]
+            elapsed = self.elapsed.get(scenario) or 1
+            results.setdefault(scenario, {})[label] = {
+                'requests': len(samples),
+                'errors': sum(1 for _, status, _ in samples if status >= 400),
+                'throughput': round(len(samples) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'queries': round(sum(queries) / len(queries), 2) if queries else None,
+            }
+        return results
+
+
+class InProcessClient:
+    """Client de test Django authentifié (un par thread)"""
+
+    def __init__(self, user):
+        from django.test import Client
+        from users.authentication import jwt_enabled, tokens_for_user
+
+        self.client = Client()
+        if jwt_enabled():
+            self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {tokens_for_user(user)['access']}"
+        else:
+            self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        url = API_PREFIX + path
+        if method == 'POST':
+            response = self.client.post(url, data)
+        else:
+            response = self.client.get(url)
+        if response.streaming:
+            # Exports et fichiers: consommer le flux comme un vrai client
+            for _ in response.streaming_content:
+                pass
+        return response.status_code, response.get('Server-Timing')
+
+
+class HTTPClient:
+    """Client HTTP vers un serveur lancé à part (jeton JWT, sinon session)"""
+
+    def __init__(self, base_url, username):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.headers = {}
+
+        credentials = {'username': username, 'password': BENCH_PASSWORD}
+        status, body, _ = self.send('POST', 'token/', json.dumps(credentials).encode(), 'application/json')
+        if status == 200:
+            self.headers['Authorization'] = f"Bearer {json.loads(body)['access']}"
+            return
+        self.send('GET', 'csrf/')
+        self.headers['X-CSRFToken'] = self.cookie('csrftoken')
+        status, body, _ = self.send('POST', 'login/', json.dumps(credentials).encode(), 'application/json')
+        if status != 200:
+            raise RuntimeError(f"Connexion impossible pour {username}: {status} {body[:200]!r}")
+        self.headers['X-CSRFToken'] = self.cookie('csrftoken')
+
+    def cookie(self, name):
+        return next((c.value for c in self.cookies if c.name == name), '')
+
+    def send(self, method, path, body=None, content_type=None):
+        request = urllib.request.Request(self.base_url + API_PREFIX + path, data=body, method=method,
+                                         headers=dict(self.headers))
+        if content_type:
+            request.add_header('Content-Type', content_type)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, response.read(), response.headers.get('Server-Timing')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers.get('Server-Timing')
+
+    def request(self, method, path, data=None):
+        body = content_type = None
+        if data is not None:
+            from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+            body, content_type = encode_multipart(BOUNDARY, data), MULTIPART_CONTENT
+        status, _, server_timing = self.send(method, path, body, content_type)
+        return status, server_timing
+
+
+class Context:
+    def __init__(self, options, recorder):
+        from users.models import CustomUser
+
+        self.options = options
+        self.recorder = recorder
+        self.rng = random.Random(options.seed)
+        users = CustomUser.objects.filter(username__startswith='bench_').order_by('pk')
+        self.students = [u for u in users if u.username.startswith(STUDENT_PREFIX)]
+        self.admins = [u for u in users if u.username.startswith(ADMIN_PREFIX)]
+        if not self.students or not self.admins:
+            raise SystemExit("Aucun compte bench_*: lancer d'abord python -m benchmarks.seed")
+
+    @staticmethod
+    def has_data():
+        from users.models import CustomUser
+        return CustomUser.objects.filter(username__startswith=STUDENT_PREFIX).exists()
+
+    def client(self, user):
+        if self.options.url:
+            return HTTPClient(self.options.url, user.username)
+        return InProcessClient(user)
+
+    def call(self, scenario, client, method, path, data=None):
+        started = time.perf_counter()
+        try:
+            status, server_timing = client.request(method, path, data)
+        except Exception as e:
+            print(f"  {method} {path}: {e}", file=sys.stderr)
+            status, server_timing = 599, None
+        self.recorder.add(scenario, f'{method} {path}', time.perf_counter() - started,
+                          status, query_count(server_timing))
+
+    def run_workers(self, scenario, target, users):
+        """Un thread par utilisateur; durée du scénario enregistrée pour le débit"""
+        from django.db import connections
+
+        def worker(index, user):
+            try:
+                target(self.client(user), index)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i, user)) for i, user in enumerate(users)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.recorder.elapsed[scenario] = time.perf_counter() - started
+
+
+def scenario_dashboard(ctx):
+    """Onglets ouverts rafraîchis toutes les poll_interval secondes"""
+    options = ctx.options
+    tabs = [ctx.students[i % len(ctx.students)] for i in range(options.tabs)]
+    admin_tabs = [ctx.admins[i % len(ctx.admins)] for i in range(max(1, options.tabs // 20))]
+    users = tabs + admin_tabs
+    deadline = time.perf_counter() + options.duration
+    offsets = [ctx.rng.uniform(0, options.poll_interval) for _ in users]
+
+    def poll(client, index):
+        bundle = STUDENT_POLL if index < len(tabs) else ADMIN_POLL
+        next_poll = time.perf_counter() + offsets[index]
+        while True:
+            time.sleep(max(0.0, next_poll - time.perf_counter()))
+            if time.perf_counter() >= deadline:
+                return
+            for path in bundle:
+                ctx.call('dashboard', client, 'GET', path)
+            next_poll += options.poll_interval or 0
+
+    ctx.run_workers('dashboard', poll, users)
+
+
+def scenario_uploads(ctx):
+    """Rafale: tous les étudiants uploadent en même temps"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from users.models import StudentDocument
+
+    options = ctx.options
+    document_types = [code for code, _ in StudentDocument.DOCUMENT_TYPE_CHOICES]
+    users = ctx.rng.sample(ctx.students, min(options.uploads, len(ctx.students)))
+    barrier = threading.Barrier(len(users))
+    payload = b'%PDF-1.4\n' + os.urandom(options.upload_kb * 1024)
+
+    def upload(client, index):
+        barrier.wait()
+        for n in range(options.files_per_student):
+            data = {
+                'document_type': document_types[(index + n) % len(document_types)],
+                'file': SimpleUploadedFile(f'bench_{index}_{n}.pdf', payload, content_type='application/pdf'),
+            }
+            ctx.call('uploads', client, 'POST', 'documents/', data)
+
+    ctx.run_workers('uploads', upload, users)
+
+
+def scenario_admin(ctx):
+    """Listes et exports admin en boucle pendant la durée du scénario"""
+    options = ctx.options
+    users = [ctx.admins[i % len(ctx.admins)] for i in range(options.admin_workers)]
+    deadline = time.perf_counter() + options.duration
+
+    def browse(client, index):
+        position = index
+        while time.perf_counter() < deadline:
+            ctx.call('admin', client, 'GET', ADMIN_LISTINGS[position % len(ADMIN_LISTINGS)])
+            position += 1
+
+    ctx.run_workers('admin', browse, users)
+
+
+SCENARIOS = {
+    'dashboard': scenario_dashboard,
+    'uploads': scenario_uploads,
+    'admin': scenario_admin,
+}
+
+
+def print_report(results, baseline=None, tolerance=20.0):
+    """Affiche le tableau; retourne la liste des régressions par rapport à la référence"""
+    regressions = []
+    header = f"{'route':<60} {'req':>6} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL':>6}"
+    for scenario, routes in results.items():
+        print(f"\n[{scenario}]\n{header}")
+        for label, stats in routes.items():
+            queries = '-' if stats['queries'] is None else f"{stats['queries']:g}"
+            line = (f"{label:<60} {stats['requests']:>6} {stats['errors']:>5} {stats['throughput']:>8} "
+                    f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {queries:>6}")
+            reference = (baseline or {}).get(scenario, {}).get(label)
+            if reference:
+                notes = []
+                delta = (stats['p95_ms'] - reference['p95_ms']) / reference['p95_ms'] * 100 if reference['p95_ms'] else 0
+                notes.append(f"p95 {delta:+.0f}%")
+                if delta > tolerance:
+                    regressions.append(f"{scenario} {label}: p95 {reference['p95_ms']} -> {stats['p95_ms']} ms")
+                if stats['queries'] is not None and reference['queries'] is not None \
+                        and stats['queries'] > reference['queries'] + 0.5:
+                    notes.append(f"SQL {reference['queries']:g} -> {stats['queries']:g}")
+                    regressions.append(f"{scenario} {label}: SQL {reference['queries']:g} -> {stats['queries']:g}")
+                line += '   ' + ', '.join(notes)
+            print(line)
+    return regressions
+
+
+def run(options):
+    recorder = Recorder()
+    ctx = Context(options, recorder)
+    for name in options.scenarios:
+        print(f"Scénario {name}...", flush=True)
+        SCENARIOS[name](ctx)
+    return recorder.summary()
+
+
+def run_in_process(options):
+    """Base de test dédiée (jamais la base de développement), remplie puis détruite"""
+    from django.db import connections
+    from django.test.utils import (override_settings, setup_databases, setup_test_environment,
+                                   teardown_databases, teardown_test_environment)
+
+    workdir = tempfile.mkdtemp(prefix='bourses_bench_')
+    for alias in connections:
+        settings_dict = connections[alias].settings_dict
+        if settings_dict['ENGINE'].endswith('sqlite3') and not settings_dict['TEST'].get('NAME'):
+            # SQLite en mémoire ne supporte pas les écritures concurrentes des threads
+            settings_dict['TEST']['NAME'] = os.path.join(workdir, f'bench_{alias}.sqlite3')
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=options.keepdb)
+    try:
+        if not options.keepdb or not Context.has_data():
+            seed_from_args(options)
+        with override_settings(BOURSES_SERVER_TIMING=True, MEDIA_ROOT=os.path.join(workdir, 'media'),
+                               BOURSES_SYSTEM_SAMPLER=False):
+            return run(options)
+    finally:
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0, keepdb=options.keepdb)
+        teardown_test_environment()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="serveur à tester (sinon: en processus, sur une base de test)")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"liste séparée par des virgules parmi: {', '.join(SCENARIOS)}")
+    parser.add_argument('--duration', type=float, default=60, help="durée des scénarios dashboard et admin (s)")
+    parser.add_argument('--tabs', type=int, default=50, help="onglets du tableau de bord ouverts")
+    parser.add_argument('--poll-interval', type=float, default=30, help="0 = rafraîchissement en continu")
+    parser.add_argument('--uploads', type=int, default=20, help="étudiants de la rafale d'uploads")
+    parser.add_argument('--files-per-student', type=int, default=2)
+    parser.add_argument('--upload-kb', type=int, default=200)
+    parser.add_argument('--admin-workers', type=int, default=4, help="administrateurs simultanés")
+    parser.add_argument('--keepdb', action='store_true', help="conserver la base de test (et ses données)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=20.0, help="hausse de p95 tolérée (%%)")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--output', help="écrire les résultats en JSON")
+    add_arguments(parser)
+    options = parser.parse_args()
+    options.scenarios = [name.strip() for name in options.scenarios.split(',') if name.strip()]
+    unknown = set(options.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"scénarios inconnus: {', '.join(sorted(unknown))}")
+
+    setup_django()
+    from django.db import connection
+
+    started = time.perf_counter()
+    results = run(options) if options.url else run_in_process(options)
+
+    baseline = None
+    if os.path.exists(options.baseline) and not options.save_baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)['results']
+    regressions = print_report(results, baseline, options.tolerance)
+    print(f"\nTerminé en {time.perf_counter() - started:.1f}s ({connection.vendor}"
+          f"{', ' + options.url if options.url else ', en processus'})")
+
+    document = {
+        'meta': {
+            'vendor': connection.vendor,
+            'url': options.url,
+            'students': options.students,
+            'tabs': options.tabs,
+            'duration': options.duration,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if options.save_baseline:
+        with open(options.baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Référence enregistrée: {options.baseline}")
+
+    if regressions:
+        print("\nRégressions par rapport à la référence:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        if options.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/seed.py
+"""
+Générer le jeu de données des benchmarks (users/seeding.py, comme la
+commande seed_bourses): N étudiants, leurs documents, demandes de bourse et
+notifications, plus quelques administrateurs. Même --seed, mêmes données.
+
+Les comptes créés (bench_student_<n>, bench_admin_<n>) ont le mot de passe
+BENCH_PASSWORD. Les fichiers des documents générés ne sont pas écrits sur
+disque (les scénarios ne téléchargent que les documents qu'ils uploadent).
+
+Usage (depuis bourses_backend/, sur la base configurée):
+    python -m benchmarks.seed --students 1000
+"""
+import argparse
+
+from benchmarks import setup_django
+
+BENCH_PASSWORD = 'bench-pass'
+BENCH_PREFIX = 'bench'
+STUDENT_PREFIX = f'{BENCH_PREFIX}_student_'
+ADMIN_PREFIX = f'{BENCH_PREFIX}_admin_'
+
+
+def seed(students=1000, documents=3, applications=1, notifications=10, admins=2,
+         admin_notifications=200, random_seed=42, verbose=True):
+    """Insère le jeu de données; retourne le nombre de lignes par table"""
+    from users.seeding import seed_bourses
+
+    result = seed_bourses(
+        students=students, admins=admins, documents=documents, applications=applications,
+        notifications=notifications, admin_notifications=admin_notifications, prefix=BENCH_PREFIX,
+        password=BENCH_PASSWORD, random_seed=random_seed, write_files=False,
+    )
+    if verbose:
+        print(f"Données générées en {result.seconds:.1f}s: "
+              + ', '.join(f'{name} {count}' for name, count in result.counts.items()))
+    return result.counts
+
+
+def add_arguments(parser):
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--documents', type=int, default=3, help="documents par étudiant")
+    parser.add_argument('--applications', type=int, default=1, help="demandes par étudiant")
+    parser.add_argument('--notifications', type=int, default=10, help="notifications par étudiant")
+    parser.add_argument('--admins', type=int, default=2)
+    parser.add_argument('--admin-notifications', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def seed_from_args(args):
+    return seed(args.students, args.documents, args.applications, args.notifications, args.admins,
+                args.admin_notifications, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args()
+    setup_django()
+    seed_from_args(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bourses_backend.settings')
-application = get_asgi_application()
\ No newline at end of file
+# Sous ASGI (uvicorn bourses_backend.asgi:application), routes d'entrées/sorties asynchrones
+os.environ.setdefault('BOURSES_ASYNC_VIEWS', 'true')
+application = get_asgi_application()
@@ -1,13 +1,150 @@
-class DebugMiddleware:
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from users import metrics as app_metrics
+from users.instrumentation import collect_metrics
+from users.replicas import PIN_COOKIE, replica_configured, request_scope
+
+logger = logging.getLogger('bourses.requests')
+
+
+class InstrumentationMiddleware:
+    """
+    Mesure chaque requête: temps total, nombre et durée des requêtes SQL
+    (users.instrumentation.record_query, sur toutes les bases), taille de la
+    réponse et phases nommées (sérialisation, rendu JSON). Émet une ligne de
+    log JSON et l'en-tête Server-Timing; avertit quand une vue dépasse son
+    budget de requêtes SQL (BOURSES_QUERY_BUDGET, BOURSES_QUERY_BUDGETS par
+    nom d'URL). Synchrone sous WSGI, asynchrone sous ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        print(f"Request: {request.method} {request.path}")
-        print(f"User: {request.user}")
-        print(f"Authenticated: {request.user.is_authenticated}")
-        
-        response = self.get_response(request)
-        
-        print(f"Response: {response.status_code}")
-        return response
\ No newline at end of file
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect_metrics() as metrics:
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        with collect_metrics() as metrics:
+            response = await self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        duration = metrics.elapsed()
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.url_name or match.view_name) if match else None
+        budget = settings.BOURSES_QUERY_BUDGETS.get(view_name, settings.BOURSES_QUERY_BUDGET)
+
+        entry = {
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'size': self.response_size(response),
+        }
+        entry.update({f'{name}_ms': round(seconds * 1000, 2) for name, seconds in metrics.timings.items()})
+
+        self.record(request, response, view_name, duration, metrics, entry['size'])
+
+        if settings.BOURSES_SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(duration, metrics)
+
+        if view_name is not None and metrics.queries > budget:
+            entry['query_budget'] = budget
+            logger.warning(json.dumps(entry))
+        else:
+            logger.info(json.dumps(entry))
+        return response
+
+    @staticmethod
+    def record(request, response, view_name, duration, metrics, size):
+        """Alimente le registre Prometheus (users/metrics.py)"""
+        view = view_name or 'unmatched'
+        app_metrics.http_requests.inc(view=view, method=request.method, status=response.status_code)
+        app_metrics.http_request_duration.observe(duration, view=view)
+        app_metrics.http_request_queries.observe(metrics.queries, view=view)
+        if size:
+            app_metrics.http_response_bytes.inc(size, view=view)
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            app_metrics.conditional_get.inc(result='hit' if response.status_code == 304 else 'miss')
+        for alias, (count, seconds) in metrics.db_by_alias.items():
+            app_metrics.db_queries.inc(count, alias=alias)
+            app_metrics.db_query_seconds.inc(seconds, alias=alias)
+
+    @staticmethod
+    def response_size(response):
+        if response.streaming:
+            # Fichiers: FileResponse renseigne Content-Length
+            length = response.get('Content-Length')
+            return int(length) if length else None
+        return len(response.content)
+
+    @staticmethod
+    def server_timing(duration, metrics):
+        parts = [
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        ]
+        parts.extend(f'{name};dur={seconds * 1000:.1f}' for name, seconds in metrics.timings.items())
+        return ', '.join(parts)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Lecture de ses propres écritures avec la réplique: une requête qui a écrit
+    pose un cookie qui renvoie les lectures du client sur la base principale
+    pendant BOURSES_REPLICA_PIN_SECONDS (le temps que la réplique rattrape).
+    Sans alias `replica`, ne fait rien.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+
+        with request_scope(pinned=PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        if not replica_configured():
+            return await self.get_response(request)
+
+        with request_scope(pinned=PIN_COOKIE in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    @staticmethod
+    def pin(response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.BOURSES_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
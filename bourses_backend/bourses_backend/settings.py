@@ -3,6 +3,8 @@ Django settings for bourses_backend project.
 """
 
 from pathlib import Path
+from datetime import timedelta
+import copy
 import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -11,6 +13,9 @@ SECRET_KEY = 'django-insecure-votre-cle-secrete-ici'
 
 DEBUG = True
 
+# Environnement de déploiement: 'development' ou 'production'
+BOURSES_ENV = os.environ.get('BOURSES_ENV', 'development')
+
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
 
 INSTALLED_APPS = [
@@ -26,8 +31,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En premier: mesure toute la requête (voir BOURSES_QUERY_BUDGET)
+    'bourses_backend.middleware.InstrumentationMiddleware',
+    # Lecture de ses propres écritures avec la réplique (users/replicas.py)
+    'bourses_backend.middleware.ReplicaPinningMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # ETag + 304: les réponses en mode 'iso' sont identiques tant que les données ne changent pas
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,6 +78,55 @@ DATABASES = {
     }
 }
 
+# Connexions PostgreSQL. BOURSES_DB_POOL=true: pool psycopg intégré à Django
+# (psycopg[pool]), connexions partagées par les threads du processus et
+# vérifiées avant d'être prêtées. Sinon connexions persistantes réutilisées
+# pendant BOURSES_DB_CONN_MAX_AGE secondes (0 = une connexion par requête),
+# vérifiées au début de chaque requête. Le pool exige CONN_MAX_AGE = 0.
+BOURSES_DB_POOL = os.environ.get('BOURSES_DB_POOL', 'false').lower() == 'true'
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if BOURSES_DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            # Par processus (worker gunicorn/uvicorn): max_size x workers <= max_connections
+            'min_size': int(os.environ.get('BOURSES_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('BOURSES_DB_POOL_MAX_SIZE', 10)),
+            # Attente maximale d'une connexion libre, puis erreur (secondes)
+            'timeout': float(os.environ.get('BOURSES_DB_POOL_TIMEOUT', 10)),
+            # Connexions inutilisées fermées au-delà de min_size (secondes)
+            'max_idle': float(os.environ.get('BOURSES_DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('BOURSES_DB_CONN_MAX_AGE', 60))
+
+# Réplique en lecture (users/replicas.py): alias `replica`, défini quand
+# BOURSES_DB_REPLICA_HOST l'est (une seconde instance PostgreSQL locale
+# convient, ex. BOURSES_DB_REPLICA_PORT=5181). Mêmes réglages que la base
+# principale sauf surcharge. Les lectures des analytics, rapports, exports et
+# listes y sont envoyées, sauf si la requête a écrit récemment
+# (BOURSES_REPLICA_PIN_SECONDS) ou si la réplique a plus de
+# BOURSES_REPLICA_MAX_LAG secondes de retard.
+BOURSES_DB_REPLICA_HOST = os.environ.get('BOURSES_DB_REPLICA_HOST', '')
+if BOURSES_DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': BOURSES_DB_REPLICA_HOST,
+        'PORT': os.environ.get('BOURSES_DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'NAME': os.environ.get('BOURSES_DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('BOURSES_DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('BOURSES_DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        # Copie: options (et pool) propres à chaque alias
+        'OPTIONS': copy.deepcopy(DATABASES['default'].get('OPTIONS', {})),
+        # Tests: la réplique lit la base de test principale
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['users.replicas.ReplicaRouter']
+BOURSES_REPLICA_MAX_LAG = float(os.environ.get('BOURSES_REPLICA_MAX_LAG', 5))
+BOURSES_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('BOURSES_REPLICA_LAG_CHECK_INTERVAL', 2))
+BOURSES_REPLICA_PIN_SECONDS = int(os.environ.get('BOURSES_REPLICA_PIN_SECONDS', 10))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -113,6 +173,11 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Heure serveur de référence pour le calcul côté client des durées (users/timeformat.py)
+CORS_EXPOSE_HEADERS = [
+    'x-server-now',
+]
+
 # CSRF Configuration
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
@@ -131,23 +196,125 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_AGE = 1209600
 SESSION_COOKIE_SECURE = False
 
-# Django REST Framework - CONFIGURATION CORRIGÉE
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
+# Mode d'authentification: 'session' (défaut), 'jwt' (sans état) ou 'hybrid' (les deux)
+AUTH_MODE = os.environ.get('BOURSES_AUTH_MODE', 'session')
+
+AUTHENTICATION_CLASSES_BY_MODE = {
+    'session': [
         'rest_framework.authentication.SessionAuthentication',
     ],
+    'jwt': [
+        'users.authentication.StatelessJWTAuthentication',
+    ],
+    'hybrid': [
+        'users.authentication.StatelessJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+}
+
+# Encodage JSON: 'auto' (orjson si installé) ou 'stdlib'
+BOURSES_JSON_BACKEND = os.environ.get('BOURSES_JSON_BACKEND', 'auto')
+
+# Horodatages: 'humanized' (champ time_ago calculé par le serveur) ou 'iso'
+# (horodatages ISO seuls + en-tête X-Server-Now, réponses cachables).
+# Le client peut aussi choisir par requête avec ?time_format=iso
+BOURSES_TIME_FORMAT = os.environ.get('BOURSES_TIME_FORMAT', 'humanized')
+
+# Vues asynchrones (users/async_views.py) pour les routes d'entrées/sorties:
+# téléchargements, notifications, état de l'authentification. Actif par défaut
+# sous ASGI (bourses_backend/asgi.py, uvicorn); sous WSGI, une vue asynchrone
+# coûte une boucle d'événements par requête, les vues synchrones restent.
+BOURSES_ASYNC_VIEWS = os.environ.get('BOURSES_ASYNC_VIEWS', 'false').lower() == 'true'
+
+# Rapports admin: exécutés par `manage.py run_report_worker`. En mode eager
+# (développement sans worker), le rapport est généré directement dans la requête.
+BOURSES_REPORT_JOBS_EAGER = os.environ.get('BOURSES_REPORT_JOBS_EAGER', 'false').lower() == 'true'
+
+# Notifications: enregistrées dans l'outbox (NotificationEvent) puis créées par
+# `manage.py dispatch_notifications`. En mode eager (développement sans
+# dispatcher), elles sont créées juste après le commit de la requête.
+BOURSES_NOTIFICATIONS_EAGER = os.environ.get('BOURSES_NOTIFICATIONS_EAGER', 'false').lower() == 'true'
+
+# Rétention des notifications (`manage.py prune_notifications`, users/retention.py):
+# durée de conservation en jours par table et état de lecture (None = conserver).
+def _retention_days(name, default):
+    """Variable vide ou 'none': conserver indéfiniment (None)"""
+    value = os.environ.get(name, str(default)).strip()
+    return None if value.lower() in ('', 'none') else int(value)
+
+
+BOURSES_NOTIFICATION_RETENTION_DAYS = {
+    'admin_read': _retention_days('BOURSES_RETENTION_ADMIN_READ_DAYS', 30),
+    'admin_unread': _retention_days('BOURSES_RETENTION_ADMIN_UNREAD_DAYS', 180),
+    'student_read': _retention_days('BOURSES_RETENTION_STUDENT_READ_DAYS', 90),
+    'student_unread': _retention_days('BOURSES_RETENTION_STUDENT_UNREAD_DAYS', 365),
+    'outbox_dispatched': _retention_days('BOURSES_RETENTION_OUTBOX_DAYS', 7),
+}
+# Archives JSONL compressées des notifications supprimées
+BOURSES_NOTIFICATION_ARCHIVE_DIR = os.environ.get(
+    'BOURSES_NOTIFICATION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archives', 'notifications')
+)
+# Alertes système répétées regroupées (option --collapse) au-delà de ce délai
+BOURSES_COLLAPSE_ALERTS_AFTER_DAYS = int(os.environ.get('BOURSES_COLLAPSE_ALERTS_AFTER_DAYS', 1))
+
+# Exports admin (users/exports.py): processus utilisés par une requête web.
+# La commande `manage.py export_data` utilise par défaut tous les cœurs.
+BOURSES_EXPORT_WORKERS = int(os.environ.get('BOURSES_EXPORT_WORKERS', '1'))
+
+# Instrumentation des requêtes (bourses_backend/middleware.py): ligne de log JSON
+# par requête (logger 'bourses.requests') et avertissement au-delà du budget de
+# requêtes SQL, global ou par nom d'URL (ex. {'admin_analytics': 40}).
+BOURSES_QUERY_BUDGET = int(os.environ.get('BOURSES_QUERY_BUDGET', 25))
+BOURSES_QUERY_BUDGETS = {}
+# En-tête Server-Timing (durées app/db/serialize/render), désactivé par défaut en production
+BOURSES_SERVER_TIMING = os.environ.get(
+    'BOURSES_SERVER_TIMING', 'false' if BOURSES_ENV == 'production' else 'true'
+).lower() == 'true'
+
+# Métriques Prometheus (GET /api/users/admin/system/metrics/): jeton Bearer si
+# défini, sinon accès limité aux adresses locales
+BOURSES_METRICS_TOKEN = os.environ.get('BOURSES_METRICS_TOKEN', '')
+BOURSES_METRICS_ALLOWED_IPS = os.environ.get('BOURSES_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Relevés système (users/sampler.py): thread d'arrière-plan démarré par la page
+# système admin, un relevé toutes les N secondes, historique de M relevés
+BOURSES_SYSTEM_SAMPLER = os.environ.get('BOURSES_SYSTEM_SAMPLER', 'true').lower() == 'true'
+BOURSES_SYSTEM_SAMPLE_INTERVAL = float(os.environ.get('BOURSES_SYSTEM_SAMPLE_INTERVAL', 15))
+BOURSES_SYSTEM_SAMPLE_HISTORY = int(os.environ.get('BOURSES_SYSTEM_SAMPLE_HISTORY', 120))
+
+# L'API navigable n'est proposée qu'en développement
+RENDERER_CLASSES = ['users.renderers.FastJSONRenderer']
+if BOURSES_ENV != 'production':
+    RENDERER_CLASSES.append('rest_framework.renderers.BrowsableAPIRenderer')
+
+# Django REST Framework - CONFIGURATION CORRIGÉE
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': AUTHENTICATION_CLASSES_BY_MODE[AUTH_MODE],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'users.renderers.FastJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+    'DEFAULT_RENDERER_CLASSES': RENDERER_CLASSES,
+    # Limite partagée par les ViewSets (users/viewsets.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'bourses_api': os.environ.get('BOURSES_API_THROTTLE_RATE', '1200/min'),
+    },
+}
+
+# JWT Configuration (utilisée quand AUTH_MODE vaut 'jwt' ou 'hybrid')
+SIMPLE_JWT = {
+    # Fenêtre de révocation: un compte désactivé ou supprimé garde l'accès
+    # jusqu'à l'expiration de son jeton d'accès (claims sans requête SQL)
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.environ.get('BOURSES_JWT_ACCESS_MINUTES', 15))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.environ.get('BOURSES_JWT_REFRESH_DAYS', 1))),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'USER_ID_FIELD': 'id',
+    'USER_ID_CLAIM': 'user_id',
+    'UPDATE_LAST_LOGIN': False,
 }
 
 # File upload settings - CONFIGURATION CORRIGÉE
@@ -174,5 +341,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'bourses.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('BOURSES_REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
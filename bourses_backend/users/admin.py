@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, EligibilityRule, StudentDocument, ScholarshipApplication, AdminNotification, StudentNotification
+from .models import CustomUser, EligibilityRule, StudentDocument, ScholarshipApplication, AdminNotification, StudentNotification, ReportJob, DailySnapshot, NotificationEvent, AdminNotificationCursor, MaintenanceJob
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -46,8 +46,8 @@ class ScholarshipApplicationAdmin(admin.ModelAdmin):
 
 @admin.register(AdminNotification)
 class AdminNotificationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'notification_type', 'is_read', 'created_at')
-    list_filter = ('notification_type', 'is_read', 'created_at')
+    list_display = ('title', 'notification_type', 'created_at')
+    list_filter = ('notification_type', 'created_at')
     search_fields = ('title', 'message')
     readonly_fields = ('created_at',)
 
@@ -69,4 +69,34 @@ class StudentNotificationAdmin(admin.ModelAdmin):
         ('Dates', {
             'fields': ('created_at', 'read_at')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'report_type', 'status', 'requested_by', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('report_type', 'status', 'created_at')
+    readonly_fields = ('data_fingerprint', 'created_at', 'started_at', 'finished_at')
+
+@admin.register(MaintenanceJob)
+class MaintenanceJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'requested_by', 'tables_done', 'tables_total', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('report', 'created_at', 'started_at', 'finished_at')
+
+@admin.register(DailySnapshot)
+class DailySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('date', 'new_users', 'documents_uploaded', 'documents_verified', 'applications_created', 'computed_at')
+    date_hierarchy = 'date'
+    readonly_fields = ('computed_at',)
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'audience', 'notification_type', 'title', 'student', 'created_at', 'dispatched_at')
+    list_filter = ('audience', 'notification_type', 'dispatched_at')
+    raw_id_fields = ('student', 'related_user', 'related_document', 'related_application')
+    readonly_fields = ('created_at', 'dispatched_at')
+
+@admin.register(AdminNotificationCursor)
+class AdminNotificationCursorAdmin(admin.ModelAdmin):
+    list_display = ('admin', 'last_seen_at', 'updated_at')
+    readonly_fields = ('updated_at',)
@@ -1,7 +1,14 @@
 # users/apps.py
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    verbose_name = 'Gestion des Utilisateurs'
\ No newline at end of file
+    verbose_name = 'Gestion des Utilisateurs'
+
+    def ready(self):
+        from .instrumentation import instrument_connection
+
+        # Requêtes SQL comptées par InstrumentationMiddleware, quel que soit le thread de la connexion
+        connection_created.connect(instrument_connection, dispatch_uid='users.instrument_connection')
@@ -0,0 +1,405 @@
+# users/async_views.py
+"""
+Variantes asynchrones des vues d'entrées/sorties (téléchargements,
+notifications, état de l'authentification) pour un déploiement ASGI
+(uvicorn bourses_backend.asgi:application, BOURSES_ASYNC_VIEWS): pendant
+qu'une requête attend la base ou le disque, le worker sert les autres au
+lieu de bloquer un thread.
+
+DRF ne gère pas les vues asynchrones: ce sont des vues Django décorées par
+async_api_view(), qui reprend l'authentification, les permissions, le
+throttling des ViewSets et le format d'erreur de DRF. Les réponses sont
+celles des vues synchrones remplacées (use_async_views, même nom d'URL).
+"""
+import asyncio
+import logging
+import mimetypes
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import URLPattern
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, permissions, status
+from rest_framework.throttling import ScopedRateThrottle
+
+from .authentication import StatelessJWTAuthentication, aauthenticate, jwt_enabled
+from .instrumentation import timed
+from .lean_serializers import LeanStudentNotificationSerializer
+from .metrics import download_bytes
+from .models import AdminNotification, AdminNotificationCursor, StudentDocument, StudentNotification
+from .permissions import IsAdminUserType, IsOwnerOrAdmin, is_admin
+from .renderers import loads, render_json
+from .replicas import replica_reads
+from .serializers import AdminNotificationSerializer, MarkReadSerializer, StudentNotificationSerializer, UserSerializer
+from .timeformat import add_server_now_header
+
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus sur le disque (un passage par le pool de threads par bloc)
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    with timed('render'):
+        return HttpResponse(render_json(data), status=status_code, content_type='application/json')
+
+
+def error_response(request, exc):
+    """Réponse d'une exception DRF, comme rest_framework.views.exception_handler"""
+    status_code = exc.status_code
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # 401 si le premier authentificateur fournit WWW-Authenticate (JWT), 403 sinon (session)
+        if jwt_enabled():
+            headers['WWW-Authenticate'] = StatelessJWTAuthentication().authenticate_header(request)
+        else:
+            status_code = status.HTTP_403_FORBIDDEN
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = json_response(data, status_code)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def request_data(request):
+    """Corps de la requête: JSON (comme FastJSONParser) ou formulaire"""
+    if request.content_type != 'application/json':
+        return request.POST
+    if not request.body:
+        return {}
+    try:
+        return loads(request.body)
+    except ValueError as exc:
+        raise exceptions.ParseError(f'JSON parse error - {exc}')
+
+
+async def check_throttle(request, scope):
+    """ScopedRateThrottle des ViewSets; le cache est interrogé hors de la boucle d'événements"""
+    throttle = ScopedRateThrottle()
+    view = SimpleNamespace(throttle_scope=scope)
+    if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, view):
+        raise exceptions.Throttled(throttle.wait())
+
+
+def async_api_view(methods, permission_classes=(permissions.IsAuthenticated,), throttle_scope=None):
+    """
+    Équivalent de @api_view pour une vue `async def`: authentification
+    (aauthenticate), permissions, throttling puis méthode autorisée, dans
+    l'ordre de APIView; les exceptions DRF deviennent des réponses JSON.
+    """
+    def decorator(view):
+        # CSRF contrôlé par aauthenticate pour les seules sessions, comme SessionAuthentication
+        @csrf_exempt
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            try:
+                request.user = await aauthenticate(request)
+                for permission_class in permission_classes:
+                    permission = permission_class()
+                    if not permission.has_permission(request, None):
+                        if not request.user.is_authenticated:
+                            raise exceptions.NotAuthenticated()
+                        raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+                if throttle_scope is not None:
+                    await check_throttle(request, throttle_scope)
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(request, exc)
+        return wrapped
+    return decorator
+
+
+# ===== AUTHENTICATION =====
+
+@async_api_view(['GET'], permission_classes=[permissions.AllowAny])
+async def auth_status(request):
+    """Vérifier l'état de l'authentification"""
+    user = request.user
+    return json_response({
+        'authenticated': user.is_authenticated,
+        'username': user.username if user.is_authenticated else None,
+        'user_type': user.user_type if user.is_authenticated else None
+    })
+
+
+@async_api_view(['GET'])
+async def get_current_user(request):
+    """Récupérer l'utilisateur connecté"""
+    user = request.user
+    # Utilisateur reconstruit depuis les claims JWT: champs manquants chargés en une requête
+    deferred = user.get_deferred_fields() & set(UserSerializer.Meta.fields)
+    if deferred:
+        await user.arefresh_from_db(fields=sorted(deferred))
+    return json_response(UserSerializer(user).data)
+
+
+# ===== DOCUMENTS =====
+
+async def read_chunks(file, chunk_size=FILE_CHUNK_SIZE):
+    """Contenu du fichier par blocs, lus dans le pool de threads"""
+    try:
+        while chunk := await asyncio.to_thread(file.read, chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+@async_api_view(['GET'], throttle_scope='bourses_api')
+async def download_document(request, pk):
+    """Téléchargement direct d'un document, envoyé par blocs sans bloquer la boucle d'événements"""
+    queryset = IsOwnerOrAdmin.scope_queryset(
+        request, StudentDocument.objects.only('file', 'original_filename', 'file_size')
+    )
+    try:
+        document = await queryset.aget(pk=pk)
+    except StudentDocument.DoesNotExist:
+        raise exceptions.NotFound("Document non trouvé")
+
+    if not document.file:
+        return add_server_now_header(json_response(
+            {"error": "Fichier non trouvé dans la base de données"}, status.HTTP_404_NOT_FOUND
+        ))
+
+    file_path = document.file.path
+    try:
+        file = await asyncio.to_thread(open, file_path, 'rb')
+    except FileNotFoundError:
+        logger.error(f"File not found on disk: {file_path}")
+        return add_server_now_header(json_response(
+            {"error": "Fichier non trouvé sur le serveur"}, status.HTTP_404_NOT_FOUND
+        ))
+
+    logger.info(f"Serving file: {file_path}")
+
+    content_type, _ = mimetypes.guess_type(document.original_filename)
+    response = StreamingHttpResponse(read_chunks(file), content_type=content_type or 'application/octet-stream')
+    response['Content-Disposition'] = content_disposition_header(True, document.original_filename)
+    response['Content-Length'] = document.file_size
+    download_bytes.inc(document.file_size, kind='document')
+    return add_server_now_header(response)
+
+
+# ===== ADMIN NOTIFICATIONS =====
+
+@async_api_view(['GET'], permission_classes=[IsAdminUserType])
+async def get_admin_notifications(request):
+    """Récupérer les notifications pour l'admin (non lues = créées après son curseur de lecture)"""
+    related = ('related_user', 'related_document')
+    with replica_reads():
+        last_seen_at = await AdminNotificationCursor.alast_seen(request.user)
+        unread = AdminNotification.unread_for(request.user, last_seen_at)
+        unread_notifications = [
+            notification async for notification in unread.select_related(*related).order_by('-created_at')[:10]
+        ]
+        recent_notifications = [
+            notification async for notification in
+            AdminNotification.objects.select_related(*related).order_by('-created_at')[:20]
+        ]
+        unread_count = await unread.acount()
+
+    # Même `now` pour les deux listes
+    context = {'request': request, 'now': timezone.now(), 'last_seen_at': last_seen_at}
+    return add_server_now_header(json_response({
+        'unread': AdminNotificationSerializer(unread_notifications, many=True, context=context).data,
+        'recent': AdminNotificationSerializer(recent_notifications, many=True, context=context).data,
+        'unread_count': unread_count
+    }), context['now'])
+
+
+@async_api_view(['POST'], permission_classes=[IsAdminUserType])
+async def mark_admin_notifications_read(request):
+    """Marquer des notifications admin comme lues (ids ou borne haute), voir la vue synchrone"""
+    serializer = MarkReadSerializer(data=request_data(request))
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    last_seen_at = await AdminNotificationCursor.alast_seen(request.user)
+    seen_at = await serializer.aseen_at(AdminNotification.objects.all())
+    updated_count = 0
+    if seen_at is not None and seen_at > last_seen_at:
+        await AdminNotificationCursor.aadvance(request.user, seen_at)
+        updated_count = await AdminNotification.unread_for(request.user, last_seen_at).filter(
+            created_at__lte=seen_at
+        ).acount()
+        last_seen_at = seen_at
+
+    return json_response({
+        "message": f"{updated_count} notifications marquées comme lues",
+        "updated_count": updated_count,
+        "unread_count": await AdminNotification.unread_for(request.user, last_seen_at).acount()
+    })
+
+
+@async_api_view(['POST'])
+async def mark_notification_read(request, notification_id):
+    """Marquer une notification comme lue (AdminNotification pour un admin)"""
+    if is_admin(request.user):
+        try:
+            notification = await AdminNotification.objects.select_related(
+                'related_user', 'related_document'
+            ).aget(id=notification_id)
+        except AdminNotification.DoesNotExist:
+            return json_response({"error": "Notification non trouvée"}, status.HTTP_404_NOT_FOUND)
+        # Le curseur de l'admin avance jusqu'à cette notification (les plus anciennes sont lues aussi)
+        await AdminNotificationCursor.aadvance(request.user, notification.created_at)
+        context = {'request': request, 'last_seen_at': notification.created_at}
+        return json_response({
+            "message": "Notification marquée comme lue",
+            "notification": AdminNotificationSerializer(notification, context=context).data
+        })
+
+    try:
+        notification = await StudentNotification.objects.select_related(
+            'related_document', 'related_application'
+        ).aget(id=notification_id, student=request.user)
+    except StudentNotification.DoesNotExist:
+        return json_response({"error": "Notification non trouvée"}, status.HTTP_404_NOT_FOUND)
+
+    await notification.amark_as_read()
+    return json_response({
+        "message": "Notification marquée comme lue",
+        "notification": StudentNotificationSerializer(notification).data
+    })
+
+
+# ===== STUDENT NOTIFICATIONS =====
+
+@async_api_view(['GET'])
+async def get_student_notifications(request):
+    """Récupérer les notifications de l'étudiant"""
+    try:
+        serializer = LeanStudentNotificationSerializer(request=request)
+        notifications = serializer.values(
+            StudentNotification.objects.filter(student=request.user).order_by('-created_at')
+        )
+
+        # Notifications non lues (prioritaires), puis récentes (toutes)
+        unread_rows = [row async for row in notifications.filter(is_read=False)[:20]]
+        recent_rows = [row async for row in notifications[:50]]
+
+        return add_server_now_header(json_response({
+            'unread': serializer.serialize(unread_rows),
+            'recent': serializer.serialize(recent_rows),
+            'unread_count': len(unread_rows),
+            'important_count': sum(1 for row in unread_rows if row['is_important'])
+        }), serializer.now)
+
+    except Exception as e:
+        logger.error(f"Erreur chargement notifications étudiant: {str(e)}")
+        return json_response({
+            'unread': [],
+            'recent': [],
+            'unread_count': 0,
+            'important_count': 0
+        })
+
+
+def student_notifications(request):
+    return StudentNotification.objects.filter(student=request.user)
+
+
+async def get_student_notification(request, pk):
+    try:
+        return await student_notifications(request).select_related(
+            'related_document', 'related_application'
+        ).aget(pk=pk)
+    except StudentNotification.DoesNotExist:
+        raise exceptions.NotFound("Notification non trouvée")
+
+
+# Routes des actions de StudentNotificationViewSet: throttling et en-tête X-Server-Now des ViewSets
+
+@async_api_view(['POST'], throttle_scope='bourses_api')
+async def mark_student_notification_read(request, pk):
+    """Marquer une notification comme lue"""
+    notification = await get_student_notification(request, pk)
+    await notification.amark_as_read()
+
+    return add_server_now_header(json_response({
+        "message": "Notification marquée comme lue",
+        "notification": StudentNotificationSerializer(notification).data
+    }))
+
+
+@async_api_view(['POST'], throttle_scope='bourses_api')
+async def mark_all_notifications_read(request):
+    """Marquer toutes les notifications comme lues"""
+    updated_count = await student_notifications(request).filter(is_read=False).aupdate(
+        is_read=True, read_at=timezone.now()
+    )
+
+    return add_server_now_header(json_response({
+        "message": f"{updated_count} notifications marquées comme lues",
+        "updated_count": updated_count
+    }))
+
+
+@async_api_view(['POST'], throttle_scope='bourses_api')
+async def mark_notifications_read_bulk(request):
+    """Marquer comme lues une liste d'ids ou toutes les notifications jusqu'à une borne"""
+    serializer = MarkReadSerializer(data=request_data(request))
+    if not serializer.is_valid():
+        return add_server_now_header(json_response(serializer.errors, status.HTTP_400_BAD_REQUEST))
+
+    updated_count = await serializer.filter(student_notifications(request)).aupdate(
+        is_read=True, read_at=timezone.now()
+    )
+
+    return add_server_now_header(json_response({
+        "message": f"{updated_count} notifications marquées comme lues",
+        "updated_count": updated_count
+    }))
+
+
+@async_api_view(['DELETE'], throttle_scope='bourses_api')
+async def delete_notification(request, pk):
+    """Supprimer une notification"""
+    notification = await get_student_notification(request, pk)
+    await notification.adelete()
+    return add_server_now_header(json_response({"message": "Notification supprimée avec succès"}))
+
+
+@async_api_view(['POST'], throttle_scope='bourses_api')
+async def delete_all_notifications(request):
+    """Supprimer toutes les notifications"""
+    deleted_count, _ = await student_notifications(request).adelete()
+
+    return add_server_now_header(json_response({
+        "message": f"{deleted_count} notifications supprimées",
+        "deleted_count": deleted_count
+    }))
+
+
+# Nom d'URL (users/urls.py) -> variante asynchrone
+ASYNC_VIEWS = {
+    'auth_status': auth_status,
+    'current_user': get_current_user,
+    'download_document': download_document,
+    'admin_notifications': get_admin_notifications,
+    'mark_admin_notifications_read': mark_admin_notifications_read,
+    'mark_notification_read': mark_notification_read,
+    'student_notifications': get_student_notifications,
+    'mark_student_notification_read': mark_student_notification_read,
+    'mark_all_notifications_read': mark_all_notifications_read,
+    'mark_notifications_read_bulk': mark_notifications_read_bulk,
+    'delete_notification': delete_notification,
+    'delete_all_notifications': delete_all_notifications,
+}
+
+
+def use_async_views(patterns):
+    """urlpatterns avec les variantes asynchrones à la place des vues synchrones (même route, même nom)"""
+    return [
+        URLPattern(pattern.pattern, ASYNC_VIEWS[pattern.name], pattern.default_args, pattern.name)
+        if isinstance(pattern, URLPattern) and pattern.name in ASYNC_VIEWS else pattern
+        for pattern in patterns
+    ]
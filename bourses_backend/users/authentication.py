@@ -0,0 +1,111 @@
+# users/authentication.py
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from rest_framework import serializers
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import CustomUser
+
+# Champs de CustomUser recopiés dans les claims du jeton. Ils suffisent aux
+# vérifications faites dans les vues (user_type, nom complet, email...).
+USER_CLAIM_FIELDS = ('username', 'user_type', 'first_name', 'last_name', 'email', 'is_active', 'is_staff')
+
+
+def jwt_enabled():
+    """Indique si le mode d'authentification JWT est actif"""
+    return settings.AUTH_MODE in ('jwt', 'hybrid')
+
+
+def add_user_claims(token, user):
+    """Ajouter les informations de l'utilisateur aux claims du jeton"""
+    for field in USER_CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def tokens_for_user(user):
+    """Générer une paire de jetons (refresh + access) pour un utilisateur"""
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def user_from_claims(validated_token):
+    """
+    Reconstruire un CustomUser à partir des claims, sans requête SQL.
+    Les champs absents du jeton sont différés et chargés à la demande.
+    """
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Le jeton ne contient pas d'identifiant utilisateur")
+
+    claims = {field: validated_token[field] for field in USER_CLAIM_FIELDS if field in validated_token}
+    claims['id'] = CustomUser._meta.pk.to_python(user_id)
+
+    # from_db attend les valeurs dans l'ordre des champs concrets du modèle
+    fields = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in claims]
+    return CustomUser.from_db('default', fields, [claims[name] for name in fields])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authentification JWT sans lookup de session ni requête sur la table des
+    utilisateurs. `is_active` vient des claims: un compte désactivé ou
+    supprimé garde l'accès jusqu'à l'expiration de son jeton d'accès
+    (SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'], BOURSES_JWT_ACCESS_MINUTES, 15
+    minutes par défaut). Le rafraîchissement relit le compte en base et
+    refuse les comptes inactifs ou supprimés (TokenRefreshSerializer).
+    """
+
+    def get_user(self, validated_token):
+        user = user_from_claims(validated_token)
+        if not user.is_active:
+            raise InvalidToken("Compte désactivé")
+        return user
+
+
+async def aauthenticate(request):
+    """
+    Authentification des vues asynchrones (users/async_views.py), dans l'ordre
+    des classes DRF du mode: jeton JWT (sans requête SQL), puis session avec
+    contrôle CSRF comme SessionAuthentication. Lève AuthenticationFailed
+    (jeton invalide) ou PermissionDenied (CSRF).
+    """
+    if jwt_enabled():
+        result = StatelessJWTAuthentication().authenticate(request)
+        if result is not None:
+            return result[0]
+    if settings.AUTH_MODE in ('session', 'hybrid'):
+        user = await request.auser()
+        if user.is_authenticated and user.is_active:
+            SessionAuthentication().enforce_csrf(request)
+            return user
+    return AnonymousUser()
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Rafraîchir le jeton d'accès en réactualisant les claims depuis la base:
+    c'est ici que la désactivation ou la suppression d'un compte prend effet
+    pour les jetons déjà émis.
+    """
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        user = CustomUser.objects.filter(
+            id=refresh.get(api_settings.USER_ID_CLAIM),
+            is_active=True
+        ).first()
+        if user is None:
+            raise serializers.ValidationError("Aucun compte actif pour ce jeton")
+
+        access = add_user_claims(AccessToken.for_user(user), user)
+        return {'access': str(access)}
@@ -0,0 +1,104 @@
+# users/broadcasts.py
+"""
+Envoi groupé de notifications étudiant (alertes système, rappels de date
+limite) à une population ciblée par requête. Seuls les identifiants des
+étudiants sont lus; les notifications sont insérées par paquets avec
+bulk_create dans une transaction unique (tout ou rien: une diffusion
+relancée après erreur ne crée pas de doublons).
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .metrics import notifications_created
+from .models import CustomUser, StudentDocument, ScholarshipApplication, StudentNotification
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_BATCH_SIZE = 2000
+
+BROADCAST_NOTIFICATION_TYPES = ('system_alert', 'deadline_reminder', 'info_request')
+
+AUDIENCES = {
+    'all_students': "Tous les étudiants actifs",
+    'draft_applications': "Étudiants ayant une demande en brouillon",
+    'missing_documents': "Étudiants sans document des types indiqués",
+}
+
+
+class BroadcastError(ValueError):
+    """Paramètres de diffusion invalides (message affichable à l'utilisateur)"""
+
+
+def audience_queryset(audience, document_types=None):
+    """Identifiants des étudiants actifs visés par `audience`, triés par clé"""
+    students = CustomUser.objects.filter(user_type='student', is_active=True)
+
+    if audience == 'all_students':
+        pass
+    elif audience == 'draft_applications':
+        students = students.filter(Exists(
+            ScholarshipApplication.objects.filter(student=OuterRef('pk'), status='draft')
+        ))
+    elif audience == 'missing_documents':
+        valid_types = {doc_type for doc_type, _ in StudentDocument.DOCUMENT_TYPE_CHOICES}
+        document_types = list(document_types or valid_types)
+        unknown = set(document_types) - valid_types
+        if unknown:
+            raise BroadcastError(f"Types de document inconnus: {', '.join(sorted(unknown))}")
+        # Il manque au moins un des types demandés
+        missing = Q()
+        for doc_type in document_types:
+            missing |= ~Exists(StudentDocument.objects.filter(student=OuterRef('pk'), document_type=doc_type))
+        students = students.filter(missing)
+    else:
+        raise BroadcastError(f"Audience inconnue: {audience}. Audiences disponibles: {', '.join(AUDIENCES)}")
+
+    return students.order_by('pk').values_list('pk', flat=True)
+
+
+@dataclass
+class BroadcastResult:
+    recipients: int
+    batches: int
+    seconds: float
+
+
+def broadcast(audience, notification_type, title, message, is_important=False,
+              document_types=None, batch_size=BROADCAST_BATCH_SIZE):
+    """Crée une notification par étudiant ciblé; retourne un BroadcastResult"""
+    if notification_type not in BROADCAST_NOTIFICATION_TYPES:
+        raise BroadcastError(
+            f"Type de notification non diffusable: {notification_type}. "
+            f"Types disponibles: {', '.join(BROADCAST_NOTIFICATION_TYPES)}"
+        )
+    student_ids = audience_queryset(audience, document_types)
+
+    started = time.perf_counter()
+    batches = 0
+    with transaction.atomic():
+        # Liste des clés figée au début de la transaction: pas d'instance CustomUser chargée
+        student_ids = list(student_ids)
+        for offset in range(0, len(student_ids), batch_size):
+            StudentNotification.objects.bulk_create([
+                StudentNotification(
+                    student_id=student_id,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    is_important=is_important
+                )
+                for student_id in student_ids[offset:offset + batch_size]
+            ], batch_size=batch_size)
+            batches += 1
+
+    result = BroadcastResult(len(student_ids), batches, time.perf_counter() - started)
+    notifications_created.inc(result.recipients, audience='student', source='broadcast')
+    logger.info(
+        f"Broadcast {notification_type} to {audience}: {result.recipients} notifications, "
+        f"{result.batches} batches, {result.seconds:.2f}s"
+    )
+    return result
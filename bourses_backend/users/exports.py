@@ -0,0 +1,690 @@
+# users/exports.py
+"""
+Pipeline d'export multi-format: CSV, JSON Lines, Parquet, Arrow IPC et XLSX.
+
+La table filtrée est découpée en plages de clés primaires; chaque plage est
+écrite dans un fichier partiel (par un pool de processus si workers > 1),
+puis les parties sont concaténées dans l'ordre des clés. Parquet et Arrow
+nécessitent pyarrow, XLSX nécessite openpyxl (dépendances optionnelles).
+"""
+import csv
+import io
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from django.db import connections, models, router
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import (CustomUser, EligibilityRule, StudentDocument, AdminNotification,
+                     ScholarshipApplication, StudentNotification, DailySnapshot, format_file_size)
+from .renderers import dumps
+from .snapshots import day_start
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow est optionnel (formats parquet et arrow)
+    pyarrow = None
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl est optionnel (format xlsx)
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 5000
+# En dessous, une seule plage: le coût de démarrage du pool dépasserait le gain
+PARALLEL_MIN_ROWS = 50000
+
+TRUE_VALUES = ('1', 'true', 'oui', 'yes')
+FALSE_VALUES = ('0', 'false', 'non', 'no')
+
+
+class ExportError(ValueError):
+    """Paramètres d'export invalides (type, format ou filtre)"""
+
+
+def full_name(first_name, last_name):
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+def yes_no(value):
+    return 'Oui' if value else 'Non'
+
+
+@dataclass
+class Column:
+    """
+    Colonne exportée. `source` est un chemin values_list (ou un tuple de chemins
+    combinés par `compute`); `text` formate la valeur pour CSV, les formats typés
+    (JSONL, Parquet, Arrow, XLSX) gardent la valeur brute.
+    """
+    name: str
+    header: str
+    source: object
+    compute: object = None
+    text: object = None
+    kind: str = None
+
+    @property
+    def sources(self):
+        return self.source if isinstance(self.source, tuple) else (self.source,)
+
+
+@dataclass
+class ExportSpec:
+    model: type
+    columns: list
+    # paramètre de requête -> (lookup, type de valeur)
+    filters: dict
+    # colonne calculée par la base -> fabrique de l'expression (kind de la colonne obligatoire)
+    annotations: dict = None
+
+    def __post_init__(self):
+        self.annotations = self.annotations or {}
+        for column in self.columns:
+            if column.kind is None:
+                column.kind = self.infer_kind(column)
+            if column.text is None:
+                column.text = self.infer_text(column)
+
+    def resolve_field(self, path):
+        model = self.model
+        parts = path.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.get_field(parts[-1])
+        # Clé étrangère: la valeur exportée est l'identifiant
+        return field.target_field if field.is_relation else field
+
+    def infer_kind(self, column):
+        if column.compute is not None:
+            return 'string'
+        field = self.resolve_field(column.source)
+        if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+            return 'int'
+        if isinstance(field, models.BooleanField):
+            return 'bool'
+        if isinstance(field, models.DateTimeField):
+            return 'datetime'
+        if isinstance(field, models.DateField):
+            return 'date'
+        if isinstance(field, models.DecimalField):
+            return 'decimal'
+        if isinstance(field, models.JSONField):
+            return 'json'
+        return 'string'
+
+    def infer_text(self, column):
+        if column.compute is None and column.source not in self.annotations:
+            choices = dict(self.resolve_field(column.source).flatchoices)
+            if choices:
+                return lambda value: choices.get(value, value)
+        return TEXT_FORMATTERS.get(column.kind)
+
+    def queryset(self, using):
+        queryset = self.model.objects.using(using)
+        if self.annotations:
+            queryset = queryset.annotate(**{name: make() for name, make in self.annotations.items()})
+        return queryset
+
+    @property
+    def value_fields(self):
+        fields = []
+        for column in self.columns:
+            fields.extend(column.sources)
+        return fields
+
+    def row_values(self, raw):
+        """Ligne values_list -> valeurs typées, dans l'ordre des colonnes"""
+        values = []
+        position = 0
+        for column in self.columns:
+            width = len(column.sources)
+            if column.compute is not None:
+                values.append(column.compute(*raw[position:position + width]))
+            else:
+                values.append(raw[position])
+            position += width
+        return values
+
+
+def format_datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+TEXT_FORMATTERS = {
+    'bool': yes_no,
+    'datetime': format_datetime,
+    'date': lambda value: value.strftime('%Y-%m-%d') if value else '',
+    'json': lambda value: dumps(value).decode('utf-8'),
+}
+
+
+DATE_FILTER = {'after': 'gte', 'before': 'lt'}
+
+EXPORTS = {
+    'users': ExportSpec(
+        model=CustomUser,
+        columns=[
+            Column('id', 'ID', 'id'),
+            Column('username', 'Username', 'username'),
+            Column('email', 'Email', 'email'),
+            Column('first_name', 'Prénom', 'first_name'),
+            Column('last_name', 'Nom', 'last_name'),
+            Column('user_type', 'Type', 'user_type'),
+            Column('phone_number', 'Téléphone', 'phone_number'),
+            Column('date_of_birth', 'Date de naissance', 'date_of_birth'),
+            Column('date_joined', 'Date inscription', 'date_joined'),
+        ],
+        filters={
+            'user_type': ('user_type', 'str'),
+            'is_active': ('is_active', 'bool'),
+            'joined_after': ('date_joined', 'after'),
+            'joined_before': ('date_joined', 'before'),
+        },
+    ),
+    'documents': ExportSpec(
+        model=StudentDocument,
+        columns=[
+            Column('id', 'ID', 'id'),
+            Column('student_name', 'Étudiant', ('student__first_name', 'student__last_name'), compute=full_name),
+            Column('student_email', 'Email étudiant', 'student__email'),
+            Column('document_type', 'Type document', 'document_type'),
+            Column('original_filename', 'Nom fichier', 'original_filename'),
+            Column('file_size', 'Taille', 'file_size', text=format_file_size),
+            Column('is_verified', 'Vérifié', 'is_verified'),
+            Column('verified_by_name', 'Vérifié par', ('verified_by__first_name', 'verified_by__last_name'),
+                   compute=full_name),
+            Column('uploaded_at', 'Date upload', 'uploaded_at'),
+        ],
+        filters={
+            'student': ('student_id', 'int'),
+            'document_type': ('document_type', 'str'),
+            'is_verified': ('is_verified', 'bool'),
+            'uploaded_after': ('uploaded_at', 'after'),
+            'uploaded_before': ('uploaded_at', 'before'),
+        },
+    ),
+    'notifications': ExportSpec(
+        model=AdminNotification,
+        columns=[
+            Column('id', 'ID', 'id'),
+            Column('notification_type', 'Type', 'notification_type'),
+            Column('title', 'Titre', 'title'),
+            Column('message', 'Message', 'message'),
+            Column('is_read', 'Lu', 'is_read', kind='bool'),
+            Column('created_at', 'Date création', 'created_at'),
+        ],
+        filters={
+            'notification_type': ('notification_type', 'str'),
+            'is_read': ('is_read', 'bool'),
+            'created_after': ('created_at', 'after'),
+            'created_before': ('created_at', 'before'),
+        },
+        # Lue par au moins un admin (curseurs de lecture)
+        annotations={'is_read': AdminNotification.read_by_any_admin},
+    ),
+    'student_notifications': ExportSpec(
+        model=StudentNotification,
+        columns=[
+            Column('id', 'ID', 'id'),
+            Column('student', 'ID étudiant', 'student'),
+            Column('student_name', 'Étudiant', ('student__first_name', 'student__last_name'), compute=full_name),
+            Column('notification_type', 'Type', 'notification_type'),
+            Column('title', 'Titre', 'title'),
+            Column('message', 'Message', 'message'),
+            Column('is_read', 'Lu', 'is_read'),
+            Column('is_important', 'Important', 'is_important'),
+            Column('related_document', 'Document lié', 'related_document'),
+            Column('related_application', 'Demande liée', 'related_application'),
+            Column('created_at', 'Date création', 'created_at'),
+            Column('read_at', 'Date lecture', 'read_at'),
+        ],
+        filters={
+            'student': ('student_id', 'int'),
+            'notification_type': ('notification_type', 'str'),
+            'is_read': ('is_read', 'bool'),
+            'created_after': ('created_at', 'after'),
+            'created_before': ('created_at', 'before'),
+        },
+    ),
+    'applications': ExportSpec(
+        model=ScholarshipApplication,
+        columns=[
+            Column('id', 'ID', 'id'),
+            Column('student', 'ID étudiant', 'student'),
+            Column('student_name', 'Étudiant', ('student__first_name', 'student__last_name'), compute=full_name),
+            Column('student_email', 'Email étudiant', 'student__email'),
+            Column('scholarship_type', 'Type de bourse', 'scholarship_type'),
+            Column('title', 'Titre', 'title'),
+            Column('amount_requested', 'Montant demandé', 'amount_requested'),
+            Column('status', 'Statut', 'status'),
+            Column('final_amount', 'Montant accordé', 'final_amount'),
+            Column('submitted_at', 'Date soumission', 'submitted_at'),
+            Column('reviewed_at', 'Date examen', 'reviewed_at'),
+            Column('decision_date', 'Date décision', 'decision_date'),
+            Column('reviewed_by_name', 'Examiné par', ('reviewed_by__first_name', 'reviewed_by__last_name'),
+                   compute=full_name),
+            Column('created_at', 'Date création', 'created_at'),
+        ],
+        filters={
+            'student': ('student_id', 'int'),
+            'status': ('status', 'str'),
+            'scholarship_type': ('scholarship_type', 'str'),
+            'submitted_after': ('submitted_at', 'after'),
+            'submitted_before': ('submitted_at', 'before'),
+            'created_after': ('created_at', 'after'),
+            'created_before': ('created_at', 'before'),
+        },
+    ),
+    'eligibility_rules': ExportSpec(
+        model=EligibilityRule,
+        columns=[
+            Column('id', 'ID', 'id'),
+            Column('title', 'Titre', 'title'),
+            Column('description', 'Description', 'description'),
+            Column('rule_type', 'Type', 'rule_type'),
+            Column('criteria', 'Critères', 'criteria'),
+            Column('is_active', 'Active', 'is_active'),
+            Column('created_by_name', 'Créée par', ('created_by__first_name', 'created_by__last_name'),
+                   compute=full_name),
+            Column('created_at', 'Date création', 'created_at'),
+            Column('updated_at', 'Date modification', 'updated_at'),
+        ],
+        filters={
+            'rule_type': ('rule_type', 'str'),
+            'is_active': ('is_active', 'bool'),
+        },
+    ),
+    'daily_snapshots': ExportSpec(
+        model=DailySnapshot,
+        columns=[
+            Column('date', 'Date', 'date'),
+            Column('new_users', 'Nouveaux utilisateurs', 'new_users'),
+            Column('new_students', 'Nouveaux étudiants', 'new_students'),
+            Column('documents_uploaded', 'Documents uploadés', 'documents_uploaded'),
+            Column('documents_verified', 'Documents vérifiés', 'documents_verified'),
+            Column('applications_created', 'Demandes créées', 'applications_created'),
+            Column('applications_submitted', 'Demandes soumises', 'applications_submitted'),
+            Column('applications_by_status', 'Demandes par statut', 'applications_by_status'),
+        ],
+        filters={},
+    ),
+}
+
+
+def parse_filters(dataset, params):
+    """Paramètres de requête -> kwargs de QuerySet.filter(); ExportError si invalide"""
+    spec = get_spec(dataset)
+    filters = {}
+    for param, (lookup, kind) in spec.filters.items():
+        value = params.get(param)
+        if value in (None, ''):
+            continue
+        if kind == 'bool':
+            if value.lower() in TRUE_VALUES:
+                value = True
+            elif value.lower() in FALSE_VALUES:
+                value = False
+            else:
+                raise ExportError(f"Valeur booléenne invalide pour {param}")
+        elif kind == 'int':
+            try:
+                value = int(value)
+            except ValueError:
+                raise ExportError(f"Valeur entière invalide pour {param}")
+        elif kind in DATE_FILTER:
+            try:
+                value = day_start(date.fromisoformat(value))
+            except ValueError:
+                raise ExportError(f"Date invalide pour {param}, format attendu: AAAA-MM-JJ")
+            lookup = f"{lookup}__{DATE_FILTER[kind]}"
+        filters[lookup] = value
+    return filters
+
+
+def get_spec(dataset):
+    try:
+        return EXPORTS[dataset]
+    except KeyError:
+        raise ExportError("Type d'export non supporté")
+
+
+# ===== Écriture des fichiers partiels =====
+
+def arrow_schema(spec):
+    types = {
+        'int': pyarrow.int64(),
+        'bool': pyarrow.bool_(),
+        'datetime': pyarrow.timestamp('us', tz='UTC'),
+        'date': pyarrow.date32(),
+        'string': pyarrow.string(),
+        'json': pyarrow.string(),
+    }
+    fields = []
+    for column in spec.columns:
+        if column.kind == 'decimal':
+            field = spec.resolve_field(column.source)
+            arrow_type = pyarrow.decimal128(field.max_digits, field.decimal_places)
+        else:
+            arrow_type = types[column.kind]
+        fields.append(pyarrow.field(column.name, arrow_type))
+    return pyarrow.schema(fields)
+
+
+def arrow_batch(spec, schema, rows):
+    columns = list(zip(*rows)) if rows else [[] for _ in spec.columns]
+    arrays = []
+    for column, values, field in zip(spec.columns, columns, schema):
+        if column.kind == 'json':
+            values = [None if value is None else dumps(value).decode('utf-8') for value in values]
+        arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class PartWriter:
+    """Écrit une plage de lignes typées dans un fichier partiel"""
+
+    def __init__(self, spec, path):
+        self.spec = spec
+        self.path = path
+
+    def write(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CSVPartWriter(PartWriter):
+    def __init__(self, spec, path):
+        super().__init__(spec, path)
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.formatters = [column.text for column in spec.columns]
+
+    def write(self, rows):
+        self.writer.writerows(
+            ['' if value is None else (text(value) if text else value)
+             for text, value in zip(self.formatters, row)]
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLinesPartWriter(PartWriter):
+    def __init__(self, spec, path):
+        super().__init__(spec, path)
+        self.file = open(path, 'wb')
+        self.names = [column.name for column in spec.columns]
+
+    def write(self, rows):
+        self.file.write(b''.join(dumps(dict(zip(self.names, row))) + b'\n' for row in rows))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetPartWriter(PartWriter):
+    def __init__(self, spec, path):
+        super().__init__(spec, path)
+        self.schema = arrow_schema(spec)
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression='snappy')
+
+    def write(self, rows):
+        self.writer.write_batch(arrow_batch(self.spec, self.schema, rows))
+
+    def close(self):
+        self.writer.close()
+
+
+class ArrowPartWriter(PartWriter):
+    def __init__(self, spec, path):
+        super().__init__(spec, path)
+        self.schema = arrow_schema(spec)
+        self.sink = pyarrow.OSFile(path, 'wb')
+        self.writer = pyarrow.ipc.new_file(self.sink, self.schema)
+
+    def write(self, rows):
+        self.writer.write_batch(arrow_batch(self.spec, self.schema, rows))
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+class PicklePartWriter(PartWriter):
+    """Parties XLSX: paquets de lignes sérialisés, assemblés par openpyxl dans le processus principal"""
+
+    def __init__(self, spec, path):
+        super().__init__(spec, path)
+        self.file = open(path, 'wb')
+
+    def write(self, rows):
+        pickle.dump(rows, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        self.file.close()
+
+
+# ===== Concaténation =====
+
+def concat_bytes(spec, parts, output):
+    with open(output, 'ab') as target:
+        for part in parts:
+            with open(part, 'rb') as source:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def concat_csv(spec, parts, output):
+    with open(output, 'w', encoding='utf-8', newline='') as target:
+        csv.writer(target).writerow([column.header for column in spec.columns])
+    concat_bytes(spec, parts, output)
+
+
+def concat_parquet(spec, parts, output):
+    schema = arrow_schema(spec)
+    with pyarrow.parquet.ParquetWriter(output, schema, compression='snappy') as writer:
+        for part in parts:
+            part_file = pyarrow.parquet.ParquetFile(part)
+            for index in range(part_file.num_row_groups):
+                writer.write_table(part_file.read_row_group(index))
+
+
+def concat_arrow(spec, parts, output):
+    schema = arrow_schema(spec)
+    with pyarrow.OSFile(output, 'wb') as sink, pyarrow.ipc.new_file(sink, schema) as writer:
+        for part in parts:
+            with pyarrow.memory_map(part) as source:
+                reader = pyarrow.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    writer.write_batch(reader.get_batch(index))
+
+
+def excel_value(value):
+    if isinstance(value, datetime):
+        # Excel ne gère pas les fuseaux horaires
+        return timezone.make_naive(value) if timezone.is_aware(value) else value
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode('utf-8')
+    return value
+
+
+def concat_xlsx(spec, parts, output):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(str(spec.model._meta.verbose_name_plural)[:31])
+    sheet.append([column.header for column in spec.columns])
+    for part in parts:
+        with open(part, 'rb') as source:
+            while True:
+                try:
+                    rows = pickle.load(source)
+                except EOFError:
+                    break
+                for row in rows:
+                    sheet.append([excel_value(value) for value in row])
+    workbook.save(output)
+
+
+@dataclass
+class ExportFormat:
+    extension: str
+    content_type: str
+    part_writer: type
+    concatenate: object
+    requires: str = None
+
+
+FORMATS = {
+    'csv': ExportFormat('csv', 'text/csv', CSVPartWriter, concat_csv),
+    'jsonl': ExportFormat('jsonl', 'application/x-ndjson', JSONLinesPartWriter, concat_bytes),
+    'parquet': ExportFormat('parquet', 'application/vnd.apache.parquet', ParquetPartWriter, concat_parquet,
+                            requires='pyarrow'),
+    'arrow': ExportFormat('arrow', 'application/vnd.apache.arrow.file', ArrowPartWriter, concat_arrow,
+                          requires='pyarrow'),
+    'xlsx': ExportFormat('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                         PicklePartWriter, concat_xlsx, requires='openpyxl'),
+}
+
+OPTIONAL_MODULES = {'pyarrow': pyarrow, 'openpyxl': openpyxl}
+
+
+def get_format(export_format):
+    try:
+        fmt = FORMATS[export_format]
+    except KeyError:
+        raise ExportError(f"Format non supporté. Formats acceptés: {', '.join(FORMATS)}")
+    if fmt.requires and OPTIONAL_MODULES[fmt.requires] is None:
+        raise ExportError(f"Format {export_format} indisponible: le module {fmt.requires} n'est pas installé")
+    return fmt
+
+
+# ===== Plages de clés et pool de processus =====
+
+def pk_ranges(low, high, parts):
+    """Découpe [low, high] en `parts` plages [début, fin) de même largeur"""
+    if parts <= 1:
+        return [(None, None)]
+    step = max(1, -(-(high - low + 1) // parts))
+    return [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+
+
+def export_range(dataset, export_format, filters, pk_range, using, part_path):
+    """Écrit une plage de clés dans un fichier partiel (exécuté dans un processus du pool)"""
+    spec = EXPORTS[dataset]
+    queryset = spec.queryset(using).filter(**filters)
+    start, end = pk_range
+    if start is not None:
+        queryset = queryset.filter(pk__gte=start, pk__lt=end)
+    rows = queryset.order_by('pk').values_list(*spec.value_fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    writer = FORMATS[export_format].part_writer(spec, part_path)
+    count = 0
+    chunk = []
+    try:
+        for raw in rows:
+            chunk.append(spec.row_values(raw))
+            if len(chunk) >= EXPORT_CHUNK_SIZE:
+                writer.write(chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write(chunk)
+            count += len(chunk)
+    finally:
+        writer.close()
+    return count
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _export_range_task(args):
+    try:
+        return export_range(*args)
+    finally:
+        connections.close_all()
+
+
+@dataclass
+class ExportResult:
+    rows: int
+    parts: int
+    workers: int
+    seconds: float
+
+
+def export_dataset(dataset, export_format, output_path, filters=None, workers=1):
+    """
+    Exporte `dataset` vers output_path. Avec workers > 1, les plages de clés
+    sont écrites en parallèle par un pool de processus puis concaténées.
+    """
+    spec = get_spec(dataset)
+    fmt = get_format(export_format)
+    filters = filters or {}
+    started = time.perf_counter()
+    # Base choisie une fois (réplique dans un bloc replica_reads), imposée aux processus du pool
+    using = router.db_for_read(spec.model)
+
+    bounds = spec.queryset(using).filter(**filters).aggregate(low=Min('pk'), high=Max('pk'))
+    low, high = bounds['low'], bounds['high']
+    if low is None or high - low + 1 < PARALLEL_MIN_ROWS:
+        workers = 1
+    # Deux plages par processus pour lisser les écarts de densité des clés
+    ranges = pk_ranges(low, high, workers * 2 if workers > 1 else 1)
+
+    with tempfile.TemporaryDirectory(prefix='bourses_export_') as part_dir:
+        tasks = [
+            (dataset, export_format, filters, pk_range, using, os.path.join(part_dir, f'part_{index:05d}'))
+            for index, pk_range in enumerate(ranges)
+        ]
+        if workers > 1:
+            # Les processus enfants ouvrent leurs propres connexions
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                counts = list(pool.map(_export_range_task, tasks))
+        else:
+            counts = [export_range(*task) for task in tasks]
+
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        fmt.concatenate(spec, [task[-1] for task in tasks], output_path)
+
+    result = ExportResult(sum(counts), len(tasks), workers, time.perf_counter() - started)
+    logger.info(
+        f"Export {dataset} ({export_format}): {result.rows} rows, {result.parts} parts, "
+        f"{result.workers} workers, {result.seconds:.2f}s"
+    )
+    return result
+
+
+class DeleteOnCloseFile(io.FileIO):
+    """Fichier temporaire servi par FileResponse, supprimé une fois la réponse envoyée"""
+
+    def close(self):
+        super().close()
+        try:
+            os.remove(self.name)
+        except OSError:
+            pass
+
+
+def temporary_export_path(export_format):
+    fd, path = tempfile.mkstemp(prefix='bourses_export_', suffix=f'.{FORMATS[export_format].extension}')
+    os.close(fd)
+    return path
@@ -0,0 +1,95 @@
+# users/instrumentation.py
+"""
+Mesures par requête (temps total, requêtes SQL, temps base de données,
+phases nommées) collectées par bourses_backend.middleware.InstrumentationMiddleware.
+Le code applicatif ajoute une phase avec `with timed('serialize'): ...`
+(serializers DRF via TimedSerializerMixin, serializers de liste rapides,
+renderer JSON pour 'render'); hors requête instrumentée, timed() ne fait rien.
+
+Les requêtes SQL sont comptées par record_query(), installé sur chaque
+connexion à son ouverture (UsersConfig.ready): les connexions sont propres à
+chaque thread, et sous ASGI l'ORM asynchrone s'exécute dans les threads de
+sync_to_async, où la ContextVar de la requête est recopiée.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_metrics = ContextVar('bourses_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        # Par alias de base: [requêtes, secondes]
+        self.db_by_alias = {}
+        # Phases nommées (secondes), dans l'ordre d'apparition
+        self.timings = {}
+        # Phases en cours: un bloc imbriqué dans la même phase n'est pas compté deux fois
+        self.active = set()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def add_timing(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper connection.execute_wrapper: compte chaque requête et son temps"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += seconds
+            per_alias = self.db_by_alias.setdefault(context['connection'].alias, [0, 0.0])
+            per_alias[0] += 1
+            per_alias[1] += seconds
+
+
+def record_query(execute, sql, params, many, context):
+    """Wrapper connection.execute_wrapper permanent: mesure la requête si une requête HTTP est instrumentée"""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """Récepteur de connection_created (branché dans UsersConfig.ready)"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def current_metrics():
+    """Mesures de la requête en cours, ou None hors requête instrumentée"""
+    return _current_metrics.get()
+
+
+@contextmanager
+def collect_metrics():
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Ajoute la durée du bloc à la phase `name` de la requête en cours"""
+    metrics = _current_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_timing(name, time.perf_counter() - started)
+        metrics.active.discard(name)
@@ -0,0 +1,188 @@
+# users/lean_serializers.py
+"""
+Sérialisation rapide en lecture seule pour les listes.
+
+Les lignes sont lues avec .values() et transformées directement en dicts,
+sans instancier de modèles ni passer par les champs DRF. La sortie est
+identique à celle des serializers de users/serializers.py.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .instrumentation import timed
+from .models import StudentDocument, ScholarshipApplication, StudentNotification, format_file_size
+from .timeformat import TIME_FORMAT_HUMANIZED, get_time_format, time_ago
+
+# Tables de correspondance pré-calculées (get_*_display, couleurs, icônes)
+DOCUMENT_TYPE_LABELS = dict(StudentDocument.DOCUMENT_TYPE_CHOICES)
+SCHOLARSHIP_TYPE_LABELS = dict(ScholarshipApplication.SCHOLARSHIP_TYPES)
+APPLICATION_STATUS_LABELS = dict(ScholarshipApplication.APPLICATION_STATUS_CHOICES)
+STATUS_COLORS = ScholarshipApplication.STATUS_COLORS
+EDITABLE_STATUSES = frozenset(ScholarshipApplication.EDITABLE_STATUSES)
+NOTIFICATION_ICONS = StudentNotification.ICONS
+
+TWO_PLACES = Decimal('0.01')
+
+
+def full_name(first_name, last_name):
+    """Équivalent de CustomUser.get_full_name() à partir des colonnes"""
+    return f"{first_name} {last_name}".strip()
+
+
+def format_decimal(value):
+    """Même rendu que serializers.DecimalField(decimal_places=2)"""
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(TWO_PLACES))
+
+
+class LeanSerializer:
+    """Base des serializers de liste: `now` et le fuseau sont calculés une fois par réponse"""
+    value_fields = ()
+    detailed_time_ago = False
+
+    def __init__(self, now=None, request=None, time_format=None):
+        self.now = now or timezone.now()
+        self.tz = timezone.get_current_timezone()
+        self.humanized = (time_format or get_time_format(request)) == TIME_FORMAT_HUMANIZED
+
+    def values(self, queryset):
+        return queryset.values(*self.value_fields)
+
+    def serialize(self, rows):
+        with timed('serialize'):
+            return [self.to_representation(row) for row in rows]
+
+    def serialize_queryset(self, queryset):
+        return self.serialize(self.values(queryset))
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+    def format_datetime(self, value):
+        """Même rendu que serializers.DateTimeField"""
+        if value is None:
+            return None
+        value = value.astimezone(self.tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    def add_time_ago(self, data, created_at):
+        """time_ago seulement en mode 'humanized'; en mode 'iso' le client le calcule"""
+        if self.humanized:
+            data['time_ago'] = time_ago(created_at, self.now, self.detailed_time_ago)
+
+
+class LeanApplicationSerializer(LeanSerializer):
+    """Équivalent de ScholarshipApplicationSerializer pour les listes"""
+    value_fields = (
+        'id', 'student_id', 'student__first_name', 'student__last_name',
+        'scholarship_type', 'title', 'description', 'amount_requested', 'status',
+        'final_amount', 'decision_notes', 'submitted_at', 'reviewed_at', 'decision_date',
+        'reviewed_by_id', 'reviewed_by__first_name', 'reviewed_by__last_name',
+        'created_at', 'updated_at',
+    )
+
+    def to_representation(self, row):
+        status = row['status']
+        editable = status in EDITABLE_STATUSES
+        reviewed_by_id = row['reviewed_by_id']
+        data = {
+            'id': row['id'],
+            'student': row['student_id'],
+            'student_name': full_name(row['student__first_name'], row['student__last_name']),
+            'scholarship_type': row['scholarship_type'],
+            'scholarship_type_display': SCHOLARSHIP_TYPE_LABELS.get(row['scholarship_type'], row['scholarship_type']),
+            'title': row['title'],
+            'description': row['description'],
+            'amount_requested': format_decimal(row['amount_requested']),
+            'status': status,
+            'status_display': APPLICATION_STATUS_LABELS.get(status, status),
+            'status_color': STATUS_COLORS.get(status, 'secondary'),
+            'final_amount': format_decimal(row['final_amount']),
+            'decision_notes': row['decision_notes'],
+            'submitted_at': self.format_datetime(row['submitted_at']),
+            'reviewed_at': self.format_datetime(row['reviewed_at']),
+            'decision_date': self.format_datetime(row['decision_date']),
+            'reviewed_by': reviewed_by_id,
+        }
+        # Comme DRF, les champs « relation.attribut » sont omis si la relation est nulle
+        if reviewed_by_id is not None:
+            data['reviewed_by_name'] = full_name(row['reviewed_by__first_name'], row['reviewed_by__last_name'])
+        data['created_at'] = self.format_datetime(row['created_at'])
+        data['updated_at'] = self.format_datetime(row['updated_at'])
+        self.add_time_ago(data, row['created_at'])
+        data['can_edit'] = editable
+        data['can_submit'] = editable
+        return data
+
+
+class LeanDocumentSerializer(LeanSerializer):
+    """Équivalent de StudentDocumentSerializer pour les listes"""
+    value_fields = (
+        'id', 'student_id', 'student__first_name', 'student__last_name',
+        'document_type', 'file', 'original_filename', 'file_size', 'uploaded_at',
+        'is_verified', 'verified_by_id', 'verified_by__first_name', 'verified_by__last_name',
+        'verified_at',
+    )
+
+    def __init__(self, now=None, request=None, time_format=None):
+        super().__init__(now, request, time_format)
+        self.storage = StudentDocument._meta.get_field('file').storage
+        # Comme FileField, URL absolue quand la requête est connue
+        self.url_prefix = request.build_absolute_uri('/')[:-1] if request is not None else ''
+
+    def to_representation(self, row):
+        verified_by_id = row['verified_by_id']
+        data = {
+            'id': row['id'],
+            'student': row['student_id'],
+            'student_name': full_name(row['student__first_name'], row['student__last_name']),
+            'document_type': row['document_type'],
+            'file': self.url_prefix + self.storage.url(row['file']) if row['file'] else None,
+            'original_filename': row['original_filename'],
+            'file_size': row['file_size'],
+            'file_size_display': format_file_size(row['file_size']),
+            'uploaded_at': self.format_datetime(row['uploaded_at']),
+            'is_verified': row['is_verified'],
+            'verified_by': verified_by_id,
+        }
+        if verified_by_id is not None:
+            data['verified_by_name'] = full_name(row['verified_by__first_name'], row['verified_by__last_name'])
+        data['verified_at'] = self.format_datetime(row['verified_at'])
+        return data
+
+
+class LeanStudentNotificationSerializer(LeanSerializer):
+    """Équivalent de StudentNotificationSerializer pour les listes"""
+    detailed_time_ago = True
+    value_fields = (
+        'id', 'notification_type', 'title', 'message', 'is_read', 'is_important', 'created_at',
+        'related_document_id', 'related_document__document_type',
+        'related_application_id', 'related_application__title',
+    )
+
+    def to_representation(self, row):
+        notification_type = row['notification_type']
+        data = {
+            'id': row['id'],
+            'notification_type': notification_type,
+            'title': row['title'],
+            'message': row['message'],
+            'icon': NOTIFICATION_ICONS.get(notification_type, '🔔'),
+            'is_read': row['is_read'],
+            'is_important': row['is_important'],
+            'created_at': self.format_datetime(row['created_at']),
+        }
+        self.add_time_ago(data, row['created_at'])
+        data['related_document_id'] = row['related_document_id']
+        data['related_application_id'] = row['related_application_id']
+        if row['related_document_id'] is not None:
+            document_type = row['related_document__document_type']
+            data['document_type_display'] = DOCUMENT_TYPE_LABELS.get(document_type, document_type)
+        if row['related_application_id'] is not None:
+            data['application_title'] = row['related_application__title']
+        return data
+
@@ -0,0 +1,260 @@
+# users/maintenance.py
+"""
+Maintenance de la base, exécutée hors des workers web par
+`python manage.py run_maintenance` (voir MaintenanceJob):
+
+- PostgreSQL: VACUUM (ANALYZE) table par table, progression enregistrée
+  après chaque table;
+- SQLite: ANALYZE par table puis VACUUM du fichier entier (SQLite ne sait
+  pas nettoyer une seule table).
+
+Le rapport décrit le bloat des tables (lignes mortes de
+pg_stat_user_tables), celui des index B-tree (pgstatindex, si l'extension
+pgstattuple est installée) et les index jamais parcourus depuis la dernière
+remise à zéro des statistiques (pg_stat_user_indexes). Sous SQLite, seul
+l'espace libre du fichier est connu.
+"""
+import logging
+import math
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .models import MaintenanceJob
+from .outbox import record_admin_event
+
+logger = logging.getLogger(__name__)
+
+# Densité des feuilles d'un index B-tree neuf (fillfactor par défaut): l'écart est du bloat
+BTREE_FILLFACTOR = 90
+
+TABLE_STATS_SQL = """
+    SELECT relname, n_live_tup, n_dead_tup, pg_table_size(relid), pg_indexes_size(relid),
+           last_vacuum, last_autovacuum, last_analyze, last_autoanalyze
+    FROM pg_stat_user_tables
+    WHERE schemaname = current_schema()
+    ORDER BY n_dead_tup DESC, relname
+"""
+
+# Index non uniques (les autres garantissent une contrainte) jamais parcourus
+UNUSED_INDEXES_SQL = """
+    SELECT s.relname, s.indexrelname, s.idx_scan, pg_relation_size(s.indexrelid)
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = current_schema() AND s.idx_scan = 0
+      AND NOT i.indisunique AND NOT i.indisprimary
+    ORDER BY pg_relation_size(s.indexrelid) DESC, s.indexrelname
+"""
+
+INDEX_BLOAT_SQL = """
+    SELECT s.relname, s.indexrelname, pg_relation_size(s.indexrelid),
+           (pgstatindex(s.indexrelid::regclass)).avg_leaf_density
+    FROM pg_stat_user_indexes s
+    JOIN pg_class c ON c.oid = s.indexrelid
+    JOIN pg_am a ON a.oid = c.relam
+    WHERE s.schemaname = current_schema() AND a.amname = 'btree'
+    ORDER BY pg_relation_size(s.indexrelid) DESC, s.indexrelname
+"""
+
+
+class MaintenanceError(ValueError):
+    pass
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def maintenance_tables(connection):
+    """Tables des modèles installés présentes dans la base"""
+    return sorted(connection.introspection.django_table_names(only_existing=True, include_views=False))
+
+
+def maintenance_steps(connection, tables, analyze=True):
+    """(table, SQL) à exécuter dans l'ordre"""
+    quote = connection.ops.quote_name
+    if connection.vendor == 'postgresql':
+        command = 'VACUUM (ANALYZE)' if analyze else 'VACUUM'
+        return [(table, f'{command} {quote(table)}') for table in tables]
+    if connection.vendor == 'sqlite':
+        steps = [(table, f'ANALYZE {quote(table)}') for table in tables] if analyze else []
+        return steps + [('(database)', 'VACUUM')]
+    raise MaintenanceError(f"Maintenance non prise en charge pour la base {connection.vendor}")
+
+
+def fetch(connection, sql):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+
+def database_size(connection):
+    """(taille, espace libre réutilisable) du fichier ou de la base, en octets"""
+    if connection.vendor == 'postgresql':
+        return fetch(connection, 'SELECT pg_database_size(current_database())')[0][0], None
+    if connection.vendor == 'sqlite':
+        page_size = fetch(connection, 'PRAGMA page_size')[0][0]
+        page_count = fetch(connection, 'PRAGMA page_count')[0][0]
+        free_pages = fetch(connection, 'PRAGMA freelist_count')[0][0]
+        return page_size * page_count, page_size * free_pages
+    return None, None
+
+
+def table_bloat(connection):
+    """Lignes mortes et bloat estimé (taille x part de lignes mortes) par table"""
+    if connection.vendor != 'postgresql':
+        return []
+    tables = []
+    for (name, live, dead, table_size, indexes_size,
+         last_vacuum, last_autovacuum, last_analyze, last_autoanalyze) in fetch(connection, TABLE_STATS_SQL):
+        dead_ratio = dead / (live + dead) if live + dead else 0
+        tables.append({
+            'table': name,
+            'live_tuples': live,
+            'dead_tuples': dead,
+            'dead_ratio': round(dead_ratio, 4),
+            'table_bytes': table_size,
+            'indexes_bytes': indexes_size,
+            'estimated_bloat_bytes': int(table_size * dead_ratio),
+            'last_vacuum': isoformat(max(filter(None, (last_vacuum, last_autovacuum)), default=None)),
+            'last_analyze': isoformat(max(filter(None, (last_analyze, last_autoanalyze)), default=None)),
+        })
+    return tables
+
+
+def index_bloat(connection):
+    """Densité des feuilles et bloat estimé des index B-tree (None sans pgstattuple)"""
+    if connection.vendor != 'postgresql':
+        return None
+    if not fetch(connection, "SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'"):
+        return None
+    indexes = []
+    for table, name, size, density in fetch(connection, INDEX_BLOAT_SQL):
+        # Index vide: densité NaN
+        known = density is not None and not math.isnan(density)
+        indexes.append({
+            'table': table,
+            'index': name,
+            'bytes': size,
+            'avg_leaf_density': round(density, 2) if known else None,
+            'estimated_bloat_bytes': (
+                int(size * max(0, BTREE_FILLFACTOR - density) / BTREE_FILLFACTOR) if known else None
+            ),
+        })
+    return indexes
+
+
+def unused_indexes(connection):
+    """Index non uniques jamais parcourus, et date de remise à zéro des statistiques"""
+    if connection.vendor != 'postgresql':
+        return [], None
+    indexes = [
+        {'table': table, 'index': name, 'scans': scans, 'bytes': size}
+        for table, name, scans, size in fetch(connection, UNUSED_INDEXES_SQL)
+    ]
+    stats_reset = fetch(connection, 'SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()')
+    return indexes, isoformat(stats_reset[0][0]) if stats_reset else None
+
+
+def database_report(using=DEFAULT_DB_ALIAS):
+    """Bloat des tables et des index, index inutilisés et taille de la base"""
+    connection = connections[using]
+    size, free = database_size(connection)
+    unused, stats_reset = unused_indexes(connection)
+    return {
+        'vendor': connection.vendor,
+        'database_bytes': size,
+        'free_bytes': free,
+        'tables': table_bloat(connection),
+        'indexes': index_bloat(connection),
+        'unused_indexes': unused,
+        'stats_reset': stats_reset,
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def run_maintenance(tables=None, analyze=True, progress=None, using=DEFAULT_DB_ALIAS):
+    """
+    VACUUM (et ANALYZE) des tables demandées (toutes par défaut), puis
+    rapport. progress(fait, total, table) est appelé avant chaque étape et
+    à la fin.
+    """
+    connection = connections[using]
+    if connection.in_atomic_block:
+        raise MaintenanceError("VACUUM impossible à l'intérieur d'une transaction")
+
+    available = maintenance_tables(connection)
+    tables = list(tables) if tables else available
+    unknown = sorted(set(tables) - set(available))
+    if unknown:
+        raise MaintenanceError(f"Tables inconnues: {', '.join(unknown)}")
+    steps = maintenance_steps(connection, tables, analyze)
+
+    size_before, _ = database_size(connection)
+    dead_before = {row['table']: row['dead_tuples'] for row in table_bloat(connection)}
+    results = []
+    for done, (table, sql) in enumerate(steps):
+        if progress is not None:
+            progress(done, len(steps), table)
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        seconds = time.perf_counter() - started
+        results.append({'table': table, 'seconds': round(seconds, 3), 'dead_tuples_before': dead_before.get(table)})
+        logger.info(f"Maintenance: {sql} in {seconds:.2f}s")
+    if progress is not None:
+        progress(len(steps), len(steps), '')
+
+    report = database_report(using)
+    report.update({'analyze': analyze, 'steps': results, 'database_bytes_before': size_before})
+    return report
+
+
+def run_job(job, progress=None):
+    """Exécute un job réservé par MaintenanceJob.claim_next(); progression enregistrée à chaque étape"""
+    def save_progress(done, total, table):
+        job.tables_done, job.tables_total, job.current_table = done, total, table
+        job.save(update_fields=['tables_done', 'tables_total', 'current_table'])
+        if progress is not None:
+            progress(done, total, table)
+
+    try:
+        report = run_maintenance(job.tables, job.analyze, save_progress)
+    except Exception as e:
+        logger.error(f"Maintenance job {job.pk} failed: {str(e)}")
+        job.status = 'failed'
+        job.error = str(e)
+        job.current_table = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'current_table', 'finished_at'])
+        return job
+
+    job.status = 'completed'
+    job.error = ''
+    job.report = report
+    job.finished_at = timezone.now()
+    requested_by = job.requested_by
+    with transaction.atomic():
+        job.save(update_fields=['status', 'error', 'report', 'finished_at'])
+        record_admin_event(
+            notification_type='system_alert',
+            title="Maintenance de la base terminée",
+            message=f"{len(report['steps'])} étape(s) de maintenance pour "
+                    f"{requested_by.username if requested_by else 'le système'}",
+            related_user=requested_by
+        )
+    logger.info(f"Maintenance job {job.pk} completed in {job.finished_at - job.started_at}")
+    return job
+
+
+def run_pending_jobs(max_jobs=None):
+    """Traite les maintenances en attente; retourne le nombre de jobs exécutés"""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = MaintenanceJob.claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,31 @@
+# users/management/commands/broadcast_notification.py
+from django.core.management.base import BaseCommand, CommandError
+
+from users.broadcasts import AUDIENCES, BROADCAST_NOTIFICATION_TYPES, BroadcastError, broadcast
+
+
+class Command(BaseCommand):
+    help = "Envoie une notification (alerte système, rappel de date limite) à une audience d'étudiants"
+
+    def add_arguments(self, parser):
+        parser.add_argument('audience', choices=list(AUDIENCES))
+        parser.add_argument('--type', dest='notification_type', default='deadline_reminder',
+                            choices=BROADCAST_NOTIFICATION_TYPES)
+        parser.add_argument('--title', required=True)
+        parser.add_argument('--message', required=True)
+        parser.add_argument('--important', action='store_true')
+        parser.add_argument('--document-type', dest='document_types', action='append', default=None,
+                            help="Pour missing_documents: type de document requis (répétable, défaut: tous)")
+
+    def handle(self, *args, **options):
+        try:
+            result = broadcast(
+                options['audience'], options['notification_type'], options['title'], options['message'],
+                is_important=options['important'], document_types=options['document_types']
+            )
+        except BroadcastError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.recipients} notification(s) créée(s) en {result.batches} lot(s) ({result.seconds:.2f}s)"
+        ))
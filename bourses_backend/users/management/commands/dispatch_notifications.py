@@ -0,0 +1,36 @@
+# users/management/commands/dispatch_notifications.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.outbox import DISPATCH_BATCH_SIZE, dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Crée les notifications enregistrées dans l'outbox (NotificationEvent), par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Traiter les événements en attente puis quitter")
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help="Pause en secondes quand l'outbox est vide (défaut: 1)")
+        parser.add_argument('--batch-size', type=int, default=DISPATCH_BATCH_SIZE,
+                            help=f"Événements par lot (défaut: {DISPATCH_BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Dispatcher de notifications démarré")
+
+        try:
+            while True:
+                close_old_connections()
+                dispatched = dispatch_pending(options['batch_size'])
+                if dispatched:
+                    self.stdout.write(self.style.SUCCESS(f"{dispatched} notification(s) créée(s)"))
+
+                if options['once']:
+                    break
+                if not dispatched:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Dispatcher de notifications arrêté")
@@ -0,0 +1,54 @@
+# users/management/commands/export_data.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.exports import EXPORTS, FORMATS, ExportError, export_dataset, get_format, parse_filters
+from users.replicas import replica_reads
+
+
+class Command(BaseCommand):
+    help = "Exporte un type de données (CSV, JSONL, Parquet, Arrow, XLSX) en parallèle par plages de clés"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--format', default='csv', choices=sorted(FORMATS))
+        parser.add_argument('--output', default=None,
+                            help="Fichier de sortie (défaut: export_<type>.<extension>)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Nombre de processus (défaut: nombre de cœurs)")
+        parser.add_argument('--filter', action='append', default=[], metavar='CLE=VALEUR',
+                            help="Filtre, par exemple --filter status=approved (répétable)")
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        export_format = options['format']
+
+        params = {}
+        for item in options['filter']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Filtre invalide: {item} (format attendu CLE=VALEUR)")
+            params[key] = value
+
+        try:
+            fmt = get_format(export_format)
+            filters = parse_filters(dataset, params)
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        unknown = set(params) - set(EXPORTS[dataset].filters)
+        if unknown:
+            raise CommandError(
+                f"Filtres inconnus pour {dataset}: {', '.join(sorted(unknown))}. "
+                f"Filtres disponibles: {', '.join(EXPORTS[dataset].filters) or 'aucun'}"
+            )
+
+        output = options['output'] or f"export_{dataset}.{fmt.extension}"
+        with replica_reads():
+            result = export_dataset(dataset, export_format, output, filters=filters, workers=max(1, options['workers']))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} ligne(s) exportée(s) vers {output} "
+            f"({result.parts} partie(s), {result.workers} processus, {result.seconds:.2f}s)"
+        ))
@@ -0,0 +1,40 @@
+# users/management/commands/prune_notifications.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.retention import PRUNE_BATCH_SIZE, prune_notifications
+
+
+class Command(BaseCommand):
+    help = ("Supprime les notifications expirées (BOURSES_NOTIFICATION_RETENTION_DAYS) par petites plages "
+            "de clés, après archivage en JSONL compressé. À lancer chaque nuit.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE,
+                            help=f"Largeur des plages de clés supprimées par transaction (défaut: {PRUNE_BATCH_SIZE})")
+        parser.add_argument('--no-archive', action='store_true',
+                            help="Supprimer sans archiver")
+        parser.add_argument('--collapse', action='store_true',
+                            help="Regrouper les alertes système répétées (même titre, même jour)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Afficher le nombre de lignes concernées sans rien modifier")
+
+    def handle(self, *args, **options):
+        result = prune_notifications(
+            batch_size=max(1, options['batch_size']),
+            archive=not options['no_archive'],
+            collapse=options['collapse'],
+            dry_run=options['dry_run']
+        )
+
+        verb = "à supprimer" if options['dry_run'] else "supprimée(s)"
+        if options['collapse']:
+            self.stdout.write(f"Alertes système regroupées: {result.collapsed} ligne(s) {verb}")
+        for name, count in result.deleted.items():
+            self.stdout.write(f"{name}: {count} ligne(s) {verb}")
+        for path in result.archives:
+            self.stdout.write(f"Archive: {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rétention appliquée (archives dans {settings.BOURSES_NOTIFICATION_ARCHIVE_DIR})"
+            if result.archives else "Rétention appliquée"
+        ))
@@ -0,0 +1,37 @@
+# users/management/commands/rollup_snapshots.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.models import DailySnapshot
+from users.snapshots import DEFAULT_REFRESH_DAYS, rollup
+
+
+class Command(BaseCommand):
+    help = "Calcule les snapshots quotidiens (DailySnapshot) jusqu'à hier. Idempotent, à lancer chaque nuit."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DEFAULT_REFRESH_DAYS,
+                            help=f"Nombre de jours recalculés avant aujourd'hui (défaut: {DEFAULT_REFRESH_DAYS})")
+        parser.add_argument('--since', type=str, default=None,
+                            help="Recalculer à partir de cette date (AAAA-MM-JJ)")
+        parser.add_argument('--full', action='store_true',
+                            help="Recalculer tout l'historique")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+
+        if options['full'] or not DailySnapshot.objects.exists():
+            # Premier passage: tout l'historique depuis la première donnée
+            start = None
+        elif options['since']:
+            try:
+                start = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError("Date invalide, format attendu: AAAA-MM-JJ")
+        else:
+            start = today - timedelta(days=options['days'])
+
+        written = rollup(start, today)
+        self.stdout.write(self.style.SUCCESS(f"{written} snapshot(s) quotidien(s) calculé(s)"))
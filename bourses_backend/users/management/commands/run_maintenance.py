@@ -0,0 +1,85 @@
+# users/management/commands/run_maintenance.py
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from users.maintenance import database_report, run_job, run_pending_jobs
+from users.models import MaintenanceJob
+
+
+class Command(BaseCommand):
+    help = ("Maintenance de la base: VACUUM (ANALYZE) table par table et rapport de bloat et d'index "
+            "inutilisés. Avec --worker, traite les maintenances demandées depuis l'administration.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', action='append', default=[], dest='tables',
+                            help="Table à traiter (répétable, défaut: toutes)")
+        parser.add_argument('--no-analyze', action='store_false', dest='analyze',
+                            help="VACUUM sans ANALYZE")
+        parser.add_argument('--report-only', action='store_true',
+                            help="Afficher le rapport (JSON) sans VACUUM")
+        parser.add_argument('--worker', action='store_true',
+                            help="Traiter la file d'attente (MaintenanceJob) en continu")
+        parser.add_argument('--once', action='store_true',
+                            help="Avec --worker: traiter les jobs en attente puis quitter")
+        parser.add_argument('--sleep', type=float, default=5.0,
+                            help="Avec --worker: pause en secondes quand la file est vide (défaut: 5)")
+        parser.add_argument('--stale-after', type=int, default=120,
+                            help="Avec --worker: minutes après lesquelles un job 'running' est remis en attente (défaut: 120)")
+
+    def handle(self, *args, **options):
+        if options['report_only']:
+            self.stdout.write(json.dumps(database_report(), indent=2, ensure_ascii=False))
+            return
+        if options['worker']:
+            self.run_worker(options)
+            return
+
+        job = MaintenanceJob.objects.create(tables=options['tables'], analyze=options['analyze'])
+        job.mark_running()
+        job = run_job(job, progress=self.print_progress)
+        if job.status == 'failed':
+            raise CommandError(job.error)
+        self.print_report(job.report)
+
+    def run_worker(self, options):
+        stale_after = timedelta(minutes=options['stale_after'])
+        self.stdout.write("Worker de maintenance démarré")
+        try:
+            while True:
+                close_old_connections()
+                requeued, failed = MaintenanceJob.requeue_stale(stale_after)
+                if requeued or failed:
+                    self.stdout.write(f"Jobs bloqués: {requeued} remis en attente, {failed} en échec")
+
+                processed = run_pending_jobs()
+                if processed:
+                    self.stdout.write(self.style.SUCCESS(f"{processed} maintenance(s) traitée(s)"))
+
+                if options['once']:
+                    break
+                if not processed:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker de maintenance arrêté")
+
+    def print_progress(self, done, total, table):
+        if table:
+            self.stdout.write(f"[{done + 1}/{total}] {table}")
+
+    def print_report(self, report):
+        seconds = sum(step['seconds'] for step in report['steps'])
+        self.stdout.write(self.style.SUCCESS(f"{len(report['steps'])} étape(s) en {seconds:.2f}s"))
+        if report['database_bytes'] is not None:
+            self.stdout.write(f"Taille de la base: {report['database_bytes_before']} -> {report['database_bytes']} octets")
+        for table in report['tables'][:10]:
+            if table['dead_tuples']:
+                self.stdout.write(f"  {table['table']}: {table['dead_tuples']} lignes mortes "
+                                  f"(~{table['estimated_bloat_bytes']} octets)")
+        if report['indexes'] is None and report['vendor'] == 'postgresql':
+            self.stdout.write("Bloat des index: extension pgstattuple non installée")
+        for index in report['unused_indexes']:
+            self.stdout.write(f"  Index inutilisé: {index['index']} sur {index['table']} ({index['bytes']} octets)")
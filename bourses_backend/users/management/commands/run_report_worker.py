@@ -0,0 +1,52 @@
+# users/management/commands/run_report_worker.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.models import ReportJob
+from users.reports import run_pending_jobs
+from users.snapshots import ensure_rolled_up
+
+
+class Command(BaseCommand):
+    help = "Traite la file d'attente des rapports admin (ReportJob)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Traiter les jobs en attente puis quitter")
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="Pause en secondes quand la file est vide (défaut: 2)")
+        parser.add_argument('--max-jobs', type=int, default=None,
+                            help="Nombre maximal de jobs par passage")
+        parser.add_argument('--stale-after', type=int, default=15,
+                            help="Minutes après lesquelles un job 'running' est remis en attente (défaut: 15)")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_after'])
+        self.stdout.write("Worker de rapports démarré")
+
+        try:
+            while True:
+                close_old_connections()
+                requeued, failed = ReportJob.requeue_stale(stale_after)
+                if requeued or failed:
+                    self.stdout.write(f"Jobs bloqués: {requeued} remis en attente, {failed} en échec")
+
+                # Snapshots manquants jusqu'à hier, si rollup_snapshots n'a pas tourné
+                # (hors des requêtes web: la mise en file reste en lecture seule)
+                rolled_up = ensure_rolled_up()
+                if rolled_up:
+                    self.stdout.write(f"{rolled_up} snapshot(s) quotidien(s) rattrapé(s)")
+
+                processed = run_pending_jobs(options['max_jobs'])
+                if processed:
+                    self.stdout.write(self.style.SUCCESS(f"{processed} rapport(s) traité(s)"))
+
+                if options['once']:
+                    break
+                if not processed:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker de rapports arrêté")
@@ -0,0 +1,63 @@
+# users/management/commands/seed_bourses.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.seeding import SEED_BATCH_SIZE, SeedError, seed_bourses
+
+
+class Command(BaseCommand):
+    help = ("Génère des données synthétiques (étudiants, administrateurs, documents avec fichiers PDF, "
+            "demandes dans tous les statuts, notifications) pour les benchmarks et le dimensionnement")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--documents', type=int, default=3, help="Documents par étudiant")
+        parser.add_argument('--applications', type=int, default=2, help="Demandes par étudiant")
+        parser.add_argument('--notifications', type=int, default=5, help="Notifications par étudiant")
+        parser.add_argument('--admin-notifications', type=int, default=None,
+                            help="Notifications admin au total (défaut: une par étudiant)")
+        parser.add_argument('--days', type=int, default=365, help="Fenêtre de dates générées (jours)")
+        parser.add_argument('--prefix', default='seed', help="Préfixe des noms d'utilisateur (défaut: seed)")
+        parser.add_argument('--password', default='seed-pass', help="Mot de passe de tous les comptes générés")
+        parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire (même graine, mêmes données)")
+        parser.add_argument('--no-files', action='store_true',
+                            help="Ne pas écrire les fichiers des documents (lignes seulement)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processus d'écriture des fichiers (défaut: nombre de cœurs)")
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE,
+                            help=f"Lignes par INSERT (défaut: {SEED_BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f"{done}/{total} étudiants", ending='\r')
+            self.stdout.flush()
+
+        try:
+            result = seed_bourses(
+                students=options['students'],
+                admins=options['admins'],
+                documents=options['documents'],
+                applications=options['applications'],
+                notifications=options['notifications'],
+                admin_notifications=options['admin_notifications'],
+                days=options['days'],
+                prefix=options['prefix'],
+                password=options['password'],
+                random_seed=options['seed'],
+                write_files=not options['no_files'],
+                workers=max(1, options['workers']),
+                batch_size=max(1, options['batch_size']),
+                progress=progress if options['verbosity'] > 0 else None,
+            )
+        except SeedError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write('')
+        for model, count in result.counts.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} lignes et {result.files} fichiers générés en {result.seconds:.1f}s "
+            f"({result.rows / max(result.seconds, 0.001):.0f} lignes/s)"
+        ))
@@ -0,0 +1,242 @@
+# users/metrics.py
+"""
+Métriques applicatives au format texte Prometheus (exposées par la vue
+`metrics`). Registre en mémoire, propre à chaque processus: avec plusieurs
+workers, Prometheus interroge chacun d'eux (ou un worker dédié).
+
+Compteurs et histogrammes sont alimentés par InstrumentationMiddleware
+(requêtes HTTP, SQL, 304), les uploads/téléchargements, l'outbox et les
+diffusions de notifications, et la réutilisation des rapports; les jauges
+du pool de connexions sont lues à chaque rendu, celle du retard de la
+réplique à chaque contrôle (users/replicas.py).
+"""
+import threading
+from bisect import bisect_left
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self.render_value(key, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self.lock:
+            return self.values.get(self.key(labels), 0)
+
+    def total(self):
+        with self.lock:
+            return sum(self.values.values())
+
+    def items(self):
+        """Copie des (valeurs d'étiquettes, compteur)"""
+        with self.lock:
+            return list(self.values.items())
+
+    def render_value(self, key, value):
+        return [f'{self.name}{format_labels(self.label_names, key)} {format_value(value)}']
+
+
+class Gauge(Metric):
+    """Valeur instantanée, fixée par set() ou par un collecteur du registre"""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def get(self, **labels):
+        with self.lock:
+            return self.values.get(self.key(labels))
+
+    def render_value(self, key, value):
+        return [f'{self.name}{format_labels(self.label_names, key)} {format_value(value)}']
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Compteurs par intervalle (+Inf en dernier), somme et nombre
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def summary(self):
+        """(nombre, somme) sur toutes les étiquettes"""
+        with self.lock:
+            return (sum(state[2] for state in self.values.values()),
+                    sum(state[1] for state in self.values.values()))
+
+    def render_value(self, key, state):
+        counts, total, count = state
+        names = self.label_names + ('le',)
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{format_labels(names, key + (format_value(bound),))} {cumulative}')
+        labels = format_labels(self.label_names, key)
+        lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        # Fonctions appelées avant chaque rendu (jauges lues à la demande)
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def collector(self, func):
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Requêtes HTTP (étiquette `view`: nom d'URL de users/urls.py)
+http_requests = REGISTRY.counter(
+    'bourses_http_requests_total', "Requêtes HTTP traitées", ('view', 'method', 'status'))
+http_request_duration = REGISTRY.histogram(
+    'bourses_http_request_duration_seconds', "Durée des requêtes HTTP", ('view',))
+http_request_queries = REGISTRY.histogram(
+    'bourses_http_request_queries', "Requêtes SQL par requête HTTP", ('view',), QUERY_COUNT_BUCKETS)
+http_response_bytes = REGISTRY.counter(
+    'bourses_http_response_bytes_total', "Octets envoyés dans les réponses", ('view',))
+conditional_get = REGISTRY.counter(
+    'bourses_conditional_get_total', "Requêtes conditionnelles (If-None-Match): hit = 304", ('result',))
+
+# Base de données
+db_queries = REGISTRY.counter('bourses_db_queries_total', "Requêtes SQL exécutées", ('alias',))
+db_query_seconds = REGISTRY.counter('bourses_db_query_seconds_total', "Temps passé en requêtes SQL", ('alias',))
+db_connections_opened = REGISTRY.counter(
+    'bourses_db_connections_opened_total', "Connexions à la base ouvertes (ou empruntées au pool)", ('alias',))
+db_pool = REGISTRY.gauge(
+    'bourses_db_pool', "Statistiques du pool psycopg (ConnectionPool.get_stats), par statistique", ('alias', 'stat'))
+db_replica_lag = REGISTRY.gauge(
+    'bourses_db_replica_lag_seconds', "Retard de la réplique au dernier contrôle (-1: injoignable)", ('alias',))
+db_read_routing = REGISTRY.counter(
+    'bourses_db_read_routing_total', "Lectures éligibles à la réplique, par base choisie", ('target', 'reason'))
+
+# Fichiers
+upload_bytes = REGISTRY.counter('bourses_upload_bytes_total', "Octets de documents uploadés")
+download_bytes = REGISTRY.counter(
+    'bourses_download_bytes_total', "Octets de fichiers téléchargés", ('kind',))
+
+# Notifications et rapports
+notifications_created = REGISTRY.counter(
+    'bourses_notifications_created_total', "Notifications créées", ('audience', 'source'))
+report_cache = REGISTRY.counter(
+    'bourses_report_cache_total', "Demandes de rapport: hit = rapport existant réutilisé", ('result',))
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    db_connections_opened.inc(alias=connection.alias)
+
+
+def pool_stats():
+    """Statistiques des pools de connexions psycopg, par alias (vide sans pool)"""
+    from django.db import connections
+
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+@REGISTRY.collector
+def collect_pool_stats():
+    for alias, stats in pool_stats().items():
+        for stat, value in stats.items():
+            db_pool.set(value, alias=alias, stat=stat)
+
+
+def cache_hit_ratio(counter):
+    """Part des `hit` dans un compteur à étiquette result (None sans données)"""
+    hits, misses = counter.get(result='hit'), counter.get(result='miss')
+    return round(hits / (hits + misses), 4) if hits + misses else None
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0008_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('new_students', models.PositiveIntegerField(default=0)),
+                ('new_admins', models.PositiveIntegerField(default=0)),
+                ('documents_uploaded', models.PositiveIntegerField(default=0)),
+                ('documents_verified', models.PositiveIntegerField(default=0)),
+                ('documents_by_type', models.JSONField(default=dict)),
+                ('applications_created', models.PositiveIntegerField(default=0)),
+                ('applications_submitted', models.PositiveIntegerField(default=0)),
+                ('applications_by_type', models.JSONField(default=dict)),
+                ('applications_by_status', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined'], name='users_custo_date_jo_3d5338_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['created_at'], name='users_schol_created_d9aa96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['submitted_at'], name='users_schol_submitt_c9b1b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentdocument',
+            index=models.Index(fields=['uploaded_at'], name='users_stude_uploade_d5f781_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentdocument',
+            index=models.Index(fields=['verified_at'], name='users_stude_verifie_3673f8_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0009_dailysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['updated_at'], name='users_custo_updated_35e49b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['updated_at'], name='users_schol_updated_9d171a_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_notificationevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminNotificationCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seen_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(fields=['created_at'], name='users_admin_created_275ad8_idx'),
+        ),
+        migrations.AddField(
+            model_name='adminnotificationcursor',
+            name='admin',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_cursor', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_admin_notification_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('completed', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('tables', models.JSONField(blank=True, default=list)),
+                ('analyze', models.BooleanField(default=True)),
+                ('tables_total', models.PositiveIntegerField(default=0)),
+                ('tables_done', models.PositiveIntegerField(default=0)),
+                ('current_table', models.CharField(blank=True, max_length=200)),
+                ('report', models.JSONField(blank=True, default=dict)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='maintenance_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['status', 'created_at'], name='users_maint_status_dab29c_idx')],
+            },
+        ),
+    ]
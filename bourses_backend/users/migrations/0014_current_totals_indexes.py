@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0013_maintenancejob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['user_type'], name='users_custo_user_ty_f25e6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['status', 'scholarship_type'], name='users_schol_status_6ec12f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentdocument',
+            index=models.Index(fields=['document_type', 'is_verified'], name='users_stude_documen_bf3b5e_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 20:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_current_totals_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='adminnotification',
+            name='is_read',
+        ),
+    ]
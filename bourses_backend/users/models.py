@@ -1,6 +1,6 @@
 # users/models.py
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connection, models, transaction
 from django.utils import timezone
 import os
 
@@ -33,6 +33,15 @@ class CustomUser(AbstractUser):
         related_query_name='user',
     )
 
+    class Meta(AbstractUser.Meta):
+        # Filtres par date des rollups quotidiens et empreinte des rapports;
+        # user_type pour les totaux comptés en direct (snapshots.current_totals)
+        indexes = [
+            models.Index(fields=['date_joined']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['user_type']),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
 
@@ -55,6 +64,15 @@ class EligibilityRule(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_rule_type_display()})"
 
+def format_file_size(file_size):
+    """Formater une taille de fichier en B, KB ou MB"""
+    if file_size < 1024:
+        return f"{file_size} B"
+    elif file_size < 1024 * 1024:
+        return f"{file_size / 1024:.1f} KB"
+    else:
+        return f"{file_size / (1024 * 1024):.1f} MB"
+
 class StudentDocument(models.Model):
     DOCUMENT_TYPE_CHOICES = (
         ('identity', "Pièce d'identité"),
@@ -76,18 +94,18 @@ class StudentDocument(models.Model):
     
     class Meta:
         db_table = 'users_studentdocument'
+        indexes = [
+            models.Index(fields=['uploaded_at']),
+            models.Index(fields=['verified_at']),
+            models.Index(fields=['document_type', 'is_verified']),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.get_document_type_display()}"
     
     def get_file_size_display(self):
         """Retourne la taille du fichier formatée"""
-        if self.file_size < 1024:
-            return f"{self.file_size} B"
-        elif self.file_size < 1024 * 1024:
-            return f"{self.file_size / 1024:.1f} KB"
-        else:
-            return f"{self.file_size / (1024 * 1024):.1f} MB"
+        return format_file_size(self.file_size)
     
     def delete(self, *args, **kwargs):
         """Supprime le fichier physique lors de la suppression de l'objet"""
@@ -109,15 +127,31 @@ class AdminNotification(models.Model):
     message = models.TextField()
     related_document = models.ForeignKey(StudentDocument, on_delete=models.CASCADE, null=True, blank=True)
     related_user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True)
-    is_read = models.BooleanField(default=False)
+    # Pas de drapeau de lecture partagé: l'état de lecture de chaque admin est
+    # donné par son AdminNotificationCursor (voir read_by_any_admin)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"{self.get_notification_type_display()} - {self.title}"
 
+    @classmethod
+    def unread_for(cls, admin, last_seen_at=None):
+        """Notifications non lues par `admin`: plage created_at > curseur de l'index"""
+        if last_seen_at is None:
+            last_seen_at = AdminNotificationCursor.last_seen(admin)
+        return cls.objects.filter(created_at__gt=last_seen_at)
+
+    @staticmethod
+    def read_by_any_admin():
+        """Condition « lue par au moins un admin »: un curseur a dépassé la notification (rétention, exports)"""
+        return models.Exists(AdminNotificationCursor.objects.filter(last_seen_at__gte=models.OuterRef('created_at')))
+
 class ScholarshipApplication(models.Model):
     APPLICATION_STATUS_CHOICES = [
         ('draft', 'Brouillon'),
@@ -137,6 +171,18 @@ class ScholarshipApplication(models.Model):
         ('research', 'Bourse de Recherche'),
     ]
 
+    STATUS_COLORS = {
+        'draft': 'secondary',
+        'submitted': 'info',
+        'under_review': 'warning',
+        'approved': 'success',
+        'rejected': 'danger',
+        'needs_info': 'primary',
+    }
+
+    # Statuts dans lesquels l'étudiant peut modifier ou soumettre sa demande
+    EDITABLE_STATUSES = ('draft', 'needs_info')
+
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='applications')
     scholarship_type = models.CharField(max_length=20, choices=SCHOLARSHIP_TYPES)
     title = models.CharField(max_length=200)
@@ -164,6 +210,12 @@ class ScholarshipApplication(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Demande de bourse'
         verbose_name_plural = 'Demandes de bourse'
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['submitted_at']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['status', 'scholarship_type']),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.get_scholarship_type_display()}"
@@ -176,21 +228,13 @@ class ScholarshipApplication(models.Model):
         super().save(*args, **kwargs)
 
     def get_status_color(self):
-        status_colors = {
-            'draft': 'secondary',
-            'submitted': 'info',
-            'under_review': 'warning',
-            'approved': 'success',
-            'rejected': 'danger',
-            'needs_info': 'primary',
-        }
-        return status_colors.get(self.status, 'secondary')
+        return self.STATUS_COLORS.get(self.status, 'secondary')
 
     def can_be_edited(self):
-        return self.status in ['draft', 'needs_info']
+        return self.status in self.EDITABLE_STATUSES
 
     def can_be_submitted(self):
-        return self.status in ['draft', 'needs_info']
+        return self.status in self.EDITABLE_STATUSES
 
 class StudentNotification(models.Model):
     NOTIFICATION_TYPES = [
@@ -204,6 +248,17 @@ class StudentNotification(models.Model):
         ('info_request', 'Demande d\'Information'),
     ]
 
+    ICONS = {
+        'document_verified': '✅',
+        'document_rejected': '❌',
+        'application_approved': '🎓',
+        'application_rejected': '📝',
+        'application_under_review': '🔍',
+        'system_alert': '🔔',
+        'deadline_reminder': '⏰',
+        'info_request': 'ℹ️',
+    }
+
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notifications')
     notification_type = models.CharField(max_length=30, choices=NOTIFICATION_TYPES)
     title = models.CharField(max_length=200)
@@ -233,20 +288,16 @@ class StudentNotification(models.Model):
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
-            self.save()
+            self.save(update_fields=['is_read', 'read_at'])
+
+    async def amark_as_read(self):
+        if not self.is_read:
+            self.is_read = True
+            self.read_at = timezone.now()
+            await self.asave(update_fields=['is_read', 'read_at'])
 
     def get_icon(self):
-        icons = {
-            'document_verified': '✅',
-            'document_rejected': '❌',
-            'application_approved': '🎓',
-            'application_rejected': '📝',
-            'application_under_review': '🔍',
-            'system_alert': '🔔',
-            'deadline_reminder': '⏰',
-            'info_request': 'ℹ️',
-        }
-        return icons.get(self.notification_type, '🔔')
+        return self.ICONS.get(self.notification_type, '🔔')
 
     @classmethod
     def create_document_notification(cls, student, notification_type, title, message, related_document=None, is_important=False):
@@ -261,4 +312,292 @@ class StudentNotification(models.Model):
             related_document=related_document,
             is_important=is_important
         )
-        return notification
\ No newline at end of file
+        return notification
+
+class QueuedJob(models.Model):
+    """
+    Base des files d'attente traitées par une commande worker: statut,
+    tentatives et horodatages, réservation SKIP LOCKED et reprise des jobs
+    bloqués.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('completed', 'Terminé'),
+        ('failed', 'Échoué'),
+    )
+
+    ACTIVE_STATUSES = ('pending', 'running')
+    MAX_ATTEMPTS = 3
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['-created_at']
+
+    @classmethod
+    def claim_next(cls):
+        """Réserve le plus ancien job en attente (SKIP LOCKED si la base le permet)"""
+        with transaction.atomic():
+            queryset = cls.objects.filter(status='pending').order_by('created_at')
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            job = queryset.first()
+            if job is None:
+                return None
+            job.mark_running()
+        return job
+
+    def mark_running(self):
+        self.status = 'running'
+        self.started_at = timezone.now()
+        self.attempts += 1
+        self.save(update_fields=['status', 'started_at', 'attempts'])
+
+    @classmethod
+    def requeue_stale(cls, older_than):
+        """Remet en attente les jobs bloqués (worker arrêté); échec après MAX_ATTEMPTS"""
+        stale = cls.objects.filter(status='running', started_at__lt=timezone.now() - older_than)
+        failed = stale.filter(attempts__gte=cls.MAX_ATTEMPTS).update(
+            status='failed', error='Nombre maximal de tentatives atteint', finished_at=timezone.now()
+        )
+        requeued = stale.update(status='pending', started_at=None)
+        return requeued, failed
+
+class ReportJob(QueuedJob):
+    """
+    File d'attente des rapports admin, traitée par la commande
+    `python manage.py run_report_worker`. Le fichier produit est conservé
+    et réutilisé tant que l'empreinte des données (data_fingerprint) ne change pas.
+    """
+    REPORT_TYPES = (
+        ('full', 'Rapport complet (JSON)'),
+        ('pdf', 'Rapport PDF'),
+    )
+
+    report_type = models.CharField(max_length=10, choices=REPORT_TYPES)
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs')
+    data_fingerprint = models.CharField(max_length=64)
+    file = models.FileField(upload_to='reports/%Y/%m/', blank=True)
+
+    class Meta(QueuedJob.Meta):
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['report_type', 'data_fingerprint']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} #{self.pk} - {self.get_status_display()}"
+
+    def has_file(self):
+        return bool(self.file) and self.file.storage.exists(self.file.name)
+
+    @classmethod
+    def enqueue(cls, report_type, requested_by, data_fingerprint):
+        """
+        Retourne un job existant pour les mêmes données (en cours ou terminé
+        avec son fichier), sinon crée un nouveau job en attente.
+        """
+        existing = cls.objects.filter(
+            report_type=report_type,
+            data_fingerprint=data_fingerprint,
+            status__in=cls.ACTIVE_STATUSES + ('completed',)
+        ).order_by('-created_at').first()
+        if existing is not None and (existing.status != 'completed' or existing.has_file()):
+            return existing, False
+
+        job = cls.objects.create(
+            report_type=report_type,
+            requested_by=requested_by,
+            data_fingerprint=data_fingerprint
+        )
+        return job, True
+
+class MaintenanceJob(QueuedJob):
+    """
+    Maintenance de la base (VACUUM/ANALYZE table par table, rapport sur le
+    bloat et les index inutilisés), traitée par `python manage.py
+    run_maintenance --worker` hors des workers web (voir users/maintenance.py).
+    """
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='maintenance_jobs')
+    # Tables à traiter (vide: toutes les tables de l'application)
+    tables = models.JSONField(default=list, blank=True)
+    analyze = models.BooleanField(default=True)
+
+    # Progression, mise à jour après chaque table
+    tables_total = models.PositiveIntegerField(default=0)
+    tables_done = models.PositiveIntegerField(default=0)
+    current_table = models.CharField(max_length=200, blank=True)
+    report = models.JSONField(default=dict, blank=True)
+
+    class Meta(QueuedJob.Meta):
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Maintenance #{self.pk} - {self.get_status_display()}"
+
+    @property
+    def progress(self):
+        """Avancement en pourcentage"""
+        if self.status == 'completed':
+            return 100
+        return int(self.tables_done * 100 / self.tables_total) if self.tables_total else 0
+
+    @classmethod
+    def enqueue(cls, requested_by, tables=(), analyze=True):
+        """Une maintenance à la fois: retourne le job en attente ou en cours s'il existe"""
+        existing = cls.objects.filter(status__in=cls.ACTIVE_STATUSES).order_by('created_at').first()
+        if existing is not None:
+            return existing, False
+        job = cls.objects.create(requested_by=requested_by, tables=list(tables), analyze=analyze)
+        return job, True
+
+class DailySnapshot(models.Model):
+    """
+    Compteurs d'une journée (inscriptions, uploads, vérifications, demandes),
+    remplis par `python manage.py rollup_snapshots`. Les séries par jour des
+    rapports et des tendances lisent cette table plus le delta du jour
+    (users/snapshots.py); les totaux actuels sont comptés en direct.
+    """
+    date = models.DateField(unique=True)
+
+    new_users = models.PositiveIntegerField(default=0)
+    new_students = models.PositiveIntegerField(default=0)
+    new_admins = models.PositiveIntegerField(default=0)
+
+    documents_uploaded = models.PositiveIntegerField(default=0)
+    documents_verified = models.PositiveIntegerField(default=0)
+    documents_by_type = models.JSONField(default=dict)
+
+    applications_created = models.PositiveIntegerField(default=0)
+    applications_submitted = models.PositiveIntegerField(default=0)
+    applications_by_type = models.JSONField(default=dict)
+    # Statut, au moment du rollup, des demandes créées ce jour-là: figé, les
+    # répartitions actuelles viennent de snapshots.current_totals()
+    applications_by_status = models.JSONField(default=dict)
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Snapshot {self.date}"
+
+class NotificationEvent(models.Model):
+    """
+    Outbox des notifications: les vues enregistrent l'événement dans la même
+    transaction que l'écriture principale (users/outbox.py), puis
+    `python manage.py dispatch_notifications` crée les AdminNotification /
+    StudentNotification par lots (pas de livraison en push, voir outbox.py).
+    """
+    AUDIENCE_CHOICES = (
+        ('admin', 'Administrateurs'),
+        ('student', 'Étudiant'),
+    )
+
+    audience = models.CharField(max_length=10, choices=AUDIENCE_CHOICES)
+    notification_type = models.CharField(max_length=30)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+
+    # Destinataire (notifications étudiant) et liens optionnels
+    student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    related_user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    related_document = models.ForeignKey(StudentDocument, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    related_application = models.ForeignKey(ScholarshipApplication, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    is_important = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Index partiel: seuls les événements en attente sont parcourus par le dispatcher
+            models.Index(fields=['id'], condition=models.Q(dispatched_at__isnull=True), name='notificationevent_pending'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_audience_display()} - {self.title}"
+
+    def to_notification(self):
+        """Notification (non enregistrée) correspondant à l'événement"""
+        if self.audience == 'student':
+            return StudentNotification(
+                student_id=self.student_id,
+                notification_type=self.notification_type,
+                title=self.title,
+                message=self.message,
+                related_document_id=self.related_document_id,
+                related_application_id=self.related_application_id,
+                is_important=self.is_important
+            )
+        return AdminNotification(
+            notification_type=self.notification_type,
+            title=self.title,
+            message=self.message,
+            related_document_id=self.related_document_id,
+            related_user_id=self.related_user_id
+        )
+
+class AdminNotificationCursor(models.Model):
+    """
+    Position de lecture d'un admin dans AdminNotification: les notifications
+    créées jusqu'à last_seen_at sont lues pour lui. Une seule petite ligne
+    par admin, au lieu d'une ligne par (admin, notification).
+    """
+    admin = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='notification_cursor')
+    last_seen_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.admin.username} - {self.last_seen_at}"
+
+    @classmethod
+    def last_seen(cls, admin):
+        """Sans curseur, les notifications antérieures à l'inscription de l'admin sont considérées comme lues"""
+        last_seen_at = cls.objects.filter(admin=admin).values_list('last_seen_at', flat=True).first()
+        return last_seen_at or admin.date_joined
+
+    @classmethod
+    def advance(cls, admin, seen_at):
+        """Avance le curseur jusqu'à seen_at (jamais en arrière); retourne True s'il a bougé"""
+        if seen_at is None:
+            return False
+        if cls.objects.filter(admin=admin, last_seen_at__lt=seen_at).update(
+            last_seen_at=seen_at, updated_at=timezone.now()
+        ):
+            return True
+        _, created = cls.objects.get_or_create(admin=admin, defaults={'last_seen_at': seen_at})
+        return created
+
+    @classmethod
+    async def alast_seen(cls, admin):
+        """Version asynchrone de last_seen()"""
+        last_seen_at = await cls.objects.filter(admin=admin).values_list('last_seen_at', flat=True).afirst()
+        if last_seen_at is None and 'date_joined' in admin.get_deferred_fields():
+            # Utilisateur reconstruit depuis les claims JWT
+            await admin.arefresh_from_db(fields=['date_joined'])
+        return last_seen_at or admin.date_joined
+
+    @classmethod
+    async def aadvance(cls, admin, seen_at):
+        """Version asynchrone de advance()"""
+        if seen_at is None:
+            return False
+        if await cls.objects.filter(admin=admin, last_seen_at__lt=seen_at).aupdate(
+            last_seen_at=seen_at, updated_at=timezone.now()
+        ):
+            return True
+        _, created = await cls.objects.aget_or_create(admin=admin, defaults={'last_seen_at': seen_at})
+        return created
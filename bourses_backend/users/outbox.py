@@ -0,0 +1,121 @@
+# users/outbox.py
+"""
+Outbox des notifications. Les vues appellent record_admin_event /
+record_student_event dans la transaction de leur écriture principale: si
+celle-ci échoue, aucun événement n'est enregistré, et la requête ne paie
+qu'un INSERT court. dispatch_pending() (commande dispatch_notifications,
+ou directement après le commit en mode BOURSES_NOTIFICATIONS_EAGER) crée
+les notifications par lots puis envoie le signal `notifications_dispatched`.
+
+La livraison en push n'est pas implémentée: aucun récepteur n'est branché
+sur ce signal (pas de flux WebSocket ou SSE dans le projet), et il est
+envoyé dans le processus du dispatcher, pas dans ceux des serveurs web.
+Les clients voient les nouvelles notifications en interrogeant les
+endpoints de liste. Un flux temps réel devra relayer le signal entre
+processus (LISTEN/NOTIFY PostgreSQL, Redis...).
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .metrics import notifications_created
+from .models import AdminNotification, NotificationEvent, StudentNotification
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH_SIZE = 500
+
+# Envoyé après le commit de chaque lot, avec les arguments
+# admin_notifications et student_notifications (instances avec leur pk).
+# Point d'extension sans récepteur pour l'instant (voir plus haut)
+notifications_dispatched = Signal()
+
+
+def record_event(**fields):
+    event = NotificationEvent.objects.create(**fields)
+    if settings.BOURSES_NOTIFICATIONS_EAGER:
+        # Sans dispatcher (développement, tests): création juste après le commit
+        transaction.on_commit(dispatch_pending)
+    return event
+
+
+def record_admin_event(notification_type, title, message, related_user=None, related_document=None):
+    """Notification pour les administrateurs"""
+    return record_event(
+        audience='admin',
+        notification_type=notification_type,
+        title=title,
+        message=message,
+        related_user=related_user,
+        related_document=related_document
+    )
+
+
+def record_student_event(student, notification_type, title, message,
+                         related_document=None, related_application=None, is_important=False):
+    """Notification pour un étudiant"""
+    return record_event(
+        audience='student',
+        student=student,
+        notification_type=notification_type,
+        title=title,
+        message=message,
+        related_document=related_document,
+        related_application=related_application,
+        is_important=is_important
+    )
+
+
+def publish(admin_notifications, student_notifications):
+    responses = notifications_dispatched.send_robust(
+        sender=NotificationEvent,
+        admin_notifications=admin_notifications,
+        student_notifications=student_notifications
+    )
+    for receiver, response in responses:
+        if isinstance(response, Exception):
+            logger.error(f"Notification subscriber {receiver} failed: {response}")
+
+
+def dispatch_batch(batch_size=DISPATCH_BATCH_SIZE):
+    """Matérialise un lot d'événements en attente; retourne le nombre d'événements traités"""
+    with transaction.atomic():
+        pending = NotificationEvent.objects.filter(dispatched_at__isnull=True).order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # Plusieurs dispatchers peuvent tourner sans traiter deux fois le même événement
+            pending = pending.select_for_update(skip_locked=True)
+        events = list(pending[:batch_size])
+        if not events:
+            return 0
+
+        notifications = [event.to_notification() for event in events]
+        admin_notifications = AdminNotification.objects.bulk_create(
+            [n for n in notifications if isinstance(n, AdminNotification)]
+        )
+        student_notifications = StudentNotification.objects.bulk_create(
+            [n for n in notifications if isinstance(n, StudentNotification)]
+        )
+        NotificationEvent.objects.filter(pk__in=[event.pk for event in events]).update(dispatched_at=timezone.now())
+
+        transaction.on_commit(lambda: publish(admin_notifications, student_notifications))
+
+    notifications_created.inc(len(admin_notifications), audience='admin', source='outbox')
+    notifications_created.inc(len(student_notifications), audience='student', source='outbox')
+    return len(events)
+
+
+def dispatch_pending(batch_size=DISPATCH_BATCH_SIZE, max_batches=None):
+    """Traite les événements en attente par lots; retourne le nombre d'événements traités"""
+    dispatched = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = dispatch_batch(batch_size)
+        if not count:
+            break
+        dispatched += count
+        batches += 1
+    if dispatched:
+        logger.info(f"Dispatched {dispatched} notification events in {batches} batches")
+    return dispatched
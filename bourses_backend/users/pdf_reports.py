@@ -0,0 +1,143 @@
+# users/pdf_reports.py
+"""
+Écriture de rapports PDF volumineux à mémoire bornée.
+
+Contrairement à SimpleDocTemplate (qui garde toute la liste de flowables
+en mémoire), ChunkedPDFWriter dessine les lignes directement sur le canvas
+au fil d'un itérateur: de chaque page terminée, seul le flux compressé est
+conservé (~1,5 Ko) jusqu'à l'écriture du fichier temporaire à la fermeture.
+Les lignes viennent de QuerySet.iterator(chunk_size=...), sans charger
+toute la table.
+"""
+from django.utils import timezone
+
+REPORT_CHUNK_SIZE = 2000
+
+MARGIN = 40
+ROW_HEIGHT = 14
+HEADER_HEIGHT = 18
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+FONT_SIZE = 8
+
+
+class ChunkedPDFWriter:
+    """Rapport PDF page par page: titres de section, tableaux clé/valeur et tableaux de lignes"""
+
+    def __init__(self, path, title):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        self.title = title
+        self.width, self.height = A4
+        self.canvas = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.page_number = 0
+        self.columns = None
+        self.start_page()
+
+    # ----- Pages -----
+
+    def start_page(self):
+        self.page_number += 1
+        self.y = self.height - MARGIN
+        self.canvas.setFont(FONT, 7)
+        self.canvas.drawString(MARGIN, MARGIN / 2, self.title)
+        self.canvas.drawRightString(self.width - MARGIN, MARGIN / 2, f"Page {self.page_number}")
+
+    def new_page(self):
+        self.canvas.showPage()
+        self.start_page()
+        # Tableau en cours: l'en-tête de colonnes est répété sur la nouvelle page
+        if self.columns:
+            self.draw_column_header()
+
+    def ensure_space(self, height):
+        if self.y - height < MARGIN:
+            self.new_page()
+
+    # ----- Texte -----
+
+    def fit(self, text, width, font=FONT, size=FONT_SIZE):
+        """Tronque le texte pour qu'il tienne dans la largeur de la colonne"""
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        text = '' if text is None else str(text)
+        if stringWidth(text, font, size) <= width:
+            return text
+        while text and stringWidth(text + '…', font, size) > width:
+            text = text[:-1]
+        return text + '…'
+
+    def heading(self, text, size=14):
+        self.columns = None
+        self.ensure_space(size * 2 + ROW_HEIGHT)
+        self.y -= size
+        self.canvas.setFont(FONT_BOLD, size)
+        self.canvas.drawString(MARGIN, self.y, text)
+        self.y -= size
+
+    def paragraph(self, text):
+        self.ensure_space(ROW_HEIGHT)
+        self.y -= ROW_HEIGHT
+        self.canvas.setFont(FONT, 10)
+        self.canvas.drawString(MARGIN, self.y, text)
+
+    def spacer(self, height=ROW_HEIGHT):
+        self.y -= height
+
+    # ----- Tableaux -----
+
+    def draw_column_header(self):
+        self.y -= HEADER_HEIGHT
+        self.canvas.setFillGray(0.85)
+        self.canvas.rect(MARGIN, self.y - 4, self.width - 2 * MARGIN, HEADER_HEIGHT, stroke=0, fill=1)
+        self.canvas.setFillGray(0)
+        self.canvas.setFont(FONT_BOLD, FONT_SIZE)
+        x = MARGIN + 2
+        for label, width in self.columns:
+            self.canvas.drawString(x, self.y, self.fit(label, width - 4, FONT_BOLD))
+            x += width
+
+    def table(self, columns, rows):
+        """
+        Tableau de lignes: `columns` est une liste de (libellé, largeur) et
+        `rows` un itérable consommé au fil de l'eau. Retourne le nombre de lignes.
+        """
+        self.columns = columns
+        self.ensure_space(HEADER_HEIGHT + ROW_HEIGHT)
+        self.draw_column_header()
+
+        count = 0
+        for row in rows:
+            self.ensure_space(ROW_HEIGHT)
+            self.y -= ROW_HEIGHT
+            # Un seul objet texte par ligne (bien moins coûteux qu'un drawString par cellule)
+            text = self.canvas.beginText()
+            text.setFont(FONT, FONT_SIZE)
+            x = MARGIN + 2
+            for (_, width), value in zip(columns, row):
+                text.setTextOrigin(x, self.y)
+                text.textOut(self.fit(value, width - 4))
+                x += width
+            self.canvas.drawText(text)
+            count += 1
+
+        self.columns = None
+        self.spacer()
+        return count
+
+    def key_values(self, rows, key_width=250):
+        """Tableau de statistiques à deux colonnes"""
+        return self.table([('Métrique', key_width), ('Valeur', 120)], rows)
+
+    def close(self):
+        self.canvas.save()
+
+
+def format_date(value):
+    return timezone.localtime(value).strftime('%d/%m/%Y') if value else ''
+
+
+def format_amount(value):
+    return f"{value:.2f} €" if value is not None else ''
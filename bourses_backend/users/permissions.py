@@ -0,0 +1,50 @@
+# users/permissions.py
+from rest_framework import permissions
+
+
+def is_admin(user):
+    return user.is_authenticated and user.user_type == 'admin'
+
+
+def is_student(user):
+    return user.is_authenticated and user.user_type == 'student'
+
+
+class IsAdminUserType(permissions.BasePermission):
+    """Accès réservé aux administrateurs (user_type == 'admin')"""
+    message = "Accès non autorisé"
+
+    def has_permission(self, request, view):
+        return is_admin(request.user)
+
+
+class IsStudent(permissions.BasePermission):
+    """Accès réservé aux étudiants (user_type == 'student')"""
+    message = "Accès réservé aux étudiants"
+
+    def has_permission(self, request, view):
+        return is_student(request.user)
+
+
+class IsOwnerOrAdmin(permissions.BasePermission):
+    """
+    Accès au propriétaire de l'objet ou à un administrateur.
+    Le contrôle se fait de préférence dans la requête via scope_queryset(),
+    ce qui évite de charger la clé étrangère pour la comparer.
+    """
+    message = "Accès non autorisé à cette ressource"
+    owner_field = 'student'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+    def has_object_permission(self, request, view, obj):
+        owner_field = getattr(view, 'owner_field', self.owner_field)
+        return is_admin(request.user) or getattr(obj, f'{owner_field}_id') == request.user.pk
+
+    @classmethod
+    def scope_queryset(cls, request, queryset, owner_field=None):
+        """Restreindre le queryset aux objets de l'utilisateur (sauf pour un admin)"""
+        if is_admin(request.user):
+            return queryset.all()
+        return queryset.filter(**{owner_field or cls.owner_field: request.user})
@@ -0,0 +1,79 @@
+# users/renderers.py
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel, repli sur le module json standard
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def default(obj):
+    """Types non gérés nativement: Decimal en chaîne (comme les serializers DRF), le reste via DRF"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _encoder.default(obj)
+
+
+def use_orjson():
+    """orjson est utilisé si installé, sauf si BOURSES_JSON_BACKEND vaut 'stdlib'"""
+    return orjson is not None and settings.BOURSES_JSON_BACKEND != 'stdlib'
+
+
+def dumps(data, default=default):
+    """Encoder en JSON compact (UTF-8); datetimes au format DRF (suffixe 'Z' en UTC)"""
+    if use_orjson():
+        return orjson.dumps(data, default=default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        data, default=default, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def render_json(data):
+    """
+    Corps de réponse octet pour octet identique à JSONRenderer de DRF: Decimal
+    en nombre et U+2028/U+2029 échappés (JSON valide comme JavaScript)
+    """
+    body = dumps(data, default=_encoder.default)
+    return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def loads(content):
+    if use_orjson():
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """Renderer JSON basé sur orjson, avec repli sur la bibliothèque standard"""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed('render'):
+            return render_json(data)
+
+
+class FastJSONParser(BaseParser):
+    """Parser JSON basé sur orjson, avec repli sur la bibliothèque standard"""
+    media_type = 'application/json'
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
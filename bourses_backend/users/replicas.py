@@ -0,0 +1,161 @@
+# users/replicas.py
+"""
+Lectures sur la réplique PostgreSQL (alias `replica`, voir
+BOURSES_DB_REPLICA_HOST). Seules les lectures faites dans un bloc
+`replica_reads()` (analytics, rapports, exports, listes) y sont envoyées;
+tout le reste, et toutes les écritures, restent sur la base principale.
+
+Les lectures reviennent sur la base principale:
+- quand la requête en cours a déjà écrit (lecture de ses propres écritures);
+- pendant BOURSES_REPLICA_PIN_SECONDS après une requête qui a écrit, grâce au
+  cookie posé par ReplicaPinningMiddleware;
+- quand le retard de la réplique dépasse BOURSES_REPLICA_MAX_LAG secondes,
+  ou qu'elle ne répond pas.
+
+L'état est porté par des ContextVar: propre à chaque thread, et copié dans
+les tâches asynchrones.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import db_read_routing, db_replica_lag
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'bourses_db_pin'
+
+# Modèles toujours lus sur la base principale: état de file d'attente relu
+# juste après avoir été écrit par un autre processus
+PRIMARY_ONLY_MODELS = {'users.reportjob'}
+
+# Retard en secondes: 0 si la réplique a rejoué tout ce qu'elle a reçu
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_reads = ContextVar('bourses_replica_reads', default=False)
+_request = ContextVar('bourses_replica_request', default=None)
+
+
+class RequestState:
+    """Routage d'une requête HTTP: épinglée sur la base principale, a écrit"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replica_configured():
+    """Alias `replica` défini et distinct de la base principale (en test, TEST.MIRROR les confond)"""
+    if REPLICA_ALIAS not in connections.settings:
+        return False
+    return connections[REPLICA_ALIAS].settings_dict is not connections[DEFAULT_DB_ALIAS].settings_dict
+
+
+@contextmanager
+def replica_reads():
+    """Lectures du bloc (ou de la fonction décorée) envoyées à la réplique si possible"""
+    token = _reads.set(True)
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+@contextmanager
+def request_scope(pinned=False):
+    """État de routage d'une requête HTTP (ReplicaPinningMiddleware)"""
+    state = RequestState(pinned)
+    token = _request.set(state)
+    try:
+        yield state
+    finally:
+        _request.reset(token)
+
+
+def measure_lag(alias=REPLICA_ALIAS):
+    """Retard de réplication en secondes, None si la réplique est injoignable"""
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning(f"Replica lag check failed: {e}")
+        return None
+
+
+class LagMonitor:
+    """Retard de la réplique, remesuré au plus toutes les BOURSES_REPLICA_LAG_CHECK_INTERVAL secondes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.value = None
+
+    def current(self):
+        now = time.monotonic()
+        with self.lock:
+            fresh = self.checked_at is not None and now - self.checked_at < settings.BOURSES_REPLICA_LAG_CHECK_INTERVAL
+            if fresh:
+                return self.value
+            # Un seul thread mesure; les autres gardent la valeur précédente
+            self.checked_at = now
+        self.value = measure_lag()
+        db_replica_lag.set(-1 if self.value is None else round(self.value, 3), alias=REPLICA_ALIAS)
+        return self.value
+
+    def healthy(self):
+        lag = self.current()
+        return lag is not None and lag <= settings.BOURSES_REPLICA_MAX_LAG
+
+
+lag_monitor = LagMonitor()
+
+
+class ReplicaRouter:
+    """Routeur de settings.DATABASE_ROUTERS (sans effet sans alias `replica`)"""
+
+    def db_for_read(self, model, **hints):
+        if not _reads.get() or model._meta.label_lower in PRIMARY_ONLY_MODELS or not replica_configured():
+            return None
+        state = _request.get()
+        if state is not None and (state.pinned or state.wrote):
+            db_read_routing.inc(target=DEFAULT_DB_ALIAS, reason='pinned')
+            return DEFAULT_DB_ALIAS
+        if not lag_monitor.healthy():
+            db_read_routing.inc(target=DEFAULT_DB_ALIAS, reason='lag')
+            return DEFAULT_DB_ALIAS
+        db_read_routing.inc(target=REPLICA_ALIAS, reason='replica_reads')
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            # Lectures suivantes de la requête (et des suivantes, via le cookie) sur la base principale
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données des deux côtés de la réplication
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le schéma arrive sur la réplique par la réplication
+        if db == REPLICA_ALIAS:
+            return False
+        return None
@@ -0,0 +1,277 @@
+# users/reports.py
+"""
+Génération des rapports admin, exécutée hors des workers web par
+`python manage.py run_report_worker` (voir ReportJob).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import CustomUser, StudentDocument, ScholarshipApplication, ReportJob
+from .outbox import record_admin_event
+from .pdf_reports import REPORT_CHUNK_SIZE, ChunkedPDFWriter, format_amount, format_date
+from .replicas import replica_reads
+from .snapshots import current_totals, load_series
+
+logger = logging.getLogger(__name__)
+
+RECENT_ACTIVITY_DAYS = 30
+
+
+def data_fingerprint():
+    """
+    Empreinte des données couvertes par les rapports: totaux actuels comptés
+    en direct (les suppressions changent les comptes), série de l'activité
+    récente et date du jour, car l'activité récente dépend de la fenêtre de
+    30 jours. Lecture seule: aucun rollup n'est lancé ici.
+    """
+    totals = current_totals()
+    series = load_series(RECENT_ACTIVITY_DAYS)
+    # Insertions et modifications de lignes existantes (sections de détail), via des MAX indexés;
+    # le dernier id distingue une suppression suivie d'une insertion qui laisse les comptes inchangés
+    last_changes = [
+        CustomUser.objects.aggregate(last_id=Max('id'), last=Max('updated_at')),
+        ScholarshipApplication.objects.aggregate(last_id=Max('id'), last=Max('updated_at')),
+        StudentDocument.objects.aggregate(last_id=Max('id'), last=Max('verified_at')),
+    ]
+    payload = json.dumps([timezone.localdate(), totals, series, last_changes], default=str, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def collect_report_data(generated_by=None):
+    """Données du rapport complet: totaux comptés en direct, activité lue dans les snapshots + delta du jour"""
+    totals = current_totals()
+    series = load_series(RECENT_ACTIVITY_DAYS)
+    total_documents = totals['documents']
+    verified_documents = totals['documents_verified']
+
+    documents_by_type = {}
+    for doc_type, doc_name in StudentDocument.DOCUMENT_TYPE_CHOICES:
+        count = totals['documents_by_type'].get(doc_type, 0)
+        percentage = (count / total_documents * 100) if total_documents > 0 else 0
+        documents_by_type[doc_type] = {
+            'name': doc_name,
+            'count': count,
+            'percentage': round(percentage, 2)
+        }
+
+    applications_by_status = {
+        status: totals['applications_by_status'].get(status, 0)
+        for status, _ in ScholarshipApplication.APPLICATION_STATUS_CHOICES
+    }
+
+    # Top étudiants: documents vérifiés comptés dans la même requête (plus de N+1)
+    top_students = CustomUser.objects.filter(
+        user_type='student',
+        documents__isnull=False
+    ).annotate(
+        doc_count=Count('documents'),
+        verified_count=Count('documents', filter=Q(documents__is_verified=True))
+    ).order_by('-doc_count').values('username', 'first_name', 'last_name', 'doc_count', 'verified_count')[:10]
+
+    top_students_data = [{
+        'username': student['username'],
+        'full_name': f"{student['first_name']} {student['last_name']}".strip(),
+        'document_count': student['doc_count'],
+        'verified_count': student['verified_count']
+    } for student in top_students]
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'generated_by': generated_by.username if generated_by else None,
+        'period': 'all_time',
+        'summary': {
+            'total_users': totals['users'],
+            'total_students': totals['students'],
+            'total_admins': totals['admins'],
+            'total_documents': total_documents,
+            'verified_documents': verified_documents,
+            'unverified_documents': total_documents - verified_documents,
+            'verification_rate': (verified_documents / total_documents * 100) if total_documents > 0 else 0,
+            'total_applications': totals['applications'],
+        },
+        'detailed_analytics': {
+            'documents_by_type': documents_by_type,
+            'applications_by_status': applications_by_status,
+            'recent_activity': {
+                'new_users': sum(counts['new_users'] for _, counts in series),
+                'new_documents': sum(counts['documents_uploaded'] for _, counts in series),
+                'documents_verified': sum(counts['documents_verified'] for _, counts in series),
+                'applications_submitted': sum(counts['applications_submitted'] for _, counts in series),
+            },
+            'top_students': top_students_data,
+            'system_health': {
+                'database_status': 'Operational',
+                'storage_usage': 'Normal',
+                'performance': 'Optimal'
+            }
+        }
+    }
+
+
+def write_full_report(job, path):
+    report_data = collect_report_data(job.requested_by)
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump({
+            'report_id': f"report_{job.pk}",
+            'generated_at': report_data['generated_at'],
+            'data': report_data
+        }, output, ensure_ascii=False, indent=2)
+
+
+def student_detail_rows():
+    """Une ligne par étudiant, lue par paquets (curseur serveur sous PostgreSQL)"""
+    students = CustomUser.objects.filter(user_type='student').annotate(
+        document_count=Count('documents', distinct=True),
+        verified_count=Count('documents', filter=Q(documents__is_verified=True), distinct=True),
+        application_count=Count('applications', distinct=True)
+    ).order_by('last_name', 'first_name', 'id').values_list(
+        'username', 'first_name', 'last_name', 'email', 'date_joined',
+        'document_count', 'verified_count', 'application_count'
+    )
+    for username, first_name, last_name, email, date_joined, documents, verified, applications in \
+            students.iterator(chunk_size=REPORT_CHUNK_SIZE):
+        yield (
+            f"{first_name} {last_name}".strip() or username, email, format_date(date_joined),
+            documents, verified, applications
+        )
+
+
+def application_detail_rows():
+    """Une ligne par demande de bourse, lue par paquets"""
+    type_labels = dict(ScholarshipApplication.SCHOLARSHIP_TYPES)
+    status_labels = dict(ScholarshipApplication.APPLICATION_STATUS_CHOICES)
+    applications = ScholarshipApplication.objects.order_by(
+        'student__last_name', 'student__first_name', 'created_at'
+    ).values_list(
+        'student__first_name', 'student__last_name', 'title', 'scholarship_type', 'status',
+        'amount_requested', 'final_amount', 'submitted_at'
+    )
+    for first_name, last_name, title, scholarship_type, status, amount, final_amount, submitted_at in \
+            applications.iterator(chunk_size=REPORT_CHUNK_SIZE):
+        yield (
+            f"{first_name} {last_name}".strip(), title,
+            type_labels.get(scholarship_type, scholarship_type), status_labels.get(status, status),
+            format_amount(amount), format_amount(final_amount), format_date(submitted_at)
+        )
+
+
+def write_pdf_report(job, path):
+    report_data = collect_report_data(job.requested_by)
+    summary = report_data['summary']
+    analytics = report_data['detailed_analytics']
+
+    pdf = ChunkedPDFWriter(path, "Rapport CampusBourses")
+    try:
+        pdf.heading("Rapport CampusBourses", size=18)
+        generated_by = job.requested_by.get_full_name() if job.requested_by else ''
+        pdf.paragraph(f"Généré le: {timezone.localtime().strftime('%d/%m/%Y à %H:%M')}")
+        pdf.paragraph(f"Généré par: {generated_by}")
+        pdf.spacer()
+
+        # Statistiques
+        pdf.heading("Statistiques Générales")
+        pdf.key_values([
+            ('Utilisateurs totaux', summary['total_users']),
+            ('Étudiants', summary['total_students']),
+            ('Documents totaux', summary['total_documents']),
+            ('Documents vérifiés', summary['verified_documents']),
+            ('Taux de vérification', f"{summary['verification_rate']:.1f}%"),
+            ('Demandes de bourse', summary['total_applications']),
+        ])
+
+        # Documents par type
+        pdf.heading("Documents par Type")
+        pdf.table(
+            [('Type de document', 250), ('Quantité', 120)],
+            ((entry['name'], entry['count']) for entry in analytics['documents_by_type'].values())
+        )
+
+        # Demandes par statut
+        status_labels = dict(ScholarshipApplication.APPLICATION_STATUS_CHOICES)
+        pdf.heading("Demandes par Statut")
+        pdf.table(
+            [('Statut', 250), ('Quantité', 120)],
+            ((status_labels[status], count) for status, count in analytics['applications_by_status'].items())
+        )
+
+        # Détail par étudiant
+        pdf.heading("Détail par Étudiant")
+        pdf.table(
+            [('Étudiant', 130), ('Email', 150), ('Inscription', 65),
+             ('Documents', 55), ('Vérifiés', 55), ('Demandes', 60)],
+            student_detail_rows()
+        )
+
+        # Détail par demande
+        pdf.heading("Détail des Demandes")
+        pdf.table(
+            [('Étudiant', 100), ('Titre', 115), ('Type', 80), ('Statut', 65),
+             ('Demandé', 55), ('Accordé', 50), ('Soumise', 50)],
+            application_detail_rows()
+        )
+    finally:
+        pdf.close()
+
+
+REPORT_WRITERS = {
+    'full': (write_full_report, 'json', "Rapport généré"),
+    'pdf': (write_pdf_report, 'pdf', "Rapport PDF généré"),
+}
+
+
+def run_job(job):
+    """Exécute un job réservé par ReportJob.claim_next() et enregistre le fichier produit"""
+    writer, extension, notification_title = REPORT_WRITERS[job.report_type]
+    fd, path = tempfile.mkstemp(suffix=f'.{extension}')
+    os.close(fd)
+    try:
+        # Lectures seules: sur la réplique si elle est configurée et à jour
+        with replica_reads():
+            writer(job, path)
+        filename = f"rapport_campusbourses_{job.pk}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        with open(path, 'rb') as report_file:
+            job.file.save(filename, File(report_file), save=False)
+    except Exception as e:
+        logger.error(f"Report job {job.pk} failed: {str(e)}")
+        job.status = 'failed'
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+    finally:
+        os.remove(path)
+
+    job.status = 'completed'
+    job.error = ''
+    job.finished_at = timezone.now()
+    requested_by = job.requested_by
+    with transaction.atomic():
+        job.save(update_fields=['status', 'file', 'error', 'finished_at'])
+        record_admin_event(
+            notification_type='system_alert',
+            title=notification_title,
+            message=f"{job.get_report_type_display()} généré pour {requested_by.username if requested_by else 'le système'}",
+            related_user=requested_by
+        )
+    logger.info(f"Report job {job.pk} ({job.report_type}) completed in {job.finished_at - job.started_at}")
+    return job
+
+
+def run_pending_jobs(max_jobs=None):
+    """Traite les jobs en attente; retourne le nombre de jobs exécutés"""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = ReportJob.claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
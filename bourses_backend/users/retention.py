@@ -0,0 +1,199 @@
+# users/retention.py
+"""
+Rétention des notifications (commande `python manage.py prune_notifications`).
+
+- Durées de conservation par table et par état de lecture
+  (settings.BOURSES_NOTIFICATION_RETENTION_DAYS, None = conserver).
+- Suppression par petites plages de clés, une transaction courte par
+  plage, pour ne jamais verrouiller longtemps les tables chaudes.
+- Archivage optionnel des lignes supprimées en JSONL compressé (gzip).
+- Regroupement optionnel des alertes système répétées (même titre, même
+  jour) en une seule ligne de synthèse.
+"""
+import gzip
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AdminNotification, NotificationEvent, StudentNotification
+
+logger = logging.getLogger(__name__)
+
+PRUNE_BATCH_SIZE = 1000
+
+
+@dataclass
+class RetentionPolicy:
+    name: str
+    model: type
+    # (clé de BOURSES_NOTIFICATION_RETENTION_DAYS, condition) par état
+    rules: list
+    archive: bool = True
+    date_field: str = 'created_at'
+
+    def expired(self, now):
+        """Condition des lignes à supprimer, ou None si aucune règle n'est active"""
+        retention_days = settings.BOURSES_NOTIFICATION_RETENTION_DAYS
+        condition = None
+        for key, rule in self.rules:
+            days = retention_days.get(key)
+            if days is None:
+                continue
+            rule = rule & Q(**{f'{self.date_field}__lt': now - timedelta(days=days)})
+            condition = rule if condition is None else condition | rule
+        return condition
+
+
+POLICIES = [
+    # Notifications admin lues: dépassées par le curseur d'au moins un admin
+    RetentionPolicy('admin_notifications', AdminNotification, [
+        ('admin_read', Q(AdminNotification.read_by_any_admin())),
+        ('admin_unread', ~Q(AdminNotification.read_by_any_admin())),
+    ]),
+    RetentionPolicy('student_notifications', StudentNotification, [
+        ('student_read', Q(is_read=True)),
+        ('student_unread', Q(is_read=False)),
+    ]),
+    # Événements de l'outbox déjà dispatchés: copies des notifications, pas d'archive
+    RetentionPolicy('notification_events', NotificationEvent, [
+        ('outbox_dispatched', Q(dispatched_at__isnull=False)),
+    ], archive=False),
+]
+
+
+@dataclass
+class PruneResult:
+    deleted: dict = field(default_factory=dict)
+    archives: list = field(default_factory=list)
+    collapsed: int = 0
+
+
+class JSONLArchive:
+    """Fichier JSONL gzip ouvert au premier enregistrement écrit"""
+
+    def __init__(self, name, now):
+        self.path = os.path.join(
+            settings.BOURSES_NOTIFICATION_ARCHIVE_DIR,
+            f"{name}_{now.strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+        )
+        self.file = None
+        self.rows = 0
+
+    def write(self, rows):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+        for row in rows:
+            self.file.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            self.file.write('\n')
+        # Les lignes sont sur disque avant la suppression de la plage
+        self.file.flush()
+        self.rows += len(rows)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def prune_policy(policy, now, batch_size=PRUNE_BATCH_SIZE, archive=True, dry_run=False):
+    """
+    Supprime (et archive) les lignes expirées d'une politique, plage de clés
+    par plage de clés. Retourne (nombre de lignes, chemin de l'archive ou None).
+    """
+    condition = policy.expired(now)
+    if condition is None:
+        return 0, None
+    expired = policy.model.objects.filter(condition)
+    if dry_run:
+        return expired.count(), None
+
+    bounds = expired.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0, None
+
+    fields = [f.attname for f in policy.model._meta.concrete_fields]
+    writer = JSONLArchive(policy.name, now) if archive and policy.archive else None
+    deleted = 0
+    try:
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            with transaction.atomic():
+                batch = expired.filter(pk__gte=start, pk__lt=start + batch_size)
+                if writer is not None:
+                    rows = list(batch.values(*fields))
+                    if not rows:
+                        continue
+                    writer.write(rows)
+                    batch = policy.model.objects.filter(pk__in=[row['id'] for row in rows])
+                count, _ = batch.delete()
+                deleted += count
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return deleted, writer.path if writer is not None and writer.rows else None
+
+
+def collapse_system_alerts(now, older_than_days=None, dry_run=False):
+    """
+    Remplace les alertes système répétées (même titre, même jour, antérieures
+    à `older_than_days`) par une ligne de synthèse. Retourne le nombre de
+    lignes supprimées.
+    """
+    if older_than_days is None:
+        older_than_days = settings.BOURSES_COLLAPSE_ALERTS_AFTER_DAYS
+    alerts = AdminNotification.objects.filter(
+        notification_type='system_alert',
+        created_at__lt=now - timedelta(days=older_than_days)
+    )
+    groups = alerts.annotate(day=TruncDate('created_at')).values('title', 'day').annotate(
+        count=Count('id'), last_id=Max('id')
+    ).filter(count__gt=1).order_by('day', 'title')
+
+    removed = 0
+    for group in groups:
+        if dry_run:
+            removed += group['count'] - 1
+            continue
+        with transaction.atomic():
+            repeated = alerts.filter(title=group['title'], created_at__date=group['day'])
+            # La plus récente devient la synthèse: lue par un admin seulement si
+            # son curseur l'a dépassée, donc s'il a lu toutes les autres
+            summary = AdminNotification.objects.get(pk=group['last_id'])
+            summary.message = (
+                f"{group['count']} alertes « {group['title']} » le {group['day'].strftime('%d/%m/%Y')}. "
+                f"Dernière: {summary.message}"
+            )
+            summary.save(update_fields=['message'])
+            count, _ = repeated.exclude(pk=summary.pk).delete()
+            removed += count
+    return removed
+
+
+def prune_notifications(batch_size=PRUNE_BATCH_SIZE, archive=True, collapse=False, dry_run=False):
+    """Applique toutes les politiques de rétention; retourne un PruneResult"""
+    now = timezone.now()
+    result = PruneResult()
+
+    if collapse:
+        result.collapsed = collapse_system_alerts(now, dry_run=dry_run)
+
+    for policy in POLICIES:
+        deleted, archive_path = prune_policy(policy, now, batch_size, archive, dry_run)
+        result.deleted[policy.name] = deleted
+        if archive_path:
+            result.archives.append(archive_path)
+
+    logger.info(
+        f"Notification retention{' (dry run)' if dry_run else ''}: deleted {result.deleted}, "
+        f"collapsed {result.collapsed}, archives {result.archives}"
+    )
+    return result
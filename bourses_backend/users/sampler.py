@@ -0,0 +1,158 @@
+# users/sampler.py
+"""
+Échantillonnage des ressources système pour la page d'administration
+(`get_system_info`). Un thread d'arrière-plan, démarré au premier appel,
+relève toutes les BOURSES_SYSTEM_SAMPLE_INTERVAL secondes le CPU, la
+mémoire, l'espace disque de MEDIA_ROOT, l'état et la latence de la base,
+et conserve les derniers relevés dans un tampon circulaire: la vue répond
+sans attendre aucune mesure.
+
+Sans psutil, CPU et mémoire valent None (l'espace disque et la base
+restent mesurés avec la bibliothèque standard et Django).
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PSUTIL_AVAILABLE = psutil is not None
+
+logger = logging.getLogger(__name__)
+
+# Seuils (en %) au-delà desquels le statut passe à 'warning'
+CPU_WARNING = 80
+MEMORY_WARNING = 80
+STORAGE_WARNING = 90
+
+
+def existing_path(path):
+    """Premier dossier existant en remontant depuis `path` (disk_usage exige un chemin existant)"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def check_database(alias='default'):
+    """(disponible, latence en ms) d'un aller-retour SELECT 1"""
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        return True, round((time.perf_counter() - started) * 1000, 2)
+    except Exception as e:
+        logger.warning(f"System sampler: database check failed: {e}")
+        return False, None
+
+
+def take_sample():
+    """Relevé instantané (aucune mesure bloquante: cpu_percent sans intervalle)"""
+    cpu = memory = None
+    if psutil is not None:
+        cpu = round(psutil.cpu_percent(interval=None), 1)
+        memory = round(psutil.virtual_memory().percent, 1)
+
+    try:
+        disk = shutil.disk_usage(existing_path(settings.MEDIA_ROOT))
+        storage = round(disk.used / disk.total * 100, 1) if disk.total else None
+        storage_free = disk.free
+    except OSError:
+        storage = storage_free = None
+
+    database, db_latency_ms = check_database()
+
+    warning = (
+        not database
+        or (cpu is not None and cpu >= CPU_WARNING)
+        or (memory is not None and memory >= MEMORY_WARNING)
+        or (storage is not None and storage >= STORAGE_WARNING)
+    )
+    return {
+        'timestamp': timezone.now().isoformat(),
+        'cpu': cpu,
+        'memory': memory,
+        'storage': storage,
+        'storage_free_bytes': storage_free,
+        'load_average': list(os.getloadavg()) if hasattr(os, 'getloadavg') else None,
+        'database': database,
+        'db_latency_ms': db_latency_ms,
+        'status': 'warning' if warning else 'healthy',
+    }
+
+
+class SystemSampler:
+    def __init__(self, interval=None, history=None):
+        self.interval = interval if interval is not None else settings.BOURSES_SYSTEM_SAMPLE_INTERVAL
+        self.samples = deque(maxlen=history if history is not None else settings.BOURSES_SYSTEM_SAMPLE_HISTORY)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def record(self):
+        sample = take_sample()
+        with self.lock:
+            self.samples.append(sample)
+        return sample
+
+    def run(self):
+        # cpu_percent(interval=None) compare au relevé précédent: le premier sert de référence
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.record()
+            except Exception:
+                logger.exception("System sampler: sample failed")
+            finally:
+                # Connexion propre au thread: ne pas la garder ouverte entre deux relevés
+                connections.close_all()
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name='bourses-system-sampler', daemon=True)
+            self.thread.start()
+        logger.info(f"System sampler started (every {self.interval}s)")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def latest(self):
+        """(dernier relevé, historique du plus ancien au plus récent)"""
+        with self.lock:
+            history = list(self.samples)
+        if not history:
+            # Premier appel: relevé immédiat (non bloquant) dans la requête
+            history = [self.record()]
+        return history[-1], history
+
+
+sampler = SystemSampler()
+
+
+def system_status():
+    """Dernier relevé et historique; démarre l'échantillonnage si nécessaire"""
+    if settings.BOURSES_SYSTEM_SAMPLER:
+        sampler.start()
+    return sampler.latest()
@@ -0,0 +1,309 @@
+# users/seeding.py
+"""
+Génération de données synthétiques réalistes (commande `python manage.py
+seed_bourses`, benchmarks/seed.py): étudiants, administrateurs, documents
+avec de vrais petits fichiers PDF, demandes couvrant tous les statuts et
+notifications, datés sur les `days` derniers jours.
+
+Les lignes sont insérées par bulk_create, une transaction par paquet
+d'étudiants. Les fichiers sont écrits en parallèle par un pool de processus
+pendant que le processus principal insère les paquets suivants.
+"""
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import AdminNotification, CustomUser, ScholarshipApplication, StudentDocument, StudentNotification
+
+logger = logging.getLogger(__name__)
+
+SEED_BATCH_SIZE = 5000
+# Étudiants par transaction (et par lot de fichiers envoyé au pool)
+STUDENT_CHUNK = 1000
+MIN_FILE_SIZE = 2048
+MAX_FILE_SIZE = 16 * 1024
+
+
+class SeedError(ValueError):
+    """Paramètres de génération invalides"""
+
+
+@dataclass
+class SeedResult:
+    counts: dict = field(default_factory=dict)
+    files: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows(self):
+        return sum(self.counts.values())
+
+
+def seed_pdf(title, size):
+    """PDF d'une page contenant `title`, complété par un commentaire jusqu'à exactement `size` octets"""
+    text = title.encode('ascii', 'replace').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    stream = b'BT /F1 14 Tf 72 760 Td (' + text + b') Tj ET'
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+
+    def build(padding):
+        out = bytearray(b'%PDF-1.4\n%' + b'0' * padding + b'\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(out)
+
+    # La longueur de startxref dépend du remplissage: quelques ajustements suffisent
+    padding = 0
+    for _ in range(4):
+        pdf = build(padding)
+        if len(pdf) == size or len(pdf) > size and padding == 0:
+            break
+        padding = max(0, padding + size - len(pdf))
+    return pdf
+
+
+def write_seed_files(media_root, specs):
+    """Écrit les fichiers (chemin relatif, titre, taille); retourne leur nombre"""
+    directories = set()
+    for relative_path, title, size in specs:
+        path = os.path.join(media_root, relative_path)
+        directory = os.path.dirname(path)
+        if directory not in directories:
+            os.makedirs(directory, exist_ok=True)
+            directories.add(directory)
+        with open(path, 'wb') as f:
+            f.write(seed_pdf(title, size))
+    return len(specs)
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Désactive auto_now/auto_now_add: les dates fournies sont conservées"""
+    saved = []
+    for model in models:
+        for model_field in model._meta.concrete_fields:
+            if getattr(model_field, 'auto_now', False) or getattr(model_field, 'auto_now_add', False):
+                saved.append((model_field, model_field.auto_now, model_field.auto_now_add))
+                model_field.auto_now = model_field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for model_field, auto_now, auto_now_add in saved:
+            model_field.auto_now, model_field.auto_now_add = auto_now, auto_now_add
+
+
+class Generator:
+    """État d'une génération: aléa reproductible, comptes, administrateurs"""
+
+    def __init__(self, prefix, password, days, random_seed, batch_size):
+        self.prefix = prefix
+        self.password = make_password(password)  # un seul hachage pour tous les comptes
+        self.now = timezone.now()
+        self.days = days
+        self.rng = random.Random(random_seed)
+        self.batch_size = batch_size
+        self.result = SeedResult()
+        self.admin_ids = []
+        self.document_types = [code for code, _ in StudentDocument.DOCUMENT_TYPE_CHOICES]
+        self.statuses = [code for code, _ in ScholarshipApplication.APPLICATION_STATUS_CHOICES]
+        self.scholarship_types = [code for code, _ in ScholarshipApplication.SCHOLARSHIP_TYPES]
+        self.student_notification_types = [code for code, _ in StudentNotification.NOTIFICATION_TYPES]
+
+    def insert(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.result.counts[model.__name__] = self.result.counts.get(model.__name__, 0) + len(objects)
+        return created
+
+    def past(self, after=None):
+        """Date aléatoire dans la fenêtre, postérieure à `after`"""
+        start = after or self.now - timedelta(days=self.days)
+        return start + (self.now - start) * self.rng.random()
+
+    def users(self, kind, start, count, **fields):
+        users = []
+        for i in range(start, start + count):
+            joined = self.past()
+            users.append(CustomUser(
+                username=f'{self.prefix}_{kind}_{i}', password=self.password, email=f'{kind}{i}@{self.prefix}.local',
+                first_name=kind.capitalize(), last_name=str(i), date_joined=joined, created_at=joined,
+                updated_at=joined, **fields
+            ))
+        return self.insert(CustomUser, users)
+
+    def students_chunk(self, start, count, documents, applications, notifications, admin_notifications,
+                       write_files):
+        """Insère un paquet d'étudiants et leurs données; retourne les fichiers à écrire"""
+        students = self.users('student', start, count, user_type='student')
+        rng = self.rng
+        files = []
+
+        docs = []
+        for student in students:
+            for n in range(documents):
+                uploaded = self.past(student.date_joined)
+                verified = rng.random() < 0.6
+                doc_type = self.document_types[n % len(self.document_types)]
+                path = f'student_documents/seed/{self.prefix}/{student.pk % 1000:03d}/{student.pk}_{n}.pdf'
+                size = rng.randint(MIN_FILE_SIZE, MAX_FILE_SIZE)
+                docs.append(StudentDocument(
+                    student=student, document_type=doc_type, file=path,
+                    original_filename=f'{doc_type}_{n + 1}.pdf', file_size=size, uploaded_at=uploaded,
+                    is_verified=verified, verified_by_id=rng.choice(self.admin_ids) if verified else None,
+                    verified_at=self.past(uploaded) if verified else None,
+                ))
+                if write_files:
+                    files.append((path, f'{student.username} - {doc_type}', size))
+        docs = self.insert(StudentDocument, docs)
+
+        apps = []
+        for index, student in enumerate(students):
+            for n in range(applications):
+                # Tous les statuts sont représentés, dans des proportions égales
+                status = self.statuses[(start + index + n) % len(self.statuses)]
+                created = self.past(student.date_joined)
+                submitted = self.past(created) if status != 'draft' else None
+                reviewed = self.past(submitted) if status not in ('draft', 'submitted') else None
+                amount = Decimal(rng.randrange(500, 8000, 50))
+                apps.append(ScholarshipApplication(
+                    student=student, scholarship_type=rng.choice(self.scholarship_types),
+                    title=f'Demande de bourse {n + 1}', description="Demande générée (seed_bourses).",
+                    amount_requested=amount, status=status, submitted_at=submitted, reviewed_at=reviewed,
+                    reviewed_by_id=rng.choice(self.admin_ids) if reviewed else None,
+                    decision_date=reviewed if status in ('approved', 'rejected') else None,
+                    final_amount=amount * Decimal('0.8') if status == 'approved' else None,
+                    decision_notes="Pièces complémentaires demandées." if status == 'needs_info' else '',
+                    created_at=created, updated_at=reviewed or submitted or created,
+                ))
+        apps = self.insert(ScholarshipApplication, apps)
+
+        # Pièces jointes aux demandes (table de liaison, sans passer par .add())
+        documents_by_student = {}
+        for document in docs:
+            documents_by_student.setdefault(document.student_id, []).append(document)
+        through = ScholarshipApplication.required_documents.through
+        links = [
+            through(scholarshipapplication_id=application.pk, studentdocument_id=document.pk)
+            for application in apps if application.pk and application.status != 'draft'
+            for document in documents_by_student.get(application.student_id, []) if document.pk
+        ]
+        self.insert(through, links)
+
+        apps_by_student = {}
+        for application in apps:
+            apps_by_student.setdefault(application.student_id, []).append(application)
+        notes = []
+        for student in students:
+            student_docs = documents_by_student.get(student.pk, [])
+            student_apps = apps_by_student.get(student.pk, [])
+            for n in range(notifications):
+                notification_type = rng.choice(self.student_notification_types)
+                related_document = rng.choice(student_docs) if notification_type.startswith('document') and student_docs else None
+                related_application = rng.choice(student_apps) if notification_type.startswith('application') and student_apps else None
+                created = self.past(student.date_joined)
+                read = rng.random() < 0.7
+                notes.append(StudentNotification(
+                    student=student, notification_type=notification_type, title=f'Notification {n + 1}',
+                    message="Votre dossier a été mis à jour.", is_important=rng.random() < 0.1,
+                    related_document=related_document if related_document and related_document.pk else None,
+                    related_application=related_application if related_application and related_application.pk else None,
+                    is_read=read, read_at=self.past(created) if read else None, created_at=created,
+                ))
+        self.insert(StudentNotification, notes)
+
+        alerts = []
+        for _ in range(admin_notifications):
+            document = rng.choice(docs) if docs else None
+            alerts.append(AdminNotification(
+                notification_type='document_upload', title="Nouveau document uploadé",
+                message="Document généré (seed_bourses).",
+                related_document=document if document is not None and document.pk else None,
+                related_user_id=document.student_id if document is not None else None,
+                created_at=document.uploaded_at if document is not None else self.past(),
+            ))
+        self.insert(AdminNotification, alerts)
+        return files
+
+
+def seed_bourses(students=1000, admins=5, documents=3, applications=2, notifications=5, admin_notifications=None,
+                 days=365, prefix='seed', password='seed-pass', random_seed=42, write_files=True, workers=None,
+                 batch_size=SEED_BATCH_SIZE, progress=None):
+    """
+    Génère le jeu de données; retourne un SeedResult. `admin_notifications`
+    (défaut: une par étudiant) est réparti entre les paquets; `progress`
+    est appelé avec (étudiants insérés, total) après chaque paquet.
+    """
+    if CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+        raise SeedError(f"Des comptes « {prefix}_* » existent déjà: choisir un autre préfixe")
+    if admins < 1 and (documents or applications):
+        raise SeedError("Au moins un administrateur est nécessaire pour les vérifications et décisions")
+    if admin_notifications is None:
+        admin_notifications = students
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    generator = Generator(prefix, password, days, random_seed, batch_size)
+    timestamped = (CustomUser, StudentDocument, ScholarshipApplication, StudentNotification, AdminNotification)
+    pending = []
+    pool = None
+    if write_files and workers > 1:
+        # Les processus enfants n'utilisent pas la base; fermer les connexions avant le fork
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+    try:
+        with explicit_timestamps(*timestamped):
+            with transaction.atomic():
+                generator.admin_ids = [
+                    admin.pk for admin in generator.users('admin', 0, admins, user_type='admin', is_staff=True)
+                ]
+            for start in range(0, students, STUDENT_CHUNK):
+                count = min(STUDENT_CHUNK, students - start)
+                share = admin_notifications * (start + count) // students - admin_notifications * start // students
+                with transaction.atomic():
+                    files = generator.students_chunk(start, count, documents, applications, notifications, share,
+                                                     write_files)
+                if files:
+                    if pool is not None:
+                        pending.append(pool.submit(write_seed_files, settings.MEDIA_ROOT, files))
+                    else:
+                        generator.result.files += write_seed_files(settings.MEDIA_ROOT, files)
+                if progress is not None:
+                    progress(start + count, students)
+        generator.result.files += sum(future.result() for future in pending)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    result = generator.result
+    result.seconds = time.perf_counter() - started
+    logger.info(f"Seeded {result.rows} rows and {result.files} files in {result.seconds:.1f}s (prefix {prefix})")
+    return result
+
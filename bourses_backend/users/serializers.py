@@ -1,16 +1,53 @@
 # users/serializers.py - Version corrigée
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import CustomUser, EligibilityRule, StudentDocument, AdminNotification, ScholarshipApplication, StudentNotification
+from django.db import connection
+from django.db.models import Max, Q
+from django.urls import reverse
+from .models import CustomUser, EligibilityRule, StudentDocument, AdminNotification, ScholarshipApplication, StudentNotification, ReportJob, MaintenanceJob
+from .broadcasts import AUDIENCES, BROADCAST_NOTIFICATION_TYPES
+from .maintenance import maintenance_tables
+from .instrumentation import timed
+from .timeformat import TIME_FORMAT_ISO, get_time_format, response_now, time_ago
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """
+    Rendu des objets compté dans la phase 'serialize' de la requête
+    (InstrumentationMiddleware), comme les serializers de liste rapides.
+    """
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+class TimeAgoMixin:
+    """
+    Champ time_ago partagé: `now` est calculé une seule fois par réponse
+    (mémorisé dans le contexte du serializer racine). En mode 'iso' le champ
+    est retiré et le client calcule la durée à partir de l'en-tête X-Server-Now.
+    """
+    detailed_time_ago = False
+
+    def get_time_format(self):
+        return self.context.get('time_format') or get_time_format(self.context.get('request'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.get_time_format() == TIME_FORMAT_ISO:
+            fields.pop('time_ago', None)
+        return fields
+
+    def get_time_ago(self, obj):
+        return time_ago(obj.created_at, response_now(self.context), self.detailed_time_ago)
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 
                  'user_type', 'phone_number', 'date_of_birth', 'is_active')
         read_only_fields = ('id', 'is_active')
 
-class UserCreateSerializer(serializers.ModelSerializer):
+class UserCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6, style={'input_type': 'password'})
     email = serializers.EmailField(required=True)
     
@@ -34,7 +71,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Cet email est déjà utilisé.")
         return value
 
-class EligibilityRuleSerializer(serializers.ModelSerializer):
+class EligibilityRuleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     
     class Meta:
@@ -43,7 +80,7 @@ class EligibilityRuleSerializer(serializers.ModelSerializer):
                  'is_active', 'created_by', 'created_by_name', 'created_at', 'updated_at')
         read_only_fields = ('id', 'created_by', 'created_at', 'updated_at')
 
-class StudentDocumentSerializer(serializers.ModelSerializer):
+class StudentDocumentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.get_full_name', read_only=True)
     file_size_display = serializers.CharField(source='get_file_size_display', read_only=True)
     verified_by_name = serializers.CharField(source='verified_by.get_full_name', read_only=True)
@@ -55,7 +92,7 @@ class StudentDocumentSerializer(serializers.ModelSerializer):
                  'uploaded_at', 'is_verified', 'verified_by', 'verified_by_name', 'verified_at')
         read_only_fields = ('id', 'student', 'original_filename', 'file_size', 'uploaded_at')
 
-class DocumentUploadSerializer(serializers.ModelSerializer):
+class DocumentUploadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentDocument
         fields = ('document_type', 'file')
@@ -88,38 +125,24 @@ class DocumentUploadSerializer(serializers.ModelSerializer):
         except Exception as e:
             raise serializers.ValidationError(f"Erreur lors de la création du document: {str(e)}")
 
-class AdminNotificationSerializer(serializers.ModelSerializer):
+class AdminNotificationSerializer(TimeAgoMixin, TimedSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='related_user.get_full_name', read_only=True)
     document_type_display = serializers.CharField(source='related_document.get_document_type_display', read_only=True)
     time_ago = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
     
     class Meta:
         model = AdminNotification
         fields = ('id', 'notification_type', 'title', 'message', 'student_name', 
                  'document_type_display', 'is_read', 'created_at', 'time_ago', 
                  'related_document_id', 'related_user_id')
-    
-    def get_time_ago(self, obj):
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        now = timezone.now()
-        diff = now - obj.created_at
-        
-        if diff < timedelta(minutes=1):
-            return "À l'instant"
-        elif diff < timedelta(hours=1):
-            minutes = int(diff.total_seconds() / 60)
-            return f"Il y a {minutes} min"
-        elif diff < timedelta(days=1):
-            hours = int(diff.total_seconds() / 3600)
-            return f"Il y a {hours} h"
-        else:
-            days = diff.days
-            return f"Il y a {days} j"
+
+    def get_is_read(self, obj):
+        # État de lecture de l'admin courant (curseur passé dans le contexte)
+        return obj.created_at <= self.context['last_seen_at']
 
 # Serializers pour les demandes de bourse
-class ScholarshipApplicationSerializer(serializers.ModelSerializer):
+class ScholarshipApplicationSerializer(TimeAgoMixin, TimedSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.get_full_name', read_only=True)
     scholarship_type_display = serializers.CharField(source='get_scholarship_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -141,26 +164,7 @@ class ScholarshipApplicationSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'student', 'created_at', 'updated_at', 'submitted_at', 
                           'reviewed_at', 'decision_date', 'reviewed_by')
 
-    def get_time_ago(self, obj):
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        now = timezone.now()
-        diff = now - obj.created_at
-        
-        if diff < timedelta(minutes=1):
-            return "À l'instant"
-        elif diff < timedelta(hours=1):
-            minutes = int(diff.total_seconds() / 60)
-            return f"Il y a {minutes} min"
-        elif diff < timedelta(days=1):
-            hours = int(diff.total_seconds() / 3600)
-            return f"Il y a {hours} h"
-        else:
-            days = diff.days
-            return f"Il y a {days} j"
-
-class ScholarshipApplicationCreateSerializer(serializers.ModelSerializer):
+class ScholarshipApplicationCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ScholarshipApplication
         fields = ('scholarship_type', 'title', 'description', 'amount_requested')
@@ -183,7 +187,8 @@ class ScholarshipApplicationCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Le montant demandé est trop élevé")
         return value
 
-class StudentNotificationSerializer(serializers.ModelSerializer):
+class StudentNotificationSerializer(TimeAgoMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    detailed_time_ago = True
     icon = serializers.CharField(source='get_icon', read_only=True)
     time_ago = serializers.SerializerMethodField()
     document_type_display = serializers.CharField(source='related_document.get_document_type_display', read_only=True)
@@ -199,30 +204,118 @@ class StudentNotificationSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('id', 'created_at')
 
-    def get_time_ago(self, obj):
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        now = timezone.now()
-        diff = now - obj.created_at
-        
-        if diff < timedelta(minutes=1):
-            return "À l'instant"
-        elif diff < timedelta(hours=1):
-            minutes = int(diff.total_seconds() / 60)
-            return f"Il y a {minutes} min"
-        elif diff < timedelta(days=1):
-            hours = int(diff.total_seconds() / 3600)
-            return f"Il y a {hours} h"
-        else:
-            days = diff.days
-            if days == 1:
-                return "Hier"
-            elif days < 7:
-                return f"Il y a {days} jours"
-            elif days < 30:
-                weeks = days // 7
-                return f"Il y a {weeks} sem"
-            else:
-                months = days // 30
-                return f"Il y a {months} mois"
\ No newline at end of file
+class ReportJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = (
+            'id', 'report_type', 'report_type_display', 'status', 'status_display',
+            'error', 'attempts', 'created_at', 'started_at', 'finished_at',
+            'status_url', 'download_url'
+        )
+        read_only_fields = fields
+
+    def get_status_url(self, obj):
+        return reverse('report_job_status', args=[obj.pk])
+
+    def get_download_url(self, obj):
+        if obj.status != 'completed':
+            return None
+        return reverse('download_report', args=[obj.pk])
+
+class MaintenanceJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.IntegerField(read_only=True)
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MaintenanceJob
+        fields = (
+            'id', 'status', 'status_display', 'tables', 'analyze',
+            'tables_total', 'tables_done', 'current_table', 'progress', 'report',
+            'error', 'attempts', 'created_at', 'started_at', 'finished_at', 'status_url'
+        )
+        read_only_fields = fields
+
+    def get_status_url(self, obj):
+        return reverse('maintenance_job_status', args=[obj.pk])
+
+class MaintenanceRequestSerializer(serializers.Serializer):
+    """Paramètres d'une maintenance (voir users/maintenance.py): tables (défaut: toutes) et ANALYZE"""
+    tables = serializers.ListField(child=serializers.CharField(max_length=200), required=False, default=list)
+    analyze = serializers.BooleanField(default=True)
+
+    def validate_tables(self, tables):
+        unknown = sorted(set(tables) - set(maintenance_tables(connection)))
+        if unknown:
+            raise serializers.ValidationError(f"Tables inconnues: {', '.join(unknown)}")
+        return tables
+
+class BroadcastSerializer(serializers.Serializer):
+    """Paramètres d'une diffusion de notifications (voir users/broadcasts.py)"""
+    audience = serializers.ChoiceField(choices=list(AUDIENCES.items()))
+    notification_type = serializers.ChoiceField(choices=BROADCAST_NOTIFICATION_TYPES, default='system_alert')
+    title = serializers.CharField(max_length=200)
+    message = serializers.CharField()
+    is_important = serializers.BooleanField(default=False)
+    document_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=StudentDocument.DOCUMENT_TYPE_CHOICES),
+        required=False,
+        allow_empty=False
+    )
+
+class MarkReadSerializer(serializers.Serializer):
+    """
+    Notifications à marquer comme lues en un seul UPDATE: liste d'`ids`, ou
+    borne haute (`up_to_created_at`, `up_to_id`) de la notification la plus
+    récente affichée, avec l'ordre des listes (created_at puis id).
+    """
+    MAX_IDS = 500
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False,
+                                allow_empty=False, max_length=MAX_IDS)
+    up_to_created_at = serializers.DateTimeField(required=False)
+    up_to_id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        has_bound = 'up_to_created_at' in attrs or 'up_to_id' in attrs
+        if 'ids' in attrs and has_bound:
+            raise serializers.ValidationError("Indiquez soit ids, soit une borne up_to_created_at / up_to_id")
+        if 'ids' not in attrs and not has_bound:
+            raise serializers.ValidationError("Indiquez ids, up_to_created_at ou up_to_id")
+        return attrs
+
+    def selection(self, queryset):
+        """Notifications désignées dans `queryset`, lues ou non"""
+        data = self.validated_data
+        if 'ids' in data:
+            return queryset.filter(pk__in=data['ids'])
+
+        created_at = data.get('up_to_created_at')
+        up_to_id = data.get('up_to_id')
+        if created_at is None:
+            # Les ids croissent avec la date de création
+            return queryset.filter(pk__lte=up_to_id)
+        if up_to_id is None:
+            return queryset.filter(created_at__lte=created_at)
+        return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lte=up_to_id))
+
+    def filter(self, queryset):
+        """Notifications non lues sélectionnées dans `queryset`"""
+        return self.selection(queryset.filter(is_read=False))
+
+    def seen_at(self, queryset):
+        """
+        Date de création de la notification existante la plus récente
+        désignée (pour un curseur de lecture). Jamais la date envoyée par le
+        client: une date future marquerait d'avance les notifications à venir.
+        """
+        return self.selection(queryset).aggregate(last=Max('created_at'))['last']
+
+    async def aseen_at(self, queryset):
+        """Version asynchrone de seen_at()"""
+        return (await self.selection(queryset).aaggregate(last=Max('created_at')))['last']
@@ -0,0 +1,228 @@
+# users/snapshots.py
+"""
+Rollup quotidien des statistiques (DailySnapshot).
+
+Les snapshots ne servent qu'aux séries par jour: les jours passés sont lus
+dans la table (une ligne par jour), le jour en cours est calculé sur les
+tables sources avec des filtres de date indexés. Les totaux et répartitions
+actuels (statut des demandes, documents vérifiés, lignes supprimées depuis)
+sont comptés en direct par current_totals(), un GROUP BY indexé par table:
+un snapshot fige l'état du jour où il a été calculé.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CustomUser, StudentDocument, ScholarshipApplication, DailySnapshot
+
+logger = logging.getLogger(__name__)
+
+COUNT_FIELDS = (
+    'new_users', 'new_students', 'new_admins',
+    'documents_uploaded', 'documents_verified',
+    'applications_created', 'applications_submitted',
+)
+BREAKDOWN_FIELDS = ('documents_by_type', 'applications_by_type', 'applications_by_status')
+
+# Fenêtre recalculée par défaut par rollup_snapshots, pour rattraper les
+# changements tardifs (vérifications, changements de statut, suppressions)
+DEFAULT_REFRESH_DAYS = 35
+
+
+def empty_counts():
+    counts = dict.fromkeys(COUNT_FIELDS, 0)
+    for field in BREAKDOWN_FIELDS:
+        counts[field] = {}
+    return counts
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_range(start, end):
+    day = start
+    while day < end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _count_by_day(queryset, date_field, start, end, group_field=None):
+    """Comptes par jour (et par group_field) sur l'intervalle [start, end)"""
+    queryset = queryset.filter(**{
+        f'{date_field}__gte': day_start(start),
+        f'{date_field}__lt': day_start(end),
+    })
+    fields = ('day', group_field) if group_field else ('day',)
+    return queryset.annotate(day=TruncDate(date_field)).order_by().values(*fields).annotate(count=Count('id'))
+
+
+def compute_days(start, end):
+    """Compteurs de chaque jour de [start, end), en six requêtes GROUP BY quelle que soit la durée"""
+    days = {}
+
+    def bucket(day):
+        if day not in days:
+            days[day] = empty_counts()
+        return days[day]
+
+    for row in _count_by_day(CustomUser.objects.all(), 'date_joined', start, end, 'user_type'):
+        counts = bucket(row['day'])
+        counts['new_users'] += row['count']
+        if row['user_type'] == 'student':
+            counts['new_students'] += row['count']
+        elif row['user_type'] == 'admin':
+            counts['new_admins'] += row['count']
+
+    for row in _count_by_day(StudentDocument.objects.all(), 'uploaded_at', start, end, 'document_type'):
+        counts = bucket(row['day'])
+        counts['documents_uploaded'] += row['count']
+        counts['documents_by_type'][row['document_type']] = row['count']
+
+    for row in _count_by_day(StudentDocument.objects.filter(is_verified=True), 'verified_at', start, end):
+        bucket(row['day'])['documents_verified'] += row['count']
+
+    applications = ScholarshipApplication.objects.all()
+    for row in _count_by_day(applications, 'created_at', start, end, 'scholarship_type'):
+        counts = bucket(row['day'])
+        counts['applications_created'] += row['count']
+        counts['applications_by_type'][row['scholarship_type']] = row['count']
+
+    for row in _count_by_day(applications, 'created_at', start, end, 'status'):
+        bucket(row['day'])['applications_by_status'][row['status']] = row['count']
+
+    for row in _count_by_day(applications, 'submitted_at', start, end):
+        bucket(row['day'])['applications_submitted'] += row['count']
+
+    return days
+
+
+def first_activity_date():
+    """Premier jour contenant des données, ou None si les tables sont vides"""
+    candidates = [
+        CustomUser.objects.aggregate(first=Min('date_joined'))['first'],
+        StudentDocument.objects.aggregate(first=Min('uploaded_at'))['first'],
+        ScholarshipApplication.objects.aggregate(first=Min('created_at'))['first'],
+    ]
+    candidates = [value for value in candidates if value is not None]
+    if not candidates:
+        return None
+    return timezone.localtime(min(candidates)).date()
+
+
+def rollup(start=None, end=None):
+    """
+    Recalcule les snapshots des jours [start, end). `end` vaut par défaut
+    aujourd'hui: le jour en cours n'est jamais figé. Idempotent, les lignes
+    existantes de l'intervalle sont remplacées. Retourne le nombre de jours écrits.
+    """
+    end = end or timezone.localdate()
+    if start is None:
+        start = first_activity_date() or end
+    if start >= end:
+        return 0
+
+    days = compute_days(start, end)
+    snapshots = [DailySnapshot(date=day, **days.get(day, empty_counts())) for day in date_range(start, end)]
+
+    with transaction.atomic():
+        DailySnapshot.objects.filter(date__gte=start, date__lt=end).delete()
+        DailySnapshot.objects.bulk_create(snapshots)
+
+    logger.info(f"Daily snapshots rolled up from {start} to {end} ({len(snapshots)} days)")
+    return len(snapshots)
+
+
+def ensure_rolled_up():
+    """
+    Complète les jours manquants jusqu'à hier, si rollup_snapshots n'a pas
+    tourné. Appelé par run_report_worker, jamais pendant une requête web.
+    """
+    today = timezone.localdate()
+    last = DailySnapshot.objects.aggregate(last=Max('date'))['last']
+    if last is None:
+        start = first_activity_date()
+    else:
+        start = last + timedelta(days=1)
+
+    if start is None or start >= today:
+        return 0
+    try:
+        return rollup(start, today)
+    except IntegrityError:
+        # Rollup concurrent (autre requête ou commande): les lignes existent déjà
+        return 0
+
+
+def snapshot_counts(snapshot):
+    counts = {field: getattr(snapshot, field) for field in COUNT_FIELDS}
+    for field in BREAKDOWN_FIELDS:
+        counts[field] = dict(getattr(snapshot, field))
+    return counts
+
+
+def current_totals():
+    """
+    État actuel des tables, en trois requêtes GROUP BY couvertes par les index
+    (user_type; document_type, is_verified; status, scholarship_type).
+    """
+    totals = {
+        'users': 0, 'students': 0, 'admins': 0,
+        'documents': 0, 'documents_verified': 0, 'documents_by_type': {},
+        'applications': 0, 'applications_by_type': {}, 'applications_by_status': {},
+    }
+
+    for row in CustomUser.objects.order_by().values('user_type').annotate(count=Count('id')):
+        totals['users'] += row['count']
+        if row['user_type'] == 'student':
+            totals['students'] += row['count']
+        elif row['user_type'] == 'admin':
+            totals['admins'] += row['count']
+
+    documents = StudentDocument.objects.order_by().values('document_type', 'is_verified').annotate(count=Count('id'))
+    for row in documents:
+        totals['documents'] += row['count']
+        if row['is_verified']:
+            totals['documents_verified'] += row['count']
+        by_type = totals['documents_by_type']
+        by_type[row['document_type']] = by_type.get(row['document_type'], 0) + row['count']
+
+    applications = ScholarshipApplication.objects.order_by().values('status', 'scholarship_type').annotate(count=Count('id'))
+    for row in applications:
+        totals['applications'] += row['count']
+        for field, key in (('applications_by_status', row['status']), ('applications_by_type', row['scholarship_type'])):
+            totals[field][key] = totals[field].get(key, 0) + row['count']
+
+    return totals
+
+
+def load_series(days=30):
+    """
+    Compteurs de chacun des `days` derniers jours (aujourd'hui inclus). Lecture
+    seule: les jours sans snapshot (rollup_snapshots pas encore passé) et le
+    jour en cours sont calculés sur les tables sources, rien n'est écrit.
+    """
+    today = timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+    start = today - timedelta(days=days - 1)
+
+    series = {
+        snapshot.date: snapshot_counts(snapshot)
+        for snapshot in DailySnapshot.objects.filter(date__gte=start, date__lt=today)
+    }
+    missing = [day for day in date_range(start, tomorrow) if day not in series]
+    # Toujours au moins le jour en cours; six GROUP BY quel que soit le nombre de jours manquants
+    computed = compute_days(missing[0], tomorrow)
+    for day in missing:
+        series[day] = computed.get(day, empty_counts())
+
+    return [(day, series[day]) for day in date_range(start, tomorrow)]
+
+
+def sum_series(series, field, start, end=None):
+    """Somme d'un compteur sur les jours [start, end) de la série"""
+    return sum(counts[field] for day, counts in series if day >= start and (end is None or day < end))
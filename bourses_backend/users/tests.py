@@ -1,3 +1,1896 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib.util
+import json
+import os
+import re
+import runpy
+import shutil
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, router as db_router, transaction
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .async_views import ASYNC_VIEWS, use_async_views
+from .authentication import StatelessJWTAuthentication, jwt_enabled, tokens_for_user
+from .lean_serializers import LeanApplicationSerializer, LeanDocumentSerializer, LeanStudentNotificationSerializer
+from .broadcasts import audience_queryset, broadcast
+from . import metrics as app_metrics
+from .instrumentation import collect_metrics, current_metrics, timed
+from .maintenance import (MaintenanceError, maintenance_tables, run_job as run_maintenance_job, run_maintenance,
+                          run_pending_jobs as run_pending_maintenance)
+from .metrics import Registry
+from .exports import export_dataset, pk_ranges, temporary_export_path
+from .models import (CustomUser, StudentDocument, ScholarshipApplication, StudentNotification, AdminNotification,
+                     AdminNotificationCursor, ReportJob, DailySnapshot, EligibilityRule, NotificationEvent, MaintenanceJob)
+from .outbox import dispatch_batch, dispatch_pending, notifications_dispatched, record_admin_event, record_student_event
+from . import renderers, replicas, urls as users_urls
+from .replicas import replica_configured as original_replica_configured, replica_reads, request_scope
+from .retention import collapse_system_alerts, prune_notifications
+from .sampler import SystemSampler, take_sample
+from .seeding import SeedError, seed_bourses
+from .renderers import FastJSONParser, FastJSONRenderer
+from .reports import application_detail_rows, collect_report_data, data_fingerprint, run_job, student_detail_rows
+from .snapshots import current_totals, day_start, load_series
+from .serializers import StudentDocumentSerializer, ScholarshipApplicationSerializer, StudentNotificationSerializer
+from .timeformat import SERVER_NOW_HEADER, time_ago
+
+# Âges couvrant toutes les branches de time_ago
+AGES = [timedelta(seconds=10), timedelta(minutes=5), timedelta(hours=3), timedelta(days=1),
+        timedelta(days=3), timedelta(days=10), timedelta(days=70)]
+
+
+class TemporaryMediaMixin:
+    """MEDIA_ROOT temporaire pour toute la classe: les fichiers de test ne restent pas dans media/"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls.media_override.disable()
+            shutil.rmtree(cls.media_root, ignore_errors=True)
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls.media_override.disable()
+            shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+class BoursesDataMixin(TemporaryMediaMixin):
+    """Jeu de données couvrant tous les types, statuts et âges (fichiers dans un MEDIA_ROOT temporaire)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            username='admin', password='pw', user_type='admin', first_name='Sami', last_name='Trabelsi'
+        )
+        cls.student = CustomUser.objects.create_user(
+            username='etudiant', password='pw', first_name='Amina', last_name=''
+        )
+        cls.now = timezone.now()
+
+        document_types = [code for code, _ in StudentDocument.DOCUMENT_TYPE_CHOICES]
+        for i, document_type in enumerate(document_types):
+            document = StudentDocument(
+                student=cls.student,
+                document_type=document_type,
+                original_filename=f'piece_{i}.pdf',
+                file_size=[512, 2048, 5 * 1024 * 1024][i % 3],
+                is_verified=bool(i % 2),
+                verified_by=cls.admin if i % 2 else None,
+                verified_at=cls.now if i % 2 else None,
+            )
+            document.file.save(f'piece_{i}.pdf', ContentFile(b'%PDF-1.4'), save=False)
+            document.save()
+            StudentDocument.objects.filter(pk=document.pk).update(uploaded_at=cls.now - AGES[i])
+
+        statuses = [code for code, _ in ScholarshipApplication.APPLICATION_STATUS_CHOICES]
+        types = [code for code, _ in ScholarshipApplication.SCHOLARSHIP_TYPES]
+        for i, status in enumerate(statuses):
+            application = ScholarshipApplication.objects.create(
+                student=cls.student,
+                scholarship_type=types[i],
+                title=f'Demande {i}',
+                amount_requested=Decimal('1500.5') + i,
+                final_amount=Decimal('1200') if status == 'approved' else None,
+                status=status,
+                reviewed_by=cls.admin if status in ('approved', 'rejected') else None,
+            )
+            ScholarshipApplication.objects.filter(pk=application.pk).update(created_at=cls.now - AGES[i])
+
+        documents = list(StudentDocument.objects.all())
+        applications = list(ScholarshipApplication.objects.all())
+        for i, age in enumerate(AGES):
+            notification = StudentNotification.objects.create(
+                student=cls.student,
+                notification_type=[code for code, _ in StudentNotification.NOTIFICATION_TYPES][i],
+                title=f'Notification {i}',
+                message='Message',
+                related_document=documents[i % len(documents)] if i % 3 == 0 else None,
+                related_application=applications[i % len(applications)] if i % 3 == 1 else None,
+                is_read=bool(i % 2),
+            )
+            StudentNotification.objects.filter(pk=notification.pk).update(created_at=cls.now - age)
+
+    def assertParity(self, serializer_class, lean_class, queryset, **context):
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            expected = serializer_class(queryset, many=True, context=context).data
+            actual = lean_class(request=context.get('request')).serialize_queryset(queryset)
+        self.assertEqual(len(actual), queryset.count())
+        self.assertEqual([dict(row) for row in expected], actual)
+        # Même ordre de clés, pour un JSON identique octet par octet
+        self.assertEqual([list(row) for row in expected], [list(row) for row in actual])
+
+
+class LeanSerializerParityTests(BoursesDataMixin, TestCase):
+    """Les serializers de liste rapides doivent produire exactement la même sortie que DRF"""
+
+    def test_application_parity(self):
+        self.assertParity(
+            ScholarshipApplicationSerializer, LeanApplicationSerializer,
+            ScholarshipApplication.objects.order_by('-created_at')
+        )
+
+    def test_document_parity(self):
+        self.assertParity(
+            StudentDocumentSerializer, LeanDocumentSerializer,
+            StudentDocument.objects.order_by('-uploaded_at')
+        )
+
+    def test_document_parity_with_request(self):
+        request = APIRequestFactory().get('/api/users/v2/documents/')
+        self.assertParity(
+            StudentDocumentSerializer, LeanDocumentSerializer,
+            StudentDocument.objects.order_by('-uploaded_at'), request=request
+        )
+
+    def test_student_notification_parity(self):
+        self.assertParity(
+            StudentNotificationSerializer, LeanStudentNotificationSerializer,
+            StudentNotification.objects.order_by('-created_at')
+        )
+
+    def test_list_endpoints_use_lean_path(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+
+        response = client.get('/api/users/applications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), ScholarshipApplication.objects.count())
+
+        response = client.get('/api/users/student/notifications/')
+        self.assertEqual(response.data['unread_count'], StudentNotification.objects.filter(is_read=False).count())
+        self.assertEqual(len(response.data['recent']), len(AGES))
+
+
+class PermissionTests(BoursesDataMixin, TestCase):
+    """Classes de permission (users/permissions.py): rôles et objets limités à leur propriétaire"""
+
+    ADMIN_ROUTES = ['/api/users/all/', '/api/users/admin/stats/', '/api/users/admin/documents/',
+                    '/api/users/admin/applications/']
+    STUDENT_ROUTES = ['/api/users/applications/', '/api/users/student/stats/']
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = CustomUser.objects.create_user(username='autre', password='pw', first_name='Youssef')
+        cls.other_document = StudentDocument(student=cls.other, document_type='identity', original_filename='cin.pdf',
+                                             file_size=8)
+        cls.other_document.file.save('cin.pdf', ContentFile(b'%PDF-1.4'), save=False)
+        cls.other_document.save()
+        cls.other_application = ScholarshipApplication.objects.create(
+            student=cls.other, scholarship_type='merit', title='Demande autre',
+            amount_requested=Decimal('900'), status='draft'
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def test_student_on_admin_routes(self):
+        client = self.client_for(self.student)
+        for url in self.ADMIN_ROUTES:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 403)
+        document = self.student.documents.first()
+        response = client.post(f'/api/users/admin/documents/{document.pk}/verify/')
+        self.assertEqual(response.status_code, 403)
+        response = client.post('/api/users/v2/eligibility-rules/', {'name': 'Règle'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_on_student_routes(self):
+        client = self.client_for(self.admin)
+        for url in self.STUDENT_ROUTES:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(str(response.data['detail']), "Accès réservé aux étudiants")
+        response = client.post(f'/api/users/v2/applications/{self.other_application.pk}/submit/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ScholarshipApplication.objects.get(pk=self.other_application.pk).status, 'draft')
+
+    def test_other_students_objects_are_not_found(self):
+        client = self.client_for(self.student)
+        document, application = self.other_document.pk, self.other_application.pk
+        requests = [
+            ('get', f'/api/users/documents/download/{document}/'),
+            ('get', f'/api/users/v2/documents/{document}/'),
+            ('get', f'/api/users/v2/documents/{document}/download/'),
+            ('delete', f'/api/users/documents/delete/{document}/'),
+            ('get', f'/api/users/applications/{application}/'),
+            ('put', f'/api/users/applications/{application}/'),
+            ('delete', f'/api/users/applications/{application}/'),
+            ('post', f'/api/users/applications/{application}/submit/'),
+            ('get', f'/api/users/v2/applications/{application}/'),
+            ('patch', f'/api/users/v2/applications/{application}/'),
+        ]
+        for method, url in requests:
+            with self.subTest(method=method, url=url):
+                response = getattr(client, method)(url, {'title': 'Modifiée'}, format='json')
+                self.assertEqual(response.status_code, 404)
+
+        # Rien n'a changé, et la liste ne montre que les objets de l'étudiant
+        self.assertTrue(StudentDocument.objects.filter(pk=document).exists())
+        application = ScholarshipApplication.objects.get(pk=application)
+        self.assertEqual((application.title, application.status), ('Demande autre', 'draft'))
+        response = client.get('/api/users/v2/applications/')
+        self.assertNotIn(application.pk, [row['id'] for row in response.data['results']])
+
+    def test_owner_and_admin_reach_the_objects(self):
+        for user in (self.other, self.admin):
+            client = self.client_for(user)
+            with self.subTest(user=user.username):
+                response = client.get(f'/api/users/applications/{self.other_application.pk}/')
+                self.assertEqual(response.status_code, 200)
+                response = client.get(f'/api/users/documents/download/{self.other_document.pk}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4')
+
+    def test_anonymous_requests(self):
+        client = self.client_for(None)
+        expected = 401 if jwt_enabled() else 403
+        urls = self.ADMIN_ROUTES + self.STUDENT_ROUTES + [
+            f'/api/users/applications/{self.other_application.pk}/',
+            f'/api/users/documents/download/{self.other_document.pk}/',
+            '/api/users/v2/documents/',
+            '/api/users/v2/eligibility-rules/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, expected)
+
+
+class ViewSetTests(BoursesDataMixin, TestCase):
+    """API paginée /api/users/v2/ (users/viewsets.py) et anciennes routes non paginées"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_paginated_response_shape(self):
+        total = ScholarshipApplication.objects.count()
+        response = self.client.get('/api/users/v2/applications/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'count', 'next', 'previous', 'results'})
+        self.assertEqual(response.data['count'], total)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+        self.assertIn('page=2', response.data['next'])
+        self.assertIn('page_size=2', response.data['next'])
+
+        last_page = (total + 1) // 2
+        response = self.client.get('/api/users/v2/applications/', {'page_size': 2, 'page': last_page})
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+        self.assertEqual(len(response.data['results']), total - 2 * (last_page - 1))
+
+        # Pages disjointes, dans l'ordre de la liste complète
+        pages = [self.client.get('/api/users/v2/applications/', {'page_size': 2, 'page': page}).data['results']
+                 for page in range(1, last_page + 1)]
+        full = self.client.get('/api/users/v2/applications/').data['results']
+        self.assertEqual([row['id'] for page in pages for row in page], [row['id'] for row in full])
+
+        response = self.client.get('/api/users/v2/applications/', {'page': last_page + 1, 'page_size': 2})
+        self.assertEqual(response.status_code, 404)
+
+    def test_field_filters(self):
+        response = self.client.get('/api/users/v2/applications/', {'status': 'draft'})
+        self.assertEqual([row['status'] for row in response.data['results']], ['draft'])
+
+        for value, expected in (('true', True), ('non', False)):
+            with self.subTest(is_verified=value):
+                response = self.client.get('/api/users/v2/documents/', {'is_verified': value})
+                rows = response.data['results']
+                self.assertEqual(len(rows), StudentDocument.objects.filter(is_verified=expected).count())
+                self.assertTrue(all(row['is_verified'] is expected for row in rows))
+
+        response = self.client.get('/api/users/v2/documents/', {'document_type': 'academic', 'is_verified': 'false'})
+        self.assertEqual(response.data['count'], StudentDocument.objects.filter(
+            document_type='academic', is_verified=False).count())
+
+        # Les paramètres hors filter_fields sont ignorés
+        response = self.client.get('/api/users/v2/notifications/', {'title': 'inconnu'})
+        self.assertEqual(response.data['count'], len(AGES))
+
+    def test_aliases_are_not_paginated(self):
+        for i, is_active in enumerate((True, True, False)):
+            EligibilityRule.objects.create(title=f'Règle {i}', description='Critère', rule_type='financial',
+                                           criteria={'max': 1000}, is_active=is_active, created_by=self.admin)
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        cases = [
+            (self.client, '/api/users/documents/', StudentDocument.objects.count()),
+            (self.client, '/api/users/applications/', ScholarshipApplication.objects.count()),
+            (self.client, '/api/users/eligibility-rules/', EligibilityRule.objects.filter(is_active=True).count()),
+            (admin, '/api/users/admin/documents/', StudentDocument.objects.count()),
+            (admin, '/api/users/admin/applications/', ScholarshipApplication.objects.count()),
+        ]
+        for client, url, count in cases:
+            with self.subTest(url=url):
+                response = client.get(url, {'page_size': 1})
+                self.assertEqual(response.status_code, 200)
+                self.assertIsInstance(response.data, list)
+                self.assertEqual(len(response.data), count)
+
+    def test_action_permissions(self):
+        document = self.student.documents.first()
+        response = self.client.post(f'/api/users/v2/documents/{document.pk}/verify/')
+        self.assertEqual(response.status_code, 403)
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        response = admin.post(f'/api/users/v2/documents/{document.pk}/verify/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(StudentDocument.objects.get(pk=document.pk).is_verified)
+
+        # Création réservée aux étudiants, lecture des règles ouverte à tous les comptes
+        response = admin.post('/api/users/v2/applications/', {'title': 'Admin'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get('/api/users/v2/eligibility-rules/').status_code, 200)
+        self.assertEqual(self.client.post('/api/users/v2/eligibility-rules/', {}, format='json').status_code, 403)
+
+    def test_scoped_throttle(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with mock.patch.object(ScopedRateThrottle, 'THROTTLE_RATES', {'bourses_api': '2/min'}):
+            statuses = [self.client.get('/api/users/v2/notifications/').status_code for _ in range(3)]
+            self.assertEqual(statuses, [200, 200, 429])
+            # Compteur par utilisateur: un autre compte n'est pas limité
+            admin = APIClient()
+            admin.force_authenticate(self.admin)
+            self.assertEqual(admin.get('/api/users/v2/eligibility-rules/').status_code, 200)
+
+
+class RendererTests(TestCase):
+    """FastJSONRenderer/FastJSONParser (users/renderers.py): mêmes octets que JSONRenderer de DRF"""
+
+    def payload(self):
+        moment = datetime(2026, 3, 14, 9, 26, 53, 589793, tzinfo=dt_timezone.utc)
+        return {
+            'montant': Decimal('1500.50'),
+            'montants': [Decimal('0.10'), Decimal('-12'), Decimal('1E+3')],
+            'utc': moment,
+            'utc_rond': moment.replace(microsecond=0),
+            'local': moment.astimezone(dt_timezone(timedelta(hours=1))),
+            'naif': moment.replace(tzinfo=None),
+            'date': moment.date(),
+            'heure': moment.time(),
+            'duree': timedelta(minutes=90),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'paresseux': gettext_lazy("Accès réservé aux étudiants"),
+            'texte': 'Bourse au Mérite – مرحبا \u2028 \u2029 "guillemets"',
+            'imbrique': {'vide': [], 'nul': None, 'vrai': True, 'reel': 1.25, 'entier': 2 ** 40},
+            7: 'clé entière',
+        }
+
+    def assertSameBytes(self):
+        data = self.payload()
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), JSONRenderer().render(None))
+
+    @skipIf(renderers.orjson is None, "orjson non installé")
+    def test_orjson_matches_drf(self):
+        self.assertTrue(renderers.use_orjson())
+        self.assertSameBytes()
+
+    def test_stdlib_matches_drf(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertFalse(renderers.use_orjson())
+            self.assertSameBytes()
+        with override_settings(BOURSES_JSON_BACKEND='stdlib'):
+            self.assertFalse(renderers.use_orjson())
+            self.assertSameBytes()
+
+    def test_parser_round_trip(self):
+        body = FastJSONRenderer().render(self.payload())
+        for backend in (renderers.orjson, None):
+            with self.subTest(orjson=backend is not None), mock.patch.object(renderers, 'orjson', backend):
+                self.assertEqual(FastJSONParser().parse(BytesIO(body)), json.loads(body))
+                with self.assertRaises(ParseError):
+                    FastJSONParser().parse(BytesIO(b'{"montant": '))
+
+    def test_exports_keep_decimal_strings(self):
+        self.assertEqual(renderers.dumps({'montant': Decimal('1500.50')}), b'{"montant":"1500.50"}')
+
+    def test_browsable_api_dropped_in_production(self):
+        for env, browsable in (('production', False), ('development', True)):
+            with self.subTest(env=env), mock.patch.dict(os.environ, {'BOURSES_ENV': env}):
+                module = runpy.run_path(importlib.util.find_spec('bourses_backend.settings').origin)
+                renderer_classes = module['REST_FRAMEWORK']['DEFAULT_RENDERER_CLASSES']
+                self.assertEqual(renderer_classes[0], 'users.renderers.FastJSONRenderer')
+                self.assertEqual('rest_framework.renderers.BrowsableAPIRenderer' in renderer_classes, browsable)
+
+
+class TimeFormatTests(BoursesDataMixin, TestCase):
+    """Mode 'iso': horodatages seuls, heure serveur dans X-Server-Now, réponses cachables"""
+
+    def test_time_ago_formats(self):
+        self.assertEqual(time_ago(self.now - timedelta(minutes=5), self.now), "Il y a 5 min")
+        self.assertEqual(time_ago(self.now - timedelta(days=1), self.now), "Il y a 1 j")
+        self.assertEqual(time_ago(self.now - timedelta(days=1), self.now, detailed=True), "Hier")
+
+    def test_iso_mode_parity(self):
+        request = APIRequestFactory().get('/api/users/v2/notifications/', {'time_format': 'iso'})
+        context = {'request': request}
+        self.assertParity(
+            StudentNotificationSerializer, LeanStudentNotificationSerializer,
+            StudentNotification.objects.order_by('-created_at'), **context
+        )
+        data = StudentNotificationSerializer(StudentNotification.objects.all(), many=True, context=context).data
+        self.assertTrue(all('time_ago' not in row for row in data))
+
+    @override_settings(BOURSES_TIME_FORMAT='iso')
+    def test_iso_mode_responses_are_cacheable(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+
+        first = client.get('/api/users/student/notifications/')
+        self.assertIn(SERVER_NOW_HEADER, first)
+        self.assertNotIn('time_ago', first.data['recent'][0])
+
+        second = client.get('/api/users/student/notifications/')
+        self.assertEqual(first.content, second.content)
+
+        cached = client.get('/api/users/v2/applications/', HTTP_IF_NONE_MATCH=client.get('/api/users/v2/applications/')['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+
+class ReportJobTests(BoursesDataMixin, TestCase):
+    """Rapports générés par le worker, réutilisés tant que les données ne changent pas"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_report_data_queries_do_not_depend_on_history(self):
+        collect_report_data(self.admin)
+        # Totaux actuels (3 GROUP BY), snapshots de la fenêtre, jours manquants (6 GROUP BY), top étudiants
+        with self.assertNumQueries(11):
+            data = collect_report_data(self.admin)
+        self.assertEqual(data['detailed_analytics']['top_students'][0]['verified_count'],
+                         StudentDocument.objects.filter(is_verified=True).count())
+
+    def test_full_report_job_lifecycle(self):
+        response = self.client.post('/api/users/admin/generate-report/')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job']['id']
+        self.assertEqual(response.data['job']['status'], 'pending')
+        # Mise en file en lecture seule: les snapshots manquants sont rattrapés par le worker
+        self.assertFalse(DailySnapshot.objects.exists())
+
+        call_command('run_report_worker', '--once', stdout=StringIO())
+        self.assertTrue(DailySnapshot.objects.exists())
+
+        response = self.client.get(f'/api/users/admin/reports/{job_id}/')
+        self.assertEqual(response.data['status'], 'completed')
+
+        response = self.client.get(f'/api/users/admin/reports/{job_id}/download/')
+        self.assertEqual(response.status_code, 200)
+        report = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(report['data']['summary']['total_documents'], StudentDocument.objects.count())
+
+        # Données inchangées: le fichier existant est réutilisé
+        response = self.client.post('/api/users/admin/generate-report/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['job']['id'], job_id)
+
+        StudentDocument.objects.create(
+            student=self.student, document_type='other', original_filename='nouveau.pdf', file_size=10
+        )
+        response = self.client.post('/api/users/admin/generate-report/')
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data['job']['id'], job_id)
+
+    def test_deletion_changes_fingerprint(self):
+        fingerprint = data_fingerprint()
+        self.assertEqual(data_fingerprint(), fingerprint)
+        # Demande ancienne, déjà figée dans les snapshots: seuls les comptes en direct la voient partir
+        call_command('rollup_snapshots', stdout=StringIO())
+        ScholarshipApplication.objects.order_by('created_at').first().delete()
+        self.assertNotEqual(data_fingerprint(), fingerprint)
+
+    def test_download_before_completion(self):
+        job, _ = ReportJob.enqueue('full', self.admin, data_fingerprint())
+        response = self.client.get(f'/api/users/admin/reports/{job.pk}/download/')
+        self.assertEqual(response.status_code, 409)
+
+
+class DailySnapshotTests(BoursesDataMixin, TestCase):
+    """Totaux actuels comptés en direct, séries lues dans les snapshots + delta du jour"""
+
+    def assertMatchesSourceTables(self, totals):
+        self.assertEqual(totals['users'], CustomUser.objects.count())
+        self.assertEqual(totals['students'], CustomUser.objects.filter(user_type='student').count())
+        self.assertEqual(totals['documents'], StudentDocument.objects.count())
+        self.assertEqual(totals['documents_verified'], StudentDocument.objects.filter(is_verified=True).count())
+        self.assertEqual(totals['applications'], ScholarshipApplication.objects.count())
+        for status, _ in ScholarshipApplication.APPLICATION_STATUS_CHOICES:
+            self.assertEqual(totals['applications_by_status'].get(status, 0),
+                             ScholarshipApplication.objects.filter(status=status).count())
+
+    def test_rollup_is_idempotent(self):
+        call_command('rollup_snapshots', stdout=StringIO())
+        first = list(DailySnapshot.objects.values_list('date', 'documents_uploaded', 'applications_by_type'))
+        call_command('rollup_snapshots', '--full', stdout=StringIO())
+        second = list(DailySnapshot.objects.values_list('date', 'documents_uploaded', 'applications_by_type'))
+        self.assertEqual(first, second)
+        # Le jour en cours n'est jamais figé
+        self.assertLess(DailySnapshot.objects.latest('date').date, timezone.localdate())
+
+    def test_series_matches_source_tables(self):
+        series = load_series(30)
+        # Lecture seule: les jours sans snapshot sont calculés, pas écrits
+        self.assertFalse(DailySnapshot.objects.exists())
+        self.assertEqual(series[-1][0], timezone.localdate())
+        week = StudentDocument.objects.filter(uploaded_at__gte=day_start(timezone.localdate() - timedelta(days=6)))
+        self.assertEqual(sum(counts['documents_uploaded'] for _, counts in series[-7:]), week.count())
+
+        call_command('rollup_snapshots', stdout=StringIO())
+        self.assertEqual(load_series(30), series)
+
+    def test_totals_follow_changes_after_rollup(self):
+        call_command('rollup_snapshots', stdout=StringIO())
+        self.assertMatchesSourceTables(current_totals())
+
+        # Changements postérieurs au rollup: statut d'une ancienne demande, suppressions
+        ScholarshipApplication.objects.exclude(status='approved').update(status='approved')
+        StudentDocument.objects.filter(is_verified=True).delete()
+        CustomUser.objects.create_user(username='nouveau', password='pw')
+        totals = current_totals()
+        self.assertMatchesSourceTables(totals)
+        self.assertEqual(totals['documents_verified'], 0)
+        self.assertEqual(totals['applications_by_status'], {'approved': ScholarshipApplication.objects.count()})
+
+    def test_analytics_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/users/admin/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overview']['total_documents'], StudentDocument.objects.count())
+        self.assertEqual(len(response.data['daily_activity']), 7)
+
+
+class PDFReportTests(BoursesDataMixin, TestCase):
+    """Rapport PDF écrit page par page à partir d'itérateurs"""
+
+    def test_pdf_report_job(self):
+        if importlib.util.find_spec('reportlab') is None:
+            self.skipTest("reportlab n'est pas installé")
+
+        job, _ = ReportJob.enqueue('pdf', self.admin, data_fingerprint())
+        job.mark_running()
+        run_job(job)
+        self.assertEqual(job.status, 'completed', job.error)
+        with job.file.open('rb') as report_file:
+            self.assertTrue(report_file.read(5).startswith(b'%PDF'))
+
+    def test_detail_rows_are_streamed(self):
+        rows = application_detail_rows()
+        self.assertFalse(isinstance(rows, (list, tuple)))
+        self.assertEqual(len(list(rows)), ScholarshipApplication.objects.count())
+        self.assertEqual(len(list(student_detail_rows())), CustomUser.objects.filter(user_type='student').count())
+
+
+class InlineExecutor:
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, function, iterable):
+        return [function(item) for item in iterable]
+
+
+class ExportPipelineTests(BoursesDataMixin, TestCase):
+    """Exports multi-format par plages de clés"""
+
+    def export(self, dataset, export_format, **kwargs):
+        path = temporary_export_path(export_format)
+        self.addCleanup(os.remove, path)
+        result = export_dataset(dataset, export_format, path, **kwargs)
+        return result, path
+
+    def test_pk_ranges_cover_all_keys(self):
+        ranges = pk_ranges(3, 20, 4)
+        self.assertEqual(ranges[0][0], 3)
+        self.assertEqual(ranges[-1][1], 21)
+        self.assertTrue(all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:])))
+
+    def test_split_csv_matches_single_range(self):
+        _, single = self.export('applications', 'csv')
+        # Pool remplacé par un exécuteur synchrone: la base de test n'est visible que de cette connexion
+        with mock.patch('users.exports.PARALLEL_MIN_ROWS', 0), \
+                mock.patch('users.exports.ProcessPoolExecutor', InlineExecutor), \
+                mock.patch('users.exports.connections'):
+            result, split = self.export('applications', 'csv', workers=2)
+        self.assertGreater(result.parts, 1)
+        with open(single, encoding='utf-8') as a, open(split, encoding='utf-8') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_notification_read_state_from_cursors(self):
+        notifications = [AdminNotification.objects.create(notification_type='system_alert', title=f'A{i}', message='m')
+                         for i in range(2)]
+        AdminNotificationCursor.advance(self.admin, notifications[0].created_at)
+        _, path = self.export('notifications', 'csv', filters={'is_read': True})
+        with open(path, encoding='utf-8') as export_file:
+            rows = list(csv.DictReader(export_file))
+        self.assertEqual([(row['ID'], row['Lu']) for row in rows], [(str(notifications[0].pk), 'Oui')])
+
+    def test_csv_keeps_legacy_columns(self):
+        result, path = self.export('documents', 'csv', filters={'is_verified': True})
+        with open(path, encoding='utf-8') as export_file:
+            rows = list(csv.reader(export_file))
+        self.assertEqual(rows[0], ['ID', 'Étudiant', 'Email étudiant', 'Type document', 'Nom fichier',
+                                   'Taille', 'Vérifié', 'Vérifié par', 'Date upload'])
+        self.assertEqual(result.rows, StudentDocument.objects.filter(is_verified=True).count())
+        self.assertTrue(all(row[6] == 'Oui' and row[7] == 'Sami Trabelsi' for row in rows[1:]))
+
+    def test_jsonl_is_typed(self):
+        _, path = self.export('applications', 'jsonl')
+        with open(path, encoding='utf-8') as export_file:
+            rows = [json.loads(line) for line in export_file]
+        self.assertEqual(len(rows), ScholarshipApplication.objects.count())
+        self.assertEqual(rows[0]['status'], ScholarshipApplication.objects.order_by('pk').first().status)
+        self.assertEqual(rows[0]['amount_requested'], '1500.50')
+
+    def test_columnar_formats(self):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            self.skipTest("pyarrow n'est pas installé")
+        _, path = self.export('applications', 'parquet')
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, ScholarshipApplication.objects.count())
+        self.assertEqual(str(table.schema.field('amount_requested').type), 'decimal128(10, 2)')
+
+        _, path = self.export('student_notifications', 'arrow')
+        with pyarrow.memory_map(path) as source:
+            self.assertEqual(pyarrow.ipc.open_file(source).read_all().num_rows, StudentNotification.objects.count())
+
+    def test_export_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/users/admin/export-data/', {'type': 'applications', 'status': 'approved'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(len(content.strip().splitlines()), 1 + ScholarshipApplication.objects.filter(status='approved').count())
+
+        response = client.get('/api/users/admin/export-data/', {'type': 'applications', 'export_format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/users/admin/export-data/', {'type': 'documents', 'uploaded_after': 'hier'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BroadcastTests(BoursesDataMixin, TestCase):
+    """Diffusion groupée de notifications étudiant"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.newcomer = CustomUser.objects.create_user(username='nouveau', password='pw')
+        CustomUser.objects.create_user(username='inactif', password='pw', is_active=False)
+
+    def test_audiences(self):
+        self.assertEqual(list(audience_queryset('all_students')), [self.student.pk, self.newcomer.pk])
+        self.assertEqual(list(audience_queryset('draft_applications')), [self.student.pk])
+        self.assertEqual(list(audience_queryset('missing_documents')), [self.newcomer.pk])
+        StudentDocument.objects.filter(student=self.student, document_type='financial').delete()
+        self.assertEqual(list(audience_queryset('missing_documents', ['financial'])),
+                         [self.student.pk, self.newcomer.pk])
+        self.assertEqual(list(audience_queryset('missing_documents', ['identity'])), [self.newcomer.pk])
+
+    def test_broadcast_inserts_in_batches(self):
+        before = StudentNotification.objects.count()
+        # 1 SAVEPOINT/BEGIN + 1 requête d'audience + 1 INSERT par lot + RELEASE
+        with self.assertNumQueries(5):
+            result = broadcast('all_students', 'deadline_reminder', 'Rappel', 'Date limite vendredi', batch_size=1)
+        self.assertEqual((result.recipients, result.batches), (2, 2))
+        self.assertEqual(StudentNotification.objects.count(), before + 2)
+        reminder = StudentNotification.objects.get(student=self.newcomer)
+        self.assertEqual((reminder.notification_type, reminder.is_read), ('deadline_reminder', False))
+        self.assertIsNotNone(reminder.created_at)
+
+    def test_broadcast_endpoint_and_command(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = '/api/users/admin/notifications/broadcast/'
+        response = client.post(url, {'audience': 'draft_applications', 'title': 'Brouillon',
+                                     'message': 'Pensez à soumettre'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['recipients'], 1)
+        self.assertTrue(StudentNotification.objects.filter(title='Brouillon', notification_type='system_alert').exists())
+
+        response = client.post(url, {'audience': 'all_students', 'notification_type': 'document_verified',
+                                     'title': 'x', 'message': 'y'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        client.force_authenticate(self.student)
+        self.assertEqual(client.post(url, {}, format='json').status_code, 403)
+
+        out = StringIO()
+        call_command('broadcast_notification', 'missing_documents', '--title', 'Pièces', '--message', 'Manquantes',
+                     '--document-type', 'identity', stdout=out)
+        self.assertIn('1 notification(s)', out.getvalue())
+        self.assertTrue(StudentNotification.objects.filter(student=self.newcomer, title='Pièces').exists())
+
+
+class NotificationOutboxTests(BoursesDataMixin, TestCase):
+    """Outbox des notifications et dispatcher par lots"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.document = StudentDocument.objects.filter(is_verified=False).first()
+
+    def test_view_records_event_and_dispatcher_creates_notification(self):
+        before = StudentNotification.objects.count()
+        response = self.client.post(f'/api/users/admin/documents/{self.document.pk}/verify/')
+        self.assertEqual(response.status_code, 200)
+        event = NotificationEvent.objects.get()
+        self.assertEqual((event.audience, event.student_id, event.notification_type),
+                         ('student', self.student.pk, 'document_verified'))
+        self.assertEqual(StudentNotification.objects.count(), before)
+
+        received = []
+        def receiver(sender, admin_notifications, student_notifications, **kwargs):
+            received.extend(student_notifications)
+        notifications_dispatched.connect(receiver)
+        self.addCleanup(notifications_dispatched.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(dispatch_pending(), 1)
+        self.assertEqual(StudentNotification.objects.count(), before + 1)
+        notification = StudentNotification.objects.latest('pk')
+        self.assertEqual((notification.notification_type, notification.related_document), ('document_verified', self.document))
+        self.assertTrue(notification.is_important)
+        self.assertEqual(received, [notification])
+        self.assertIsNotNone(NotificationEvent.objects.get().dispatched_at)
+        self.assertEqual(dispatch_pending(), 0)
+
+    def test_failed_write_records_nothing(self):
+        with mock.patch.object(ScholarshipApplication, 'save', side_effect=RuntimeError('panne')):
+            with self.assertRaises(RuntimeError):
+                client = APIClient()
+                client.force_authenticate(self.student)
+                client.post('/api/users/applications/', {
+                    'scholarship_type': 'merit', 'title': 'Nouvelle', 'description': 'd',
+                    'amount_requested': '100', 'academic_year': '2025-2026'
+                }, format='json')
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_dispatch_in_batches(self):
+        for i in range(5):
+            record_admin_event('system_alert', f'Alerte {i}', 'Message')
+        record_student_event(self.student, 'system_alert', 'Pour vous', 'Message')
+        before = AdminNotification.objects.count()
+        # Par lot: SAVEPOINT, SELECT, un INSERT par table concernée, UPDATE, RELEASE
+        with self.assertNumQueries(5):
+            self.assertEqual(dispatch_batch(batch_size=4), 4)
+        out = StringIO()
+        call_command('dispatch_notifications', '--once', '--batch-size', '4', stdout=out)
+        self.assertIn('2 notification(s)', out.getvalue())
+        self.assertEqual(AdminNotification.objects.count(), before + 5)
+        self.assertTrue(StudentNotification.objects.filter(title='Pour vous', student=self.student).exists())
+
+    @override_settings(BOURSES_NOTIFICATIONS_EAGER=True)
+    def test_eager_mode_dispatches_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/users/admin/documents/{self.document.pk}/reject/', {'reason': 'Illisible'})
+        self.assertEqual(response.status_code, 200)
+        notification = StudentNotification.objects.latest('pk')
+        self.assertEqual(notification.notification_type, 'document_rejected')
+        self.assertIn('Illisible', notification.message)
+        self.assertFalse(NotificationEvent.objects.filter(dispatched_at__isnull=True).exists())
+
+
+class NotificationRetentionTests(BoursesDataMixin, TestCase):
+    """Rétention, archivage et regroupement des notifications"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        patcher = override_settings(BOURSES_NOTIFICATION_ARCHIVE_DIR=self.archive_dir)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def test_policies_respect_age_and_read_state(self):
+        # Fixture: notifications de 10 s à 70 jours, une sur deux lue
+        expected = StudentNotification.objects.filter(is_read=False, created_at__lt=timezone.now() - timedelta(days=20))
+        expected_ids = set(expected.values_list('pk', flat=True))
+        self.assertTrue(expected_ids)
+        kept = StudentNotification.objects.count() - len(expected_ids)
+
+        retention = {'admin_read': None, 'admin_unread': None, 'student_read': None,
+                     'student_unread': 20, 'outbox_dispatched': None}
+        with override_settings(BOURSES_NOTIFICATION_RETENTION_DAYS=retention):
+            result = prune_notifications(batch_size=2)
+
+        self.assertEqual(result.deleted['student_notifications'], len(expected_ids))
+        self.assertEqual(StudentNotification.objects.count(), kept)
+        with gzip.open(result.archives[0], 'rt', encoding='utf-8') as archive:
+            archived = [json.loads(line) for line in archive]
+        self.assertEqual({row['id'] for row in archived}, expected_ids)
+        self.assertEqual(archived[0]['student_id'], self.student.pk)
+
+    def test_admin_read_state_comes_from_cursors(self):
+        notifications = [AdminNotification.objects.create(notification_type='system_alert', title=f'A{i}', message='m')
+                         for i in range(3)]
+        AdminNotification.objects.update(created_at=timezone.now() - timedelta(days=60))
+        AdminNotification.objects.filter(pk=notifications[2].pk).update(created_at=timezone.now() - timedelta(days=50))
+        # Un admin a lu jusqu'à la deuxième (et donc la première)
+        AdminNotificationCursor.advance(self.admin, AdminNotification.objects.get(pk=notifications[1].pk).created_at)
+
+        retention = {'admin_read': 30, 'admin_unread': None, 'student_read': None,
+                     'student_unread': None, 'outbox_dispatched': None}
+        with override_settings(BOURSES_NOTIFICATION_RETENTION_DAYS=retention):
+            result = prune_notifications(archive=False)
+        self.assertEqual(result.deleted['admin_notifications'], 2)
+        self.assertEqual(list(AdminNotification.objects.values_list('pk', flat=True)), [notifications[2].pk])
+
+    def test_dry_run_and_outbox_events(self):
+        record_admin_event('system_alert', 'Alerte', 'Message')
+        dispatch_pending()
+        NotificationEvent.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(prune_notifications(dry_run=True).deleted['notification_events'], 1)
+        self.assertTrue(NotificationEvent.objects.exists())
+
+        out = StringIO()
+        call_command('prune_notifications', stdout=out)
+        self.assertIn('notification_events: 1 ligne(s) supprimée(s)', out.getvalue())
+        self.assertFalse(NotificationEvent.objects.exists())
+        # Les événements ne sont pas archivés
+        self.assertFalse(any(name.startswith('notification_events') for name in os.listdir(self.archive_dir)))
+
+    def test_collapse_repeated_system_alerts(self):
+        for i in range(4):
+            AdminNotification.objects.create(notification_type='system_alert', title="Données exportées",
+                                             message=f"Export {i}")
+        AdminNotification.objects.create(notification_type='system_alert', title="Autre", message="Seule")
+        AdminNotification.objects.update(created_at=timezone.now() - timedelta(days=3))
+        recent = AdminNotification.objects.create(notification_type='system_alert', title="Données exportées",
+                                                  message="Récent")
+
+        self.assertEqual(collapse_system_alerts(timezone.now()), 3)
+        exported = AdminNotification.objects.filter(title="Données exportées").exclude(pk=recent.pk).get()
+        self.assertTrue(exported.message.startswith("4 alertes « Données exportées »"))
+        self.assertTrue(exported.message.endswith("Dernière: Export 3"))
+        self.assertEqual(AdminNotification.objects.count(), 3)
+        self.assertEqual(collapse_system_alerts(timezone.now()), 0)
+
+
+class BulkMarkReadTests(BoursesDataMixin, TestCase):
+    """Marquage groupé des notifications en un seul UPDATE"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def unread(self):
+        return StudentNotification.objects.filter(student=self.student, is_read=False)
+
+    def test_mark_ids_in_one_update(self):
+        ids = list(self.unread().values_list('pk', flat=True)[:2])
+        other = CustomUser.objects.create_user(username='autre', password='pw')
+        foreign = StudentNotification.objects.create(student=other, notification_type='system_alert',
+                                                     title='x', message='y')
+        # Un seul UPDATE, limité aux notifications de l'étudiant
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/users/student/notifications/read-bulk/',
+                                        {'ids': ids + [foreign.pk]}, format='json')
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertFalse(StudentNotification.objects.filter(pk__in=ids, is_read=False).exists())
+        self.assertEqual(StudentNotification.objects.filter(pk__in=ids, read_at__isnull=False).count(), 2)
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.is_read)
+
+    def test_high_water_mark(self):
+        notifications = list(self.unread().order_by('created_at', 'pk'))
+        mark = notifications[1]
+        response = self.client.post('/api/users/v2/notifications/read-bulk/', {
+            'up_to_created_at': mark.created_at.isoformat(), 'up_to_id': mark.pk
+        }, format='json')
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(list(self.unread().order_by('created_at', 'pk')), notifications[2:])
+
+        self.assertEqual(self.client.post('/api/users/v2/notifications/read-bulk/', {}, format='json').status_code, 400)
+        response = self.client.post('/api/users/v2/notifications/read-bulk/', {'ids': [1], 'up_to_id': 3}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_notifications(self):
+        notifications = [AdminNotification.objects.create(notification_type='system_alert', title=f'A{i}', message='m')
+                         for i in range(3)]
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(f'/api/users/admin/notifications/{notifications[0].pk}/read/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['notification']['is_read'])
+
+        response = client.post('/api/users/admin/notifications/read/', {'up_to_id': notifications[2].pk}, format='json')
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertFalse(AdminNotification.unread_for(self.admin).exists())
+        # Déjà lues: rien ne change
+        response = client.post('/api/users/admin/notifications/read/', {'ids': [notifications[1].pk]}, format='json')
+        self.assertEqual((response.data['updated_count'], response.data['unread_count']), (0, 0))
+        self.assertEqual(client.post('/api/users/admin/notifications/999999/read/').status_code, 404)
+        self.assertEqual(self.client.post('/api/users/admin/notifications/read/', {'ids': [1]}, format='json').status_code, 403)
+
+
+class AdminNotificationCursorTests(BoursesDataMixin, TestCase):
+    """État de lecture des notifications admin par curseur, admin par admin"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_admin = CustomUser.objects.create_user(username='admin2', password='pw', user_type='admin')
+        cls.notifications = [
+            AdminNotification.objects.create(notification_type='system_alert', title=f'Alerte {i}', message='m')
+            for i in range(3)
+        ]
+
+    def get(self, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        return client, client.get('/api/users/admin/notifications/')
+
+    def test_each_admin_has_own_read_state(self):
+        client, response = self.get(self.admin)
+        self.assertEqual(response.data['unread_count'], 3)
+
+        response = client.post(f'/api/users/admin/notifications/{self.notifications[1].pk}/read/')
+        self.assertEqual(response.status_code, 200)
+        # Le curseur marque aussi les notifications plus anciennes
+        _, response = self.get(self.admin)
+        self.assertEqual(response.data['unread_count'], 1)
+        self.assertEqual([n['id'] for n in response.data['unread']], [self.notifications[2].pk])
+        read_state = {n['id']: n['is_read'] for n in response.data['recent']}
+        self.assertEqual([read_state[n.pk] for n in self.notifications], [True, True, False])
+
+        _, response = self.get(self.other_admin)
+        self.assertEqual(response.data['unread_count'], 3)
+        self.assertEqual(client.get('/api/users/admin/stats/').data['pending_notifications'], 1)
+
+    def test_cursor_never_moves_back(self):
+        newest, oldest = self.notifications[2].created_at, self.notifications[0].created_at
+        self.assertTrue(AdminNotificationCursor.advance(self.admin, newest))
+        self.assertFalse(AdminNotificationCursor.advance(self.admin, oldest))
+        self.assertEqual(AdminNotificationCursor.last_seen(self.admin), newest)
+        self.assertEqual(AdminNotificationCursor.objects.count(), 1)
+        self.assertFalse(AdminNotification.unread_for(self.admin).exists())
+
+    def test_bulk_read_advances_cursor(self):
+        client = APIClient()
+        client.force_authenticate(self.other_admin)
+        response = client.post('/api/users/admin/notifications/read/',
+                               {'ids': [n.pk for n in self.notifications[:2]]}, format='json')
+        self.assertEqual(response.data['unread_count'], 1)
+        self.assertEqual(AdminNotificationCursor.last_seen(self.other_admin), self.notifications[1].created_at)
+        self.assertEqual(AdminNotification.unread_for(self.admin).count(), 3)
+
+    def test_future_bound_only_reaches_existing_notifications(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post('/api/users/admin/notifications/read/',
+                               {'up_to_created_at': '2099-01-01T00:00:00Z'}, format='json')
+        self.assertEqual(response.data['unread_count'], 0)
+        self.assertEqual(AdminNotificationCursor.last_seen(self.admin), self.notifications[2].created_at)
+        # Une notification créée ensuite reste non lue
+        AdminNotification.objects.create(notification_type='system_alert', title='Nouvelle', message='m')
+        self.assertEqual(AdminNotification.unread_for(self.admin).count(), 1)
+
+
+class InstrumentationTests(BoursesDataMixin, TestCase):
+    """Middleware d'instrumentation: log JSON, Server-Timing et budget de requêtes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_log_line_and_server_timing(self):
+        with self.assertLogs('bourses.requests', 'INFO') as logs:
+            response = self.client.get('/api/users/v2/notifications/')
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((entry['view'], entry['method'], entry['status']), ('notification-list', 'GET', 200))
+        self.assertEqual(entry['size'], len(response.content))
+        self.assertGreater(entry['queries'], 0)
+        self.assertIn('serialize_ms', entry)
+        self.assertIn('render_ms', entry)
+
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{entry["queries"]} queries"', timing)
+        self.assertIn('render;dur=', timing)
+
+    def test_query_budget_warning(self):
+        with override_settings(BOURSES_QUERY_BUDGETS={'notification-list': 1}), \
+                self.assertLogs('bourses.requests', 'WARNING') as logs:
+            self.client.get('/api/users/v2/notifications/')
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry['query_budget'], 1)
+
+    @override_settings(BOURSES_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        with self.assertLogs('bourses.requests', 'INFO'):
+            response = self.client.get('/api/users/status/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_timed_outside_request(self):
+        self.assertIsNone(current_metrics())
+        with timed('serialize'):
+            pass
+
+    def test_drf_serializers_are_timed(self):
+        with self.assertLogs('bourses.requests', 'INFO') as logs:
+            response = self.client.get('/api/users/me/')
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry['view'], 'current_user')
+        self.assertIn('serialize_ms', entry)
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+
+        # Phase imbriquée dans elle-même (serializer dans un serializer): comptée une fois
+        with collect_metrics() as metrics:
+            with mock.patch('users.instrumentation.time.perf_counter', side_effect=[1.0, 3.0]):
+                with timed('serialize'):
+                    with timed('serialize'):
+                        pass
+        self.assertEqual(metrics.timings, {'serialize': 2.0})
+
+
+class MetricsTests(BoursesDataMixin, TestCase):
+    """Registre de métriques et endpoint au format Prometheus"""
+
+    def test_registry_text_format(self):
+        registry = Registry()
+        counter = registry.counter('test_total', "Compteur", ('kind',))
+        histogram = registry.histogram('test_seconds', "Durées", ('view',), buckets=(0.1, 1))
+        counter.inc(kind='a"b')
+        counter.inc(2, kind='a"b')
+        for value in (0.05, 0.5, 3):
+            histogram.observe(value, view='v')
+        text = registry.render()
+        self.assertIn('# TYPE test_total counter\ntest_total{kind="a\\"b"} 3\n', text)
+        self.assertIn('test_seconds_bucket{view="v",le="0.1"} 1\n', text)
+        self.assertIn('test_seconds_bucket{view="v",le="1"} 2\n', text)
+        self.assertIn('test_seconds_bucket{view="v",le="+Inf"} 3\n', text)
+        self.assertIn('test_seconds_count{view="v"} 3', text)
+        self.assertEqual(histogram.summary(), (3, 3.55))
+
+    def test_gauge_collectors_run_before_render(self):
+        registry = Registry()
+        gauge = registry.gauge('test_pool', "Pool", ('stat',))
+        registry.collector(lambda: gauge.set(3, stat='pool_size'))
+        self.assertIn('# TYPE test_pool gauge\ntest_pool{stat="pool_size"} 3\n', registry.render())
+
+    def test_pool_stats_exposed(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {'pool_size': 4, 'pool_available': 3, 'requests_waiting': 0}
+        fake_connections = mock.MagicMock()
+        fake_connections.__iter__.return_value = iter(['default'])
+        fake_connections.__getitem__.return_value = mock.Mock(pool=pool)
+        with mock.patch('django.db.connections', fake_connections):
+            text = app_metrics.REGISTRY.render()
+        self.assertIn('bourses_db_pool{alias="default",stat="pool_available"} 3', text)
+        # Sans pool (SQLite, connexions persistantes): aucune statistique
+        self.assertEqual(app_metrics.pool_stats(), {})
+
+    def test_endpoint_reports_request_metrics(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        before = app_metrics.http_requests.get(view='notification-list', method='GET', status=200)
+        client.get('/api/users/v2/notifications/')
+        self.assertEqual(app_metrics.http_requests.get(view='notification-list', method='GET', status=200), before + 1)
+
+        response = self.client.get('/api/users/admin/system/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('bourses_http_request_duration_seconds_bucket{view="notification-list",le="+Inf"}', text)
+        self.assertIn('# TYPE bourses_db_queries_total counter', text)
+
+    def test_endpoint_access(self):
+        self.assertEqual(self.client.get('/api/users/admin/system/metrics/', REMOTE_ADDR='10.0.0.8').status_code, 403)
+        with override_settings(BOURSES_METRICS_TOKEN='secret'):
+            url = '/api/users/admin/system/metrics/'
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret', REMOTE_ADDR='10.0.0.8').status_code, 200)
+
+    def test_fan_out_and_report_cache_counters(self):
+        before = app_metrics.notifications_created.get(audience='student', source='broadcast')
+        broadcast('all_students', 'system_alert', 'Alerte', 'Message')
+        self.assertEqual(app_metrics.notifications_created.get(audience='student', source='broadcast'), before + 1)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with override_settings(BOURSES_SYSTEM_SAMPLER=False):
+            response = client.get('/api/users/admin/system/info/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(response.data['traffic']['notifications_created'], 1)
+
+
+class SystemSamplerTests(BoursesDataMixin, TestCase):
+    """Relevés système en tampon circulaire (users/sampler.py)"""
+
+    def test_sample_without_psutil(self):
+        with mock.patch('users.sampler.psutil', None):
+            sample = take_sample()
+        self.assertIsNone(sample['cpu'])
+        self.assertIsNone(sample['memory'])
+        self.assertIsNotNone(sample['storage'])
+        self.assertTrue(sample['database'])
+        self.assertIsNotNone(sample['db_latency_ms'])
+        self.assertEqual(sample['status'], 'healthy')
+
+    def test_database_failure_is_reported(self):
+        with mock.patch('users.sampler.check_database', return_value=(False, None)):
+            sample = take_sample()
+        self.assertFalse(sample['database'])
+        self.assertEqual(sample['status'], 'warning')
+
+    def test_ring_buffer_keeps_recent_samples(self):
+        sampler = SystemSampler(interval=60, history=3)
+        for _ in range(5):
+            sampler.record()
+        latest, history = sampler.latest()
+        self.assertEqual(len(history), 3)
+        self.assertIs(latest, history[-1])
+
+    def test_background_thread_records(self):
+        sampler = SystemSampler(interval=0.01, history=10)
+        with mock.patch('users.sampler.take_sample', return_value={'status': 'healthy'}), \
+                mock.patch('users.sampler.connections'):
+            sampler.start()
+            deadline = time.monotonic() + 2
+            while not sampler.samples and time.monotonic() < deadline:
+                time.sleep(0.01)
+            sampler.stop()
+        self.assertTrue(sampler.samples)
+        self.assertFalse(sampler.thread.is_alive())
+
+    @override_settings(BOURSES_SYSTEM_SAMPLER=False)
+    def test_endpoint_returns_latest_sample_and_history(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        local = SystemSampler(interval=60, history=5)
+        with mock.patch('users.sampler.sampler', local):
+            client.get('/api/users/admin/system/info/')
+            response = client.get('/api/users/admin/system/info/')
+        self.assertEqual(response.status_code, 200)
+        # Premier appel: un relevé immédiat; le suivant réutilise le tampon
+        self.assertEqual(len(response.data['history']), 1)
+        self.assertTrue(response.data['services_status']['database'])
+        self.assertEqual(response.data['resource_usage']['status'], response.data['history'][-1]['status'])
+        self.assertNotIn('network', response.data['resource_usage'])
+
+
+class ReplicaRoutingTests(BoursesDataMixin, TestCase):
+    """Routage des lectures vers la réplique (users/replicas.py)"""
+
+    def setUp(self):
+        # Réplique déclarée et à jour (la base de test n'en a pas: TEST.MIRROR la confond)
+        patchers = [
+            mock.patch('users.replicas.replica_configured', return_value=True),
+            mock.patch('bourses_backend.middleware.replica_configured', return_value=True),
+            mock.patch.object(replicas.lag_monitor, 'healthy', return_value=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_only_replica_blocks_are_routed(self):
+        self.assertEqual(db_router.db_for_read(CustomUser), 'default')
+        with replica_reads():
+            self.assertEqual(db_router.db_for_read(CustomUser), 'replica')
+            # File des rapports: toujours la base principale
+            self.assertEqual(db_router.db_for_read(ReportJob), 'default')
+            self.assertEqual(db_router.db_for_write(CustomUser), 'default')
+        self.assertEqual(db_router.db_for_read(CustomUser), 'default')
+        self.assertFalse(db_router.allow_migrate('replica', 'users'))
+
+    def test_own_writes_and_pin_read_primary(self):
+        with request_scope() as state, replica_reads():
+            self.assertEqual(db_router.db_for_read(StudentDocument), 'replica')
+            db_router.db_for_write(StudentDocument)
+            self.assertTrue(state.wrote)
+            self.assertEqual(db_router.db_for_read(StudentDocument), 'default')
+        with request_scope(pinned=True), replica_reads():
+            self.assertEqual(db_router.db_for_read(StudentDocument), 'default')
+
+    def test_lag_falls_back_to_primary(self):
+        monitor = replicas.LagMonitor()
+        with mock.patch('users.replicas.measure_lag', return_value=30.0) as measure:
+            self.assertFalse(monitor.healthy())
+            monitor.healthy()
+        # Mesure réutilisée pendant BOURSES_REPLICA_LAG_CHECK_INTERVAL
+        self.assertEqual(measure.call_count, 1)
+        self.assertEqual(app_metrics.db_replica_lag.get(alias='replica'), 30.0)
+
+        monitor.checked_at = None
+        with mock.patch('users.replicas.measure_lag', return_value=None):
+            self.assertFalse(monitor.healthy())
+        monitor.checked_at = None
+        with mock.patch('users.replicas.measure_lag', return_value=0.5):
+            self.assertTrue(monitor.healthy())
+
+        with mock.patch.object(replicas.lag_monitor, 'healthy', return_value=False), replica_reads():
+            self.assertEqual(db_router.db_for_read(CustomUser), 'default')
+
+    def test_write_sets_pin_cookie(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        notification = AdminNotification.objects.create(notification_type='system_alert', title='Alerte', message='Message')
+
+        response = client.get('/api/users/status/')
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+        response = client.post('/api/users/admin/notifications/read/', {'ids': [notification.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(cookie['httponly'])
+
+        # Cookie renvoyé par le client: analytics lues sur la base principale
+        pinned = app_metrics.db_read_routing.get(target='default', reason='pinned')
+        routed = app_metrics.db_read_routing.get(target='replica', reason='replica_reads')
+        response = client.get('/api/users/admin/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(app_metrics.db_read_routing.get(target='default', reason='pinned'), pinned)
+        self.assertEqual(app_metrics.db_read_routing.get(target='replica', reason='replica_reads'), routed)
+
+    def test_report_fingerprint_reads_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        routed = app_metrics.db_read_routing.get(target='replica', reason='replica_reads')
+        response = client.post('/api/users/admin/generate-report/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(app_metrics.db_read_routing.get(target='replica', reason='replica_reads'), routed)
+
+    def test_no_replica_no_routing(self):
+        self.assertFalse(original_replica_configured())
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        notification = AdminNotification.objects.create(notification_type='system_alert', title='Alerte', message='Message')
+        with mock.patch('users.replicas.replica_configured', original_replica_configured), \
+                mock.patch('bourses_backend.middleware.replica_configured', original_replica_configured):
+            with replica_reads():
+                self.assertEqual(db_router.db_for_read(CustomUser), 'default')
+            response = client.post('/api/users/admin/notifications/read/', {'ids': [notification.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+
+class MaintenanceTests(BoursesDataMixin, TestCase):
+    """Maintenance de la base programmée depuis l'administration (users/maintenance.py)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_endpoint_enqueues_without_running(self):
+        url = '/api/users/admin/system/optimize-database/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'tables': ['users_customuser']}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse([q for q in queries if re.match(r'\s*(VACUUM|ANALYZE)', q['sql'])])
+        job = MaintenanceJob.objects.get(pk=response.data['job']['id'])
+        self.assertEqual((job.status, job.tables, job.analyze), ('pending', ['users_customuser'], True))
+
+        # Une maintenance à la fois
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.data['job']['id'], job.pk)
+        self.assertEqual(MaintenanceJob.objects.count(), 1)
+
+        response = self.client.get(response.data['job']['status_url'])
+        self.assertEqual((response.status_code, response.data['progress']), (200, 0))
+
+        response = self.client.post(url, {'tables': ['pg_class']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_refused_inside_transaction(self):
+        with self.assertRaises(MaintenanceError):
+            run_maintenance()
+        job, _ = MaintenanceJob.enqueue(self.admin)
+        job.mark_running()
+        run_maintenance_job(job)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('transaction', job.error)
+
+
+class MaintenanceRunTests(TransactionTestCase):
+    """VACUUM hors transaction: TransactionTestCase"""
+
+    def test_job_runs_each_step_with_progress(self):
+        admin = CustomUser.objects.create_user(username='admin', password='pw', user_type='admin')
+        job, created = MaintenanceJob.enqueue(admin, tables=['users_customuser', 'users_studentdocument'])
+        self.assertTrue(created)
+
+        progress = []
+        original_save = MaintenanceJob.save
+
+        def record_save(instance, *args, **kwargs):
+            original_save(instance, *args, **kwargs)
+            if 'tables_done' in kwargs.get('update_fields', ()):
+                progress.append((instance.tables_done, instance.tables_total, instance.current_table))
+
+        with mock.patch.object(MaintenanceJob, 'save', record_save):
+            self.assertEqual(run_pending_maintenance(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.progress, 100)
+        # PostgreSQL: VACUUM (ANALYZE) par table; SQLite: ANALYZE par table puis VACUUM du fichier
+        steps = ['users_customuser', 'users_studentdocument'] + (['(database)'] if connection.vendor == 'sqlite' else [])
+        self.assertEqual([step['table'] for step in job.report['steps']], steps)
+        self.assertEqual(progress, [(i, len(steps), table) for i, table in enumerate(steps)] + [(len(steps), len(steps), '')])
+        self.assertEqual(job.report['vendor'], connection.vendor)
+        self.assertTrue(NotificationEvent.objects.filter(title="Maintenance de la base terminée").exists())
+
+    def test_command_without_analyze(self):
+        out = StringIO()
+        call_command('run_maintenance', '--no-analyze', stdout=out)
+        job = MaintenanceJob.objects.get()
+        # SQLite: un seul VACUUM du fichier; PostgreSQL: un VACUUM par table
+        steps = 1 if connection.vendor == 'sqlite' else len(maintenance_tables(connection))
+        self.assertEqual((job.status, job.tables_total), ('completed', steps))
+        self.assertIn(f'{steps} étape(s)', out.getvalue())
+
+
+class AsyncURLConf:
+    """URLconf du projet avec les vues asynchrones, comme sous ASGI (BOURSES_ASYNC_VIEWS)"""
+    urlpatterns = [path('api/users/', include(use_async_views(users_urls.urlpatterns)))]
+
+
+def log_in(client, user):
+    """
+    Authentification comme en production: cookie de session, ou en-têtes
+    Bearer à passer à chaque requête (AsyncClient ne traduit pas les en-têtes
+    donnés au constructeur) selon AUTH_MODE
+    """
+    if user is None:
+        return {}
+    if jwt_enabled():
+        return {'Authorization': f"Bearer {tokens_for_user(user)['access']}"}
+    client.force_login(user)
+    return {}
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncViewTests(BoursesDataMixin, TestCase):
+    """Vues asynchrones (users/async_views.py) servies par le gestionnaire ASGI de AsyncClient"""
+
+    def request(self, user, method, url, data=None, client=None):
+        client = client or AsyncClient()
+        kwargs = {'data': data, 'content_type': 'application/json'} if data is not None else {}
+        response = async_to_sync(getattr(client, method))(url, headers=log_in(client, user), **kwargs)
+        if response.streaming:
+            response.content_bytes = async_to_sync(self.consume)(response)
+        return response
+
+    @staticmethod
+    async def consume(response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    def sync_get(self, user, url):
+        client = Client()
+        with override_settings(ROOT_URLCONF='bourses_backend.urls'):
+            return client.get(url, headers=log_in(client, user))
+
+    def test_routes_use_async_views(self):
+        replaced = {pattern.name: pattern.callback for pattern in use_async_views(users_urls.urlpatterns)
+                    if getattr(pattern, 'name', None) in ASYNC_VIEWS}
+        self.assertEqual(replaced, ASYNC_VIEWS)
+        self.assertIs(resolve('/api/users/status/').func, ASYNC_VIEWS['auth_status'])
+        # Sous WSGI (BOURSES_ASYNC_VIEWS désactivé), les vues synchrones restent
+        self.assertIsNot(resolve('/api/users/status/', urlconf='bourses_backend.urls').func, ASYNC_VIEWS['auth_status'])
+
+    def test_reads_match_sync_views(self):
+        AdminNotification.objects.create(notification_type='system_alert', title='Alerte', message='m',
+                                         related_user=self.student)
+        cases = [
+            (self.student, 'status/'),
+            (self.student, 'me/'),
+            (self.student, 'student/notifications/?time_format=iso'),
+            (self.admin, 'admin/notifications/?time_format=iso'),
+            (None, 'status/'),
+        ]
+        for user, url in cases:
+            with self.subTest(url=url, user=user):
+                expected = self.sync_get(user, f'/api/users/{url}')
+                actual = self.request(user, 'get', f'/api/users/{url}')
+                self.assertEqual(actual.status_code, 200)
+                self.assertEqual(actual.json(), expected.json())
+
+        # 403 en mode session, 401 avec WWW-Authenticate en mode JWT, comme DRF
+        expected = self.sync_get(None, '/api/users/me/')
+        actual = self.request(None, 'get', '/api/users/me/')
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.get('WWW-Authenticate'), expected.get('WWW-Authenticate'))
+
+    def test_download_streams_file(self):
+        document = StudentDocument.objects.filter(student=self.student).first()
+        url = f'/api/users/documents/download/{document.pk}/'
+        response = self.request(self.student, 'get', url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_bytes, b'%PDF-1.4')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn(f'filename="{document.original_filename}"', response['Content-Disposition'])
+        self.assertEqual(self.request(self.admin, 'get', url).status_code, 200)
+
+        other = CustomUser.objects.create_user(username='autre', password='pw')
+        response = self.request(other, 'get', url)
+        self.assertEqual((response.status_code, response.json()), (404, {'detail': 'Document non trouvé'}))
+
+    def test_student_notification_writes(self):
+        unread = StudentNotification.objects.filter(student=self.student, is_read=False)
+        first, second = unread.order_by('pk')[:2]
+        prefix = '/api/users/student/notifications/'
+
+        response = self.request(self.student, 'post', f'{prefix}{first.pk}/read/')
+        self.assertTrue(response.json()['notification']['is_read'])
+        response = self.request(self.student, 'post', f'{prefix}read-bulk/', {'ids': [second.pk]})
+        self.assertEqual(response.json()['updated_count'], 1)
+        self.assertEqual(self.request(self.student, 'post', f'{prefix}read-bulk/', {}).status_code, 400)
+        remaining = unread.count()
+        response = self.request(self.student, 'post', f'{prefix}read-all/')
+        self.assertEqual(response.json()['updated_count'], remaining)
+        self.assertFalse(unread.exists())
+        self.assertEqual(self.request(self.student, 'get', f'{prefix}read-all/').status_code, 405)
+
+        self.assertEqual(self.request(self.student, 'delete', f'{prefix}{first.pk}/delete/').status_code, 200)
+        response = self.request(self.student, 'delete', f'{prefix}{first.pk}/delete/')
+        self.assertEqual((response.status_code, response.json()), (404, {'detail': 'Notification non trouvée'}))
+        response = self.request(self.student, 'post', f'{prefix}delete-all/')
+        self.assertEqual(response.json()['deleted_count'], len(AGES) - 1)
+
+    def test_admin_notification_writes(self):
+        notifications = [AdminNotification.objects.create(notification_type='system_alert', title=f'A{i}', message='m')
+                         for i in range(3)]
+        response = self.request(self.admin, 'post', f'/api/users/admin/notifications/{notifications[0].pk}/read/')
+        self.assertTrue(response.json()['notification']['is_read'])
+        self.assertEqual(AdminNotificationCursor.last_seen(self.admin), notifications[0].created_at)
+
+        response = self.request(self.admin, 'post', '/api/users/admin/notifications/read/',
+                                {'up_to_id': notifications[2].pk})
+        self.assertEqual((response.json()['updated_count'], response.json()['unread_count']), (2, 0))
+        self.assertEqual(self.request(self.admin, 'post', '/api/users/admin/notifications/999999/read/').status_code, 404)
+
+        response = self.request(self.student, 'post', '/api/users/admin/notifications/read/', {'ids': [1]})
+        self.assertEqual((response.status_code, response.json()), (403, {'detail': 'Accès non autorisé'}))
+
+    def test_session_writes_require_csrf(self):
+        if jwt_enabled():
+            self.skipTest("CSRF contrôlé pour les sessions seulement")
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = self.request(self.student, 'post', '/api/users/student/notifications/read-all/', client=client)
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+
+    def test_queries_are_instrumented(self):
+        with self.assertLogs('bourses.requests', 'INFO') as logs:
+            response = self.request(self.student, 'get', '/api/users/student/notifications/')
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((entry['view'], entry['status']), ('student_notifications', 200))
+        self.assertGreaterEqual(entry['queries'], 2)
+        self.assertIn(f'desc="{entry["queries"]} queries"', response['Server-Timing'])
+
+
+@override_settings(AUTH_MODE='jwt')
+class StatelessJWTTests(BoursesDataMixin, TestCase):
+    """
+    Jetons JWT: utilisateur lu dans les claims, compte relu au rafraîchissement.
+    Exécutés quel que soit BOURSES_AUTH_MODE: AUTH_MODE active les routes de
+    jetons, et les vues appelées par HTTP reçoivent StatelessJWTAuthentication
+    (les classes d'authentification DRF sont figées à l'import).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def use_jwt(self, url):
+        patcher = mock.patch.object(resolve(url).func.cls, 'authentication_classes', [StatelessJWTAuthentication])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_issued_token_authenticates_without_query(self):
+        response = self.client.post('/api/users/token/', {'username': 'etudiant', 'password': 'pw'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['id'], self.student.pk)
+
+        with self.assertNumQueries(0):
+            user, token = self.authenticate(response.data['access'])
+            self.assertEqual((user.pk, user.user_type, user.username), (self.student.pk, 'student', 'etudiant'))
+        self.assertIn('phone_number', user.get_deferred_fields())
+
+        response = self.client.post('/api/users/token/refresh/', {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.authenticate(response.data['access'])[0].pk, self.student.pk)
+
+    def test_refresh_rejects_deactivated_or_deleted_account(self):
+        user = CustomUser.objects.create_user(username='desactive', password='pw')
+        tokens = tokens_for_user(user)
+
+        CustomUser.objects.filter(pk=user.pk).update(is_active=False)
+        # Jeton d'accès déjà émis: valable jusqu'à son expiration (claims sans requête)
+        self.assertEqual(self.authenticate(tokens['access'])[0].pk, user.pk)
+        response = self.client.post('/api/users/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # Un jeton émis pour un compte inactif est refusé
+        user.refresh_from_db()
+        with self.assertRaises(InvalidToken):
+            self.authenticate(tokens_for_user(user)['access'])
+
+        user.delete()
+        response = self.client.post('/api/users/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_tokens_are_rejected(self):
+        access = AccessToken.for_user(self.student)
+        access.set_exp(lifetime=-timedelta(seconds=1))
+        with self.assertRaises(InvalidToken):
+            self.authenticate(str(access))
+
+        refresh = RefreshToken.for_user(self.student)
+        refresh.set_exp(lifetime=-timedelta(seconds=1))
+        response = self.client.post('/api/users/token/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_without_user_claims_reads_the_account(self):
+        # Jeton sans user_type (ni is_active): les champs sont chargés depuis la base, jamais devinés
+        user, _ = self.authenticate(str(AccessToken.for_user(self.student)))
+        self.assertEqual(user.pk, self.student.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.user_type, 'student')
+
+        url = '/api/users/admin/stats/'
+        self.use_jwt(url)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_current_user_loads_missing_fields_in_one_query(self):
+        CustomUser.objects.filter(pk=self.student.pk).update(phone_number='0600000000')
+        self.use_jwt('/api/users/me/')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.student)['access']}")
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['phone_number'], '0600000000')
+
+
+def sql_template(sql):
+    """Requête sans ses valeurs littérales, pour repérer les requêtes répétées"""
+    return re.sub(r'\b\d+\b', '?', re.sub(r"'[^']*'", '?', sql))
+
+
+def describe_query_growth(small, large):
+    """Message d'échec: requêtes dont le nombre augmente, puis tout le SQL de la grande taille"""
+    small_counts = Counter(sql_template(q['sql']) for q in small)
+    large_counts = Counter(sql_template(q['sql']) for q in large)
+    lines = [f"{len(small)} requêtes -> {len(large)} avec plus de données", "Requêtes répétées:"]
+    for template, count in large_counts.most_common():
+        if count > small_counts[template]:
+            lines.append(f"  x{count} (avant x{small_counts[template]}): {template}")
+    lines.append("SQL exécuté:")
+    lines.extend(f"  {i + 1}. {q['sql']}" for i, q in enumerate(large))
+    return '\n'.join(lines)
+
+
+def query_budget_routes():
+    """(nom d'URL, route) de toutes les routes de users/urls.py, routeur v2 compris"""
+    from django.urls import URLResolver
+    from . import urls
+
+    def walk(patterns, prefix=''):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, prefix + str(pattern.pattern))
+            else:
+                yield pattern.name, prefix + str(pattern.pattern)
+    return list(walk(urls.urlpatterns))
+
+
+# Par nom d'URL: fonction (test) -> (utilisateur, méthode, URL, données). Les
+# objets modifiés ou supprimés sont créés à chaque mesure (mesure annulée ensuite).
+QUERY_BUDGET_CASES = {
+    # Routeur v2
+    'document-list': lambda t: (t.student, 'get', '/api/users/v2/documents/', None),
+    'document-detail': lambda t: (t.student, 'get', f'/api/users/v2/documents/{t.document().pk}/', None),
+    'document-download': lambda t: (t.student, 'get', f'/api/users/v2/documents/{t.document().pk}/download/', None),
+    'document-reject': lambda t: (t.admin, 'post', f'/api/users/v2/documents/{t.document().pk}/reject/', {'reason': 'Illisible'}),
+    'document-verify': lambda t: (t.admin, 'post', f'/api/users/v2/documents/{t.document().pk}/verify/', None),
+    'application-list': lambda t: (t.admin, 'get', '/api/users/v2/applications/', None),
+    'application-detail': lambda t: (t.student, 'get', f'/api/users/v2/applications/{t.application().pk}/', None),
+    'application-submit': lambda t: (t.student, 'post', f'/api/users/v2/applications/{t.application().pk}/submit/', None),
+    'notification-list': lambda t: (t.student, 'get', '/api/users/v2/notifications/', None),
+    'notification-delete-all': lambda t: (t.student, 'post', '/api/users/v2/notifications/delete-all/', None),
+    'notification-read-all': lambda t: (t.student, 'post', '/api/users/v2/notifications/read-all/', None),
+    'notification-read-bulk': lambda t: (t.student, 'post', '/api/users/v2/notifications/read-bulk/', {'ids': t.notification_ids()}),
+    'notification-detail': lambda t: (t.student, 'get', f'/api/users/v2/notifications/{t.notification().pk}/', None),
+    'notification-read': lambda t: (t.student, 'post', f'/api/users/v2/notifications/{t.notification().pk}/read/', None),
+    'eligibility-rule-list': lambda t: (t.student, 'get', '/api/users/v2/eligibility-rules/', None),
+    'eligibility-rule-detail': lambda t: (t.student, 'get', f'/api/users/v2/eligibility-rules/{t.rule().pk}/', None),
+    # Authentification
+    'register': lambda t: (None, 'post', '/api/users/register/', {
+        'username': 'nouveau', 'email': 'nouveau@example.com', 'password': 'motdepasse', 'first_name': 'N'}),
+    'login': lambda t: (None, 'post', '/api/users/login/', {'username': 'etudiant', 'password': 'pw'}),
+    'logout': lambda t: (t.student, 'post', '/api/users/logout/', None),
+    'token_obtain_pair': lambda t: (None, 'post', '/api/users/token/', {'username': 'etudiant', 'password': 'pw'}),
+    'token_refresh': lambda t: (None, 'post', '/api/users/token/refresh/', {'refresh': tokens_for_user(t.student)['refresh']}),
+    'current_user': lambda t: (t.student, 'get', '/api/users/me/', None),
+    'csrf_token': lambda t: (None, 'get', '/api/users/csrf/', None),
+    'auth_status': lambda t: (t.student, 'get', '/api/users/status/', None),
+    # Utilisateurs
+    'all_users': lambda t: (t.admin, 'get', '/api/users/all/', None),
+    'delete_user': lambda t: (t.admin, 'delete', f'/api/users/delete/{t.other_student().pk}/', None),
+    # Documents
+    'manage_documents': lambda t: (t.student, 'get', '/api/users/documents/', None),
+    'delete_document': lambda t: (t.student, 'delete', f'/api/users/documents/delete/{t.document().pk}/', None),
+    'download_document': lambda t: (t.student, 'get', f'/api/users/documents/download/{t.document().pk}/', None),
+    # Règles d'éligibilité
+    'get_eligibility_rules': lambda t: (t.student, 'get', '/api/users/eligibility-rules/', None),
+    'create_eligibility_rule': lambda t: (t.admin, 'post', '/api/users/eligibility-rules/create/', {
+        'title': 'Moyenne', 'description': 'Moyenne minimale', 'rule_type': 'academic', 'criteria': {'min': 12}}),
+    'manage_eligibility_rule': lambda t: (t.admin, 'put', f'/api/users/eligibility-rules/{t.rule().pk}/', {'title': 'Modifiée'}),
+    # Notifications admin
+    'admin_notifications': lambda t: (t.admin, 'get', '/api/users/admin/notifications/', None),
+    'mark_admin_notifications_read': lambda t: (t.admin, 'post', '/api/users/admin/notifications/read/', {'ids': t.admin_notification_ids()}),
+    'broadcast_notification': lambda t: (t.admin, 'post', '/api/users/admin/notifications/broadcast/', {
+        'audience': 'all_students', 'title': 'Maintenance', 'message': 'Ce soir'}),
+    'mark_notification_read': lambda t: (t.admin, 'post', f'/api/users/admin/notifications/{t.admin_notification().pk}/read/', None),
+    'admin_stats': lambda t: (t.admin, 'get', '/api/users/admin/stats/', None),
+    # Documents admin
+    'admin_documents': lambda t: (t.admin, 'get', '/api/users/admin/documents/', None),
+    'verify_document': lambda t: (t.admin, 'post', f'/api/users/admin/documents/{t.document().pk}/verify/', None),
+    'reject_document': lambda t: (t.admin, 'post', f'/api/users/admin/documents/{t.document().pk}/reject/', {'reason': 'Illisible'}),
+    'admin_analytics': lambda t: (t.admin, 'get', '/api/users/admin/analytics/', None),
+    # Système
+    'system_info': lambda t: (t.admin, 'get', '/api/users/admin/system/info/', None),
+    'clear_cache': lambda t: (t.admin, 'post', '/api/users/admin/system/clear-cache/', None),
+    'optimize_database': lambda t: (t.admin, 'post', '/api/users/admin/system/optimize-database/', None),
+    'maintenance_job_status': lambda t: (t.admin, 'get', f'/api/users/admin/system/maintenance/{t.maintenance_job().pk}/', None),
+    'metrics': lambda t: (None, 'get', '/api/users/admin/system/metrics/', None),
+    'update_settings_settings': lambda t: (t.admin, 'post', '/api/users/admin/system/update-settings/', {'settings': {'maintenance': False}}),
+    # Rapports (exécutés immédiatement: BOURSES_REPORT_JOBS_EAGER)
+    'generate_report': lambda t: (t.admin, 'post', '/api/users/admin/generate-report/', None),
+    'export_data': lambda t: (t.admin, 'get', '/api/users/admin/export-data/?type=applications', None),
+    'generate_pdf_report': lambda t: (t.admin, 'post', '/api/users/admin/generate-pdf-report/', None),
+    'report_job_status': lambda t: (t.admin, 'get', f'/api/users/admin/reports/{t.report().pk}/', None),
+    'download_report': lambda t: (t.admin, 'get', f'/api/users/admin/reports/{t.report().pk}/download/', None),
+    # Étudiant
+    'student_stats': lambda t: (t.student, 'get', '/api/users/student/stats/', None),
+    'student_notifications': lambda t: (t.student, 'get', '/api/users/student/notifications/', None),
+    'mark_student_notification_read': lambda t: (t.student, 'post', f'/api/users/student/notifications/{t.notification().pk}/read/', None),
+    'manage_applications': lambda t: (t.student, 'get', '/api/users/applications/', None),
+    'manage_application': lambda t: (t.student, 'put', f'/api/users/applications/{t.application().pk}/', {'title': 'Modifiée'}),
+    'submit_application': lambda t: (t.student, 'post', f'/api/users/applications/{t.application().pk}/submit/', None),
+    'admin_applications': lambda t: (t.admin, 'get', '/api/users/admin/applications/', None),
+    'mark_all_notifications_read': lambda t: (t.student, 'post', '/api/users/student/notifications/read-all/', None),
+    'mark_notifications_read_bulk': lambda t: (t.student, 'post', '/api/users/student/notifications/read-bulk/', {'ids': t.notification_ids()}),
+    'delete_notification': lambda t: (t.student, 'delete', f'/api/users/student/notifications/{t.notification().pk}/delete/', None),
+    'delete_all_notifications': lambda t: (t.student, 'post', '/api/users/student/notifications/delete-all/', None),
+}
+
+# Routes dont l'échec est connu: la mesure porte sur le chemin d'erreur
+QUERY_BUDGET_EXPECTED_ERRORS = {}
+
+
+@override_settings(BOURSES_REPORT_JOBS_EAGER=True, BOURSES_SYSTEM_SAMPLER=False)
+class QueryBudgetTests(TemporaryMediaMixin, TestCase):
+    """
+    Chaque route de users/urls.py est appelée sur deux volumes de données: le
+    nombre de requêtes SQL ne doit pas augmenter avec les données (N+1).
+    Documents et rapports (jobs eager compris) sont écrits dans un MEDIA_ROOT temporaire.
+    """
+    SIZES = (2, 6)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            username='admin', password='pw', user_type='admin', first_name='Sami', last_name='Trabelsi'
+        )
+        cls.student = CustomUser.objects.create_user(
+            username='etudiant', password='pw', first_name='Amina', last_name='Ben Salah', email='amina@example.com'
+        )
+        cls.created = 0
+
+    def grow(self, count):
+        """Ajoute `count` étudiants complets et `count` objets de chaque sorte à l'étudiant testé"""
+        for _ in range(count):
+            type(self).created += 1
+            other = CustomUser.objects.create_user(
+                username=f'etudiant{self.created}', password='pw', first_name='Autre', last_name=str(self.created)
+            )
+            for owner in (self.student, other):
+                document = self.document(owner, verified=True)
+                application = self.application(owner, status='submitted', reviewed_by=self.admin)
+                application.required_documents.add(document)
+                self.notification(owner, related_document=document)
+                self.notification(owner, related_application=application)
+                AdminNotification.objects.create(
+                    notification_type='document_upload', title='Document', message='Nouveau document',
+                    related_user=owner, related_document=document
+                )
+            self.rule()
+
+    def document(self, owner=None, verified=False):
+        document = StudentDocument(
+            student=owner or self.student, document_type='identity', original_filename='piece.pdf', file_size=1024,
+            is_verified=verified, verified_by=self.admin if verified else None,
+            verified_at=timezone.now() if verified else None,
+        )
+        document.file.save('piece.pdf', ContentFile(b'%PDF-1.4'), save=False)
+        document.save()
+        return document
+
+    def application(self, owner=None, status='draft', reviewed_by=None):
+        return ScholarshipApplication.objects.create(
+            student=owner or self.student, scholarship_type='merit', title='Demande',
+            amount_requested=Decimal('1500'), status=status, reviewed_by=reviewed_by
+        )
+
+    def notification(self, owner=None, **related):
+        return StudentNotification.objects.create(
+            student=owner or self.student, notification_type='system_alert', title='Alerte', message='Message',
+            **related
+        )
+
+    def notification_ids(self):
+        return list(StudentNotification.objects.filter(student=self.student).values_list('pk', flat=True))
+
+    def admin_notification(self):
+        return AdminNotification.objects.create(notification_type='system_alert', title='Alerte', message='Message')
+
+    def admin_notification_ids(self):
+        return list(AdminNotification.objects.values_list('pk', flat=True))
+
+    def rule(self):
+        return EligibilityRule.objects.create(
+            title='Revenu', description='Plafond', rule_type='financial', criteria={'max': 1000}, created_by=self.admin
+        )
+
+    def other_student(self):
+        other = CustomUser.objects.create_user(username='a_supprimer', password='pw')
+        self.document(other)
+        self.notification(other)
+        return other
+
+    def maintenance_job(self):
+        return MaintenanceJob.objects.create(requested_by=self.admin, status='completed', report={'steps': []})
+
+    def report(self):
+        job = ReportJob.objects.create(report_type='full', requested_by=self.admin, data_fingerprint='x',
+                                       status='completed')
+        job.file.save('rapport.json', ContentFile(b'{}'))
+        return job
+
+    def measure(self, name):
+        """Requêtes SQL de la route `name`; toutes les écritures sont annulées ensuite"""
+        with transaction.atomic():
+            user, method, url, data = QUERY_BUDGET_CASES[name](self)
+            client = APIClient()
+            if user is not None:
+                client.force_authenticate(user)
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(url, data, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+
+        expected_errors = QUERY_BUDGET_EXPECTED_ERRORS.get(name, set())
+        if name in ('token_obtain_pair', 'token_refresh') and not jwt_enabled():
+            expected_errors = {404}
+        if response.status_code >= 400 and response.status_code not in expected_errors:
+            self.fail(f"{name}: {method.upper()} {url} -> {response.status_code}")
+        return queries.captured_queries
+
+    def test_every_route_has_a_case(self):
+        names = {name for name, _ in query_budget_routes()}
+        self.assertEqual(names - set(QUERY_BUDGET_CASES), set(), "Routes sans cas de mesure")
+        self.assertEqual(set(QUERY_BUDGET_CASES) - names, set(), "Cas sans route")
+
+    def test_query_count_does_not_grow_with_data(self):
+        small, large = self.SIZES
+        self.grow(small)
+        before = {name: self.measure(name) for name in QUERY_BUDGET_CASES}
+        self.grow(large - small)
+        for name in QUERY_BUDGET_CASES:
+            with self.subTest(route=name):
+                after = self.measure(name)
+                if len(after) > len(before[name]):
+                    self.fail(f"{name}: " + describe_query_growth(before[name], after))
+
+
+class SeedingTests(TestCase):
+    """Génération de données synthétiques (users/seeding.py, seed_bourses)"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_seed_with_files(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            result = seed_bourses(students=12, admins=2, documents=2, applications=1, notifications=3,
+                                  admin_notifications=5, workers=2)
+            documents = list(StudentDocument.objects.all())
+            self.assertEqual(result.files, 24)
+            for document in documents:
+                with open(document.file.path, 'rb') as f:
+                    content = f.read()
+                self.assertTrue(content.startswith(b'%PDF-1.4'))
+                self.assertEqual(len(content), document.file_size)
+
+        self.assertEqual(result.counts['CustomUser'], 14)
+        self.assertEqual(result.counts['AdminNotification'], 5)
+        self.assertEqual(StudentNotification.objects.count(), 36)
+        statuses = set(ScholarshipApplication.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, {code for code, _ in ScholarshipApplication.APPLICATION_STATUS_CHOICES})
+        self.assertFalse(ScholarshipApplication.objects.filter(status='approved', final_amount__isnull=True).exists())
+        # Dates réparties dans le passé, auto_now_add rétabli ensuite
+        self.assertGreater(CustomUser.objects.values('date_joined').distinct().count(), 1)
+        self.assertTrue(CustomUser._meta.get_field('created_at').auto_now_add)
+        self.assertTrue(CustomUser.objects.get(username='seed_student_0').check_password('seed-pass'))
+
+    def test_prefix_collision_and_command(self):
+        out = StringIO()
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command('seed_bourses', '--students', '3', '--no-files', '--prefix', 'essai', verbosity=0, stdout=out)
+        self.assertIn('StudentDocument: 9', out.getvalue())
+        self.assertFalse(os.listdir(self.media_root))
+        with self.assertRaises(SeedError):
+            seed_bourses(students=1, prefix='essai', write_files=False)
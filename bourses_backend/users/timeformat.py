@@ -0,0 +1,64 @@
+# users/timeformat.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+# 'humanized': champ time_ago calculé par le serveur ("Il y a 5 min")
+# 'iso': horodatages ISO seulement, l'heure serveur est envoyée dans l'en-tête X-Server-Now
+TIME_FORMAT_HUMANIZED = 'humanized'
+TIME_FORMAT_ISO = 'iso'
+TIME_FORMATS = (TIME_FORMAT_HUMANIZED, TIME_FORMAT_ISO)
+
+SERVER_NOW_HEADER = 'X-Server-Now'
+
+
+def time_ago(created_at, now, detailed=False):
+    """
+    Durée écoulée en français. Le format détaillé (notifications étudiant)
+    distingue hier, jours, semaines et mois au-delà de 24 h.
+    """
+    diff = now - created_at
+
+    if diff < timedelta(minutes=1):
+        return "À l'instant"
+    elif diff < timedelta(hours=1):
+        minutes = int(diff.total_seconds() / 60)
+        return f"Il y a {minutes} min"
+    elif diff < timedelta(days=1):
+        hours = int(diff.total_seconds() / 3600)
+        return f"Il y a {hours} h"
+
+    days = diff.days
+    if not detailed:
+        return f"Il y a {days} j"
+    if days == 1:
+        return "Hier"
+    elif days < 7:
+        return f"Il y a {days} jours"
+    elif days < 30:
+        weeks = days // 7
+        return f"Il y a {weeks} sem"
+    months = days // 30
+    return f"Il y a {months} mois"
+
+
+def get_time_format(request=None):
+    """Format demandé par le client (?time_format=iso), sinon celui des settings"""
+    if request is not None:
+        requested = request.GET.get('time_format')
+        if requested in TIME_FORMATS:
+            return requested
+    return settings.BOURSES_TIME_FORMAT
+
+
+def response_now(context):
+    """Heure de référence unique pour toute une réponse, mémorisée dans le contexte"""
+    if 'now' not in context:
+        context['now'] = timezone.now()
+    return context['now']
+
+
+def add_server_now_header(response, now=None):
+    response[SERVER_NOW_HEADER] = (now or timezone.now()).isoformat()
+    return response
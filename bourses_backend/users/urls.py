@@ -1,14 +1,51 @@
 # users/urls.py
-from django.urls import path
+from django.conf import settings
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
 from . import views
+from .async_views import use_async_views
+from .permissions import IsAdminUserType, IsStudent
+from .viewsets import DocumentViewSet, ApplicationViewSet, StudentNotificationViewSet, EligibilityRuleViewSet
 
-# users/urls.py - CORRIGER les URLs de notification étudiant
+# API REST paginée exposée sous /api/users/v2/
+router = SimpleRouter()
+router.register('documents', DocumentViewSet, basename='document')
+router.register('applications', ApplicationViewSet, basename='application')
+router.register('notifications', StudentNotificationViewSet, basename='notification')
+router.register('eligibility-rules', EligibilityRuleViewSet, basename='eligibility-rule')
+
+# Anciennes routes conservées comme alias des ViewSets (réponses non paginées)
+manage_documents = DocumentViewSet.as_view({'get': 'list', 'post': 'create'}, owner_only=True, pagination_class=None)
+delete_document = DocumentViewSet.as_view({'delete': 'destroy'})
+download_document = DocumentViewSet.as_view({'get': 'download'})
+get_all_documents_admin = DocumentViewSet.as_view({'get': 'list'}, permission_classes=[IsAdminUserType], pagination_class=None)
+verify_document = DocumentViewSet.as_view({'post': 'verify'})
+reject_document = DocumentViewSet.as_view({'post': 'reject'})
+
+get_eligibility_rules = EligibilityRuleViewSet.as_view({'get': 'list'}, pagination_class=None)
+create_eligibility_rule = EligibilityRuleViewSet.as_view({'post': 'create'})
+manage_eligibility_rule = EligibilityRuleViewSet.as_view({'put': 'update', 'delete': 'destroy'})
+
+manage_applications = ApplicationViewSet.as_view({'get': 'list', 'post': 'create'}, permission_classes=[IsStudent], pagination_class=None)
+manage_application = ApplicationViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'})
+submit_application = ApplicationViewSet.as_view({'post': 'submit'})
+get_all_applications_admin = ApplicationViewSet.as_view({'get': 'list'}, permission_classes=[IsAdminUserType], pagination_class=None)
+
+mark_student_notification_read = StudentNotificationViewSet.as_view({'post': 'read'})
+mark_all_notifications_read = StudentNotificationViewSet.as_view({'post': 'read_all'})
+mark_notifications_read_bulk = StudentNotificationViewSet.as_view({'post': 'read_bulk'})
+delete_notification = StudentNotificationViewSet.as_view({'delete': 'destroy'})
+delete_all_notifications = StudentNotificationViewSet.as_view({'post': 'delete_all'})
 
 urlpatterns = [
+    path('v2/', include(router.urls)),
+
     # Authentication
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
     path('logout/', views.logout_user, name='logout'),
+    path('token/', views.obtain_token_pair, name='token_obtain_pair'),
+    path('token/refresh/', views.refresh_token, name='token_refresh'),
     path('me/', views.get_current_user, name='current_user'),
     path('csrf/', views.get_csrf_token, name='csrf_token'),
     path('status/', views.auth_status, name='auth_status'),
@@ -18,24 +55,26 @@ urlpatterns = [
     path('delete/<int:user_id>/', views.delete_user, name='delete_user'),
     
     # Document Management
-    path('documents/', views.manage_documents, name='manage_documents'),
-    path('documents/delete/<int:document_id>/', views.delete_document, name='delete_document'),
-    path('documents/download/<int:document_id>/', views.download_document, name='download_document'),
+    path('documents/', manage_documents, name='manage_documents'),
+    path('documents/delete/<int:pk>/', delete_document, name='delete_document'),
+    path('documents/download/<int:pk>/', download_document, name='download_document'),
     
     # Eligibility Rules
-    path('eligibility-rules/', views.get_eligibility_rules, name='get_eligibility_rules'),
-    path('eligibility-rules/create/', views.create_eligibility_rule, name='create_eligibility_rule'),
-    path('eligibility-rules/<int:rule_id>/', views.manage_eligibility_rule, name='manage_eligibility_rule'),
+    path('eligibility-rules/', get_eligibility_rules, name='get_eligibility_rules'),
+    path('eligibility-rules/create/', create_eligibility_rule, name='create_eligibility_rule'),
+    path('eligibility-rules/<int:pk>/', manage_eligibility_rule, name='manage_eligibility_rule'),
     
     # Admin Notifications
     path('admin/notifications/', views.get_admin_notifications, name='admin_notifications'),
+    path('admin/notifications/read/', views.mark_admin_notifications_read, name='mark_admin_notifications_read'),
+    path('admin/notifications/broadcast/', views.broadcast_notification, name='broadcast_notification'),
     path('admin/notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
     path('admin/stats/', views.get_admin_stats, name='admin_stats'),
 
     # Admin Document Management
-    path('admin/documents/', views.get_all_documents_admin, name='admin_documents'),
-    path('admin/documents/<int:document_id>/verify/', views.verify_document, name='verify_document'),
-    path('admin/documents/<int:document_id>/reject/', views.reject_document, name='reject_document'),
+    path('admin/documents/', get_all_documents_admin, name='admin_documents'),
+    path('admin/documents/<int:pk>/verify/', verify_document, name='verify_document'),
+    path('admin/documents/<int:pk>/reject/', reject_document, name='reject_document'),
 
     # Analytics Routes
     path('admin/analytics/', views.get_admin_analytics, name='admin_analytics'),
@@ -44,29 +83,37 @@ urlpatterns = [
     path('admin/system/info/', views.get_system_info, name='system_info'),
     path('admin/system/clear-cache/', views.clear_cache, name='clear_cache'),
     path('admin/system/optimize-database/', views.optimize_database, name='optimize_database'),
+    path('admin/system/maintenance/<int:pk>/', views.get_maintenance_job, name='maintenance_job_status'),
+    path('admin/system/metrics/', views.metrics, name='metrics'),
     path('admin/system/update-settings/', views.update_system_settings, name='update_settings_settings'),
 
     # Report Generation
     path('admin/generate-report/', views.generate_full_report, name='generate_report'),
     path('admin/export-data/', views.export_data, name='export_data'),
     path('admin/generate-pdf-report/', views.generate_pdf_report, name='generate_pdf_report'),
+    path('admin/reports/<int:pk>/', views.get_report_job, name='report_job_status'),
+    path('admin/reports/<int:pk>/download/', views.download_report, name='download_report'),
 
     # Student Routes - CORRECTION ICI
     path('student/stats/', views.get_student_stats, name='student_stats'),
     path('student/notifications/', views.get_student_notifications, name='student_notifications'),
-    path('student/notifications/<int:notification_id>/read/', views.mark_student_notification_read, name='mark_student_notification_read'),
+    path('student/notifications/<int:pk>/read/', mark_student_notification_read, name='mark_student_notification_read'),
     
     # Student Application Routes
-    path('applications/', views.manage_applications, name='manage_applications'),
-    path('applications/<int:application_id>/', views.manage_application, name='manage_application'),
-    path('applications/<int:application_id>/submit/', views.submit_application, name='submit_application'),
+    path('applications/', manage_applications, name='manage_applications'),
+    path('applications/<int:pk>/', manage_application, name='manage_application'),
+    path('applications/<int:pk>/submit/', submit_application, name='submit_application'),
     
     # Admin Application Routes
-    path('admin/applications/', views.get_all_applications_admin, name='admin_applications'),
+    path('admin/applications/', get_all_applications_admin, name='admin_applications'),
 
     # Student Notifications Routes - CORRECTION ICI
-    path('student/notifications/read-all/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
-    path('student/notifications/<int:notification_id>/delete/', views.delete_notification, name='delete_notification'),
-    path('student/notifications/delete-all/', views.delete_all_notifications, name='delete_all_notifications'),
+    path('student/notifications/read-all/', mark_all_notifications_read, name='mark_all_notifications_read'),
+    path('student/notifications/read-bulk/', mark_notifications_read_bulk, name='mark_notifications_read_bulk'),
+    path('student/notifications/<int:pk>/delete/', delete_notification, name='delete_notification'),
+    path('student/notifications/delete-all/', delete_all_notifications, name='delete_all_notifications'),
 ]
 
+# Déploiement ASGI: variantes asynchrones des routes d'entrées/sorties (users/async_views.py)
+if settings.BOURSES_ASYNC_VIEWS:
+    urlpatterns = use_async_views(urlpatterns)
@@ -1,25 +1,41 @@
 # users/views.py - VERSION COMPLÈTE CORRIGÉE
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
 from django.contrib.auth import login, logout, authenticate
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.middleware.csrf import get_token
+from django.db import connection, transaction
 from django.db.models import Q
-from django.http import FileResponse, Http404
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from datetime import timedelta
-import os
+import django
 import logging
+import os
 import traceback
 
-from .models import CustomUser, EligibilityRule, StudentDocument, AdminNotification, ScholarshipApplication, StudentNotification
-from .serializers import (UserSerializer, UserCreateSerializer, 
-                         EligibilityRuleSerializer, StudentDocumentSerializer, 
-                         DocumentUploadSerializer, AdminNotificationSerializer,
-                         ScholarshipApplicationSerializer, ScholarshipApplicationCreateSerializer,
-                         StudentNotificationSerializer)
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .authentication import jwt_enabled, tokens_for_user, TokenRefreshSerializer
+from . import metrics as app_metrics
+from .metrics import download_bytes, report_cache
+from .outbox import record_admin_event
+from .permissions import IsAdminUserType, IsStudent, is_admin
+from .models import CustomUser, StudentDocument, AdminNotification, AdminNotificationCursor, StudentNotification, ReportJob, MaintenanceJob
+from .broadcasts import BroadcastError, broadcast
+from .exports import (ExportError, DeleteOnCloseFile, export_dataset, get_format, parse_filters,
+                      temporary_export_path)
+from .replicas import replica_reads
+from .reports import data_fingerprint, run_job
+from .sampler import PSUTIL_AVAILABLE, STORAGE_WARNING, system_status
+from .snapshots import current_totals, day_start, load_series, sum_series
+from .serializers import (BroadcastSerializer, MarkReadSerializer, UserSerializer, UserCreateSerializer, AdminNotificationSerializer, StudentNotificationSerializer,
+                          ReportJobSerializer, MaintenanceJobSerializer, MaintenanceRequestSerializer)
+from .lean_serializers import LeanDocumentSerializer, LeanStudentNotificationSerializer
+from .timeformat import add_server_now_header
 
 logger = logging.getLogger(__name__)
 
@@ -45,15 +61,16 @@ def register_user(request):
         
         serializer = UserCreateSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            
-            # Créer une notification pour les admins
-            AdminNotification.objects.create(
-                notification_type='user_registered',
-                title="Nouvel utilisateur inscrit",
-                message=f"Un nouvel utilisateur s'est inscrit: {user.username}",
-                related_user=user
-            )
+            with transaction.atomic():
+                user = serializer.save()
+
+                # Notification pour les admins (outbox, même transaction)
+                record_admin_event(
+                    notification_type='user_registered',
+                    title="Nouvel utilisateur inscrit",
+                    message=f"Un nouvel utilisateur s'est inscrit: {user.username}",
+                    related_user=user
+                )
             
             login(request, user)
             logger.info(f"Registration successful for: {user.username}")
@@ -106,39 +123,84 @@ def logout_user(request):
     logout(request)
     return Response({"message": "Déconnexion réussie"}, status=status.HTTP_200_OK)
 
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@authentication_classes([])
+def obtain_token_pair(request):
+    """Connexion sans état: obtenir une paire de jetons JWT"""
+    if not jwt_enabled():
+        return Response({"error": "Authentification JWT désactivée"}, status=status.HTTP_404_NOT_FOUND)
+
+    username = request.data.get('username')
+    password = request.data.get('password')
+
+    if not username or not password:
+        return Response(
+            {"error": "Nom d'utilisateur et mot de passe requis"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    user = authenticate(username=username, password=password)
+
+    if user is None:
+        logger.warning(f"Token request failed - invalid credentials: {username}")
+        return Response({"error": "Identifiants invalides"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not user.is_active:
+        logger.warning(f"Token request failed - inactive account: {username}")
+        return Response({"error": "Compte désactivé"}, status=status.HTTP_400_BAD_REQUEST)
+
+    logger.info(f"JWT issued for: {user.username}")
+    return Response({
+        **tokens_for_user(user),
+        'user': UserSerializer(user).data
+    })
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@authentication_classes([])
+def refresh_token(request):
+    """Obtenir un nouveau jeton d'accès à partir du jeton de rafraîchissement"""
+    if not jwt_enabled():
+        return Response({"error": "Authentification JWT désactivée"}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = TokenRefreshSerializer(data=request.data)
+    try:
+        serializer.is_valid(raise_exception=True)
+    except TokenError as e:
+        return Response({"error": f"Jeton invalide: {str(e)}"}, status=status.HTTP_401_UNAUTHORIZED)
+
+    return Response(serializer.validated_data)
+
 @api_view(['GET'])
 def get_current_user(request):
     """Récupérer l'utilisateur connecté"""
     if not request.user.is_authenticated:
         return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
     
-    serializer = UserSerializer(request.user)
+    user = request.user
+    # Utilisateur reconstruit depuis les claims JWT: champs manquants chargés en une requête
+    deferred = user.get_deferred_fields() & set(UserSerializer.Meta.fields)
+    if deferred:
+        user.refresh_from_db(fields=sorted(deferred))
+    serializer = UserSerializer(user)
     return Response(serializer.data)
 
 # ===== USER MANAGEMENT VIEWS =====
 
 @api_view(['GET'])
+@permission_classes([IsAdminUserType])
+@replica_reads()
 def get_users(request):
     """Liste des utilisateurs (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     users = CustomUser.objects.all()
     serializer = UserSerializer(users, many=True)
     return Response(serializer.data)
 
 @api_view(['DELETE'])
+@permission_classes([IsAdminUserType])
 def delete_user(request, user_id):
     """Supprimer un utilisateur (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     try:
         user = CustomUser.objects.get(id=user_id)
         if user == request.user:
@@ -157,249 +219,54 @@ def delete_user(request, user_id):
             status=status.HTTP_404_NOT_FOUND
         )
 
-# ===== DOCUMENT MANAGEMENT VIEWS =====
-
-@api_view(['GET', 'POST'])
-@parser_classes([MultiPartParser, FormParser])
-def manage_documents(request):
-    """Gérer les documents de l'étudiant"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    if request.method == 'GET':
-        try:
-            documents = StudentDocument.objects.filter(student=request.user).order_by('-uploaded_at')
-            serializer = StudentDocumentSerializer(documents, many=True)
-            logger.info(f"Documents loaded for user {request.user.username}: {len(documents)} documents")
-            return Response(serializer.data)
-        except Exception as e:
-            logger.error(f"Error loading documents: {str(e)}")
-            return Response(
-                {"error": "Erreur serveur lors du chargement des documents"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
-    elif request.method == 'POST':
-        try:
-            if request.user.user_type != 'student':
-                return Response(
-                    {"error": "Seuls les étudiants peuvent uploader des documents"}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
-            
-            logger.info(f"Document upload attempt by user: {request.user.username}")
-            
-            if 'file' not in request.FILES:
-                return Response(
-                    {"error": "Aucun fichier fourni"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            serializer = DocumentUploadSerializer(
-                data=request.data, 
-                context={'request': request}
-            )
-            
-            if serializer.is_valid():
-                document = serializer.save()
-                
-                # Créer une notification pour les administrateurs
-                AdminNotification.objects.create(
-                    notification_type='document_upload',
-                    title=f"Nouveau document uploadé",
-                    message=f"L'étudiant {request.user.get_full_name()} a uploadé un document: {document.get_document_type_display()}",
-                    related_document=document,
-                    related_user=request.user
-                )
-                
-                logger.info(f"Document uploaded successfully: {document.original_filename}")
-                return Response(
-                    StudentDocumentSerializer(document).data, 
-                    status=status.HTTP_201_CREATED
-                )
-            
-            logger.warning(f"Document upload validation failed: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-        except Exception as e:
-            logger.error(f"Error during document upload: {str(e)}")
-            return Response(
-                {"error": f"Erreur lors de l'upload: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-@api_view(['DELETE'])
-def delete_document(request, document_id):
-    """Supprimer un document"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        document = StudentDocument.objects.get(id=document_id)
-        
-        if document.student != request.user and request.user.user_type != 'admin':
-            return Response(
-                {"error": "Accès non autorisé à ce document"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        document.delete()
-        logger.info(f"Document {document_id} deleted by user {request.user.username}")
-        return Response(
-            {"message": "Document supprimé avec succès"}, 
-            status=status.HTTP_200_OK
-        )
-    except StudentDocument.DoesNotExist:
-        return Response(
-            {"error": "Document non trouvé"}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-
-@api_view(['GET'])
-@ensure_csrf_cookie
-def download_document(request, document_id):
-    """Téléchargement direct d'un document"""
-    try:
-        if not request.user.is_authenticated:
-            return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-        
-        document = StudentDocument.objects.get(id=document_id)
-        
-        if document.student != request.user and request.user.user_type != 'admin':
-            return Response(
-                {"error": "Accès non autorisé à ce document"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        if not document.file:
-            raise Http404("Fichier non trouvé dans la base de données")
-        
-        file_path = document.file.path
-        
-        if not os.path.exists(file_path):
-            logger.error(f"File not found on disk: {file_path}")
-            raise Http404("Fichier non trouvé sur le serveur")
-        
-        logger.info(f"Serving file: {file_path}")
-        
-        response = FileResponse(
-            open(file_path, 'rb'),
-            as_attachment=True,
-            filename=document.original_filename
-        )
-        
-        response['Content-Disposition'] = f'attachment; filename="{document.original_filename}"'
-        response['Content-Length'] = document.file_size
-        
-        return response
-        
-    except StudentDocument.DoesNotExist:
-        logger.error(f"Document {document_id} not found")
-        return Response(
-            {"error": "Document non trouvé"}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-    except Exception as e:
-        logger.error(f"Download error for document {document_id}: {str(e)}")
-        return Response(
-            {"error": f"Erreur lors du téléchargement: {str(e)}"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-
-# ===== ELIGIBILITY RULES VIEWS =====
-
-@api_view(['GET'])
-def get_eligibility_rules(request):
-    """Récupérer les règles d'éligibilité"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    rules = EligibilityRule.objects.filter(is_active=True)
-    
-    if request.user.user_type == 'student':
-        rules = rules.filter(is_active=True)
-    
-    serializer = EligibilityRuleSerializer(rules, many=True)
-    return Response(serializer.data)
-
-@api_view(['POST'])
-def create_eligibility_rule(request):
-    """Créer une nouvelle règle d'éligibilité (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    serializer = EligibilityRuleSerializer(data=request.data)
-    if serializer.is_valid():
-        serializer.save(created_by=request.user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-@api_view(['PUT', 'DELETE'])
-def manage_eligibility_rule(request, rule_id):
-    """Modifier ou supprimer une règle d'éligibilité (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        rule = EligibilityRule.objects.get(id=rule_id)
-    except EligibilityRule.DoesNotExist:
-        return Response(
-            {"error": "Règle non trouvée"}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
-    if request.method == 'PUT':
-        serializer = EligibilityRuleSerializer(rule, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    elif request.method == 'DELETE':
-        rule.delete()
-        return Response(
-            {"message": "Règle supprimée avec succès"}, 
-            status=status.HTTP_200_OK
-        )
-
 # ===== ADMIN NOTIFICATIONS VIEWS =====
 
 @api_view(['GET'])
+@permission_classes([IsAdminUserType])
+@replica_reads()
 def get_admin_notifications(request):
-    """Récupérer les notifications pour l'admin"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
+    """Récupérer les notifications pour l'admin (non lues = créées après son curseur de lecture)"""
+    last_seen_at = AdminNotificationCursor.last_seen(request.user)
+    unread = AdminNotification.unread_for(request.user, last_seen_at)
+    related = ('related_user', 'related_document')
+
     # Récupérer les notifications non lues
-    unread_notifications = AdminNotification.objects.filter(is_read=False).order_by('-created_at')[:10]
+    unread_notifications = unread.select_related(*related).order_by('-created_at')[:10]
     
     # Récupérer toutes les notifications récentes
-    recent_notifications = AdminNotification.objects.all().order_by('-created_at')[:20]
+    recent_notifications = AdminNotification.objects.select_related(*related).order_by('-created_at')[:20]
     
-    unread_serializer = AdminNotificationSerializer(unread_notifications, many=True)
-    recent_serializer = AdminNotificationSerializer(recent_notifications, many=True)
+    # Même `now` pour les deux listes
+    context = {'request': request, 'now': timezone.now(), 'last_seen_at': last_seen_at}
+    unread_serializer = AdminNotificationSerializer(unread_notifications, many=True, context=context)
+    recent_serializer = AdminNotificationSerializer(recent_notifications, many=True, context=context)
     
-    return Response({
+    return add_server_now_header(Response({
         'unread': unread_serializer.data,
         'recent': recent_serializer.data,
-        'unread_count': unread_notifications.count()
-    })
+        'unread_count': unread.count()
+    }), context['now'])
 
 @api_view(['POST'])
 def mark_notification_read(request, notification_id):
-    """Marquer une notification comme lue"""
+    """Marquer une notification comme lue (AdminNotification pour un admin)"""
     if not request.user.is_authenticated:
         return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
+
+    if is_admin(request.user):
+        try:
+            notification = AdminNotification.objects.get(id=notification_id)
+        except AdminNotification.DoesNotExist:
+            return Response({"error": "Notification non trouvée"}, status=status.HTTP_404_NOT_FOUND)
+        # Le curseur de l'admin avance jusqu'à cette notification (les plus anciennes sont lues aussi)
+        AdminNotificationCursor.advance(request.user, notification.created_at)
+        # Curseur au moins à created_at: la notification est lue pour cet admin
+        context = {'request': request, 'last_seen_at': notification.created_at}
+        return Response({
+            "message": "Notification marquée comme lue",
+            "notification": AdminNotificationSerializer(notification, context=context).data
+        })
+
     try:
         notification = StudentNotification.objects.get(
             id=notification_id, 
@@ -416,89 +283,72 @@ def mark_notification_read(request, notification_id):
         return Response({"error": "Notification non trouvée"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['POST'])
-def mark_all_notifications_read(request):
-    """Marquer toutes les notifications comme lues"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        unread_notifications = StudentNotification.objects.filter(
-            student=request.user,
-            is_read=False
-        )
-        
-        updated_count = unread_notifications.update(
-            is_read=True,
-            read_at=timezone.now()
-        )
-        
-        return Response({
-            "message": f"{updated_count} notifications marquées comme lues",
-            "updated_count": updated_count
-        })
-        
-    except Exception as e:
-        logger.error(f"Erreur marquage toutes notifications: {str(e)}")
-        return Response(
-            {"error": "Erreur lors du marquage des notifications"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+@permission_classes([IsAdminUserType])
+def broadcast_notification(request):
+    """Envoyer une notification à tous les étudiants d'une audience (admin seulement)"""
+    serializer = BroadcastSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
 
-@api_view(['DELETE'])
-def delete_notification(request, notification_id):
-    """Supprimer une notification"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
     try:
-        notification = StudentNotification.objects.get(
-            id=notification_id, 
-            student=request.user
+        result = broadcast(
+            data['audience'], data['notification_type'], data['title'], data['message'],
+            is_important=data['is_important'], document_types=data.get('document_types')
         )
-        notification.delete()
-        
-        return Response({"message": "Notification supprimée avec succès"})
-        
-    except StudentNotification.DoesNotExist:
-        return Response({"error": "Notification non trouvée"}, status=status.HTTP_404_NOT_FOUND)
+    except BroadcastError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    record_admin_event(
+        notification_type='system_alert',
+        title="Notification diffusée",
+        message=f"« {data['title']} » envoyée à {result.recipients} étudiant(s) par {request.user.username}",
+        related_user=request.user
+    )
+    logger.info(f"Notification broadcast ({data['audience']}) by admin: {request.user.username}")
+
+    return Response({
+        "message": f"Notification envoyée à {result.recipients} étudiant(s)",
+        "recipients": result.recipients
+    }, status=status.HTTP_201_CREATED)
 
 @api_view(['POST'])
-def delete_all_notifications(request):
-    """Supprimer toutes les notifications"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        deleted_count, _ = StudentNotification.objects.filter(
-            student=request.user
-        ).delete()
-        
-        return Response({
-            "message": f"{deleted_count} notifications supprimées",
-            "deleted_count": deleted_count
-        })
-        
-    except Exception as e:
-        logger.error(f"Erreur suppression notifications: {str(e)}")
-        return Response(
-            {"error": "Erreur lors de la suppression des notifications"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-    
+@permission_classes([IsAdminUserType])
+def mark_admin_notifications_read(request):
+    """
+    Marquer des notifications admin comme lues (ids ou borne haute): le curseur
+    de l'admin avance jusqu'à la plus récente. Seul l'état de lecture de cet
+    admin change; updated_count compte les notifications que le curseur vient
+    de dépasser, plus anciennes non sélectionnées comprises.
+    """
+    serializer = MarkReadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    last_seen_at = AdminNotificationCursor.last_seen(request.user)
+    seen_at = serializer.seen_at(AdminNotification.objects.all())
+    updated_count = 0
+    if seen_at is not None and seen_at > last_seen_at:
+        AdminNotificationCursor.advance(request.user, seen_at)
+        updated_count = AdminNotification.unread_for(request.user, last_seen_at).filter(created_at__lte=seen_at).count()
+        last_seen_at = seen_at
+
+    return Response({
+        "message": f"{updated_count} notifications marquées comme lues",
+        "updated_count": updated_count,
+        "unread_count": AdminNotification.unread_for(request.user, last_seen_at).count()
+    })
+
 @api_view(['GET'])
+@permission_classes([IsAdminUserType])
+@replica_reads()
 def get_admin_stats(request):
     """Récupérer les statistiques pour le dashboard admin"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     total_users = CustomUser.objects.count()
     total_students = CustomUser.objects.filter(user_type='student').count()
     total_documents = StudentDocument.objects.count()
     unverified_documents = StudentDocument.objects.filter(is_verified=False).count()
-    pending_notifications = AdminNotification.objects.filter(is_read=False).count()
+    pending_notifications = AdminNotification.unread_for(request.user).count()
     
     # Documents uploadés aujourd'hui
     today = timezone.now().date()
@@ -518,137 +368,40 @@ def get_admin_stats(request):
         'week_documents': week_documents
     })
 
-# ===== ADMIN DOCUMENT MANAGEMENT VIEWS =====
-
-@api_view(['GET'])
-def get_all_documents_admin(request):
-    """Récupérer tous les documents pour l'admin"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        # Récupérer tous les documents avec les informations des étudiants
-        documents = StudentDocument.objects.select_related('student', 'verified_by').all().order_by('-uploaded_at')
-        serializer = StudentDocumentSerializer(documents, many=True)
-        
-        # Log pour débogage
-        logger.info(f"Admin {request.user.username} a chargé {documents.count()} documents")
-        
-        return Response(serializer.data)
-    except Exception as e:
-        logger.error(f"Erreur chargement documents admin: {str(e)}")
-        return Response(
-            {"error": f"Erreur serveur: {str(e)}"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-
-@api_view(['POST'])
-def verify_document(request, document_id):
-    """Vérifier un document (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        document = StudentDocument.objects.get(id=document_id)
-        document.is_verified = True
-        document.verified_by = request.user
-        document.verified_at = timezone.now()
-        document.save()
-        
-        # CRÉER UNE NOTIFICATION POUR L'ÉTUDIANT (au lieu de AdminNotification)
-        StudentNotification.create_document_notification(
-            student=document.student,
-            notification_type='document_verified',
-            title="✅ Document vérifié",
-            message=f"Votre document {document.get_document_type_display()} a été vérifié et approuvé par l'administration.",
-            related_document=document,
-            is_important=True
-        )
-        
-        return Response({
-            "message": "Document vérifié avec succès",
-            "document": StudentDocumentSerializer(document).data
-        })
-        
-    except StudentDocument.DoesNotExist:
-        return Response({"error": "Document non trouvé"}, status=status.HTTP_404_NOT_FOUND)
-
-@api_view(['POST'])
-def reject_document(request, document_id):
-    """Rejeter un document (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        document = StudentDocument.objects.get(id=document_id)
-        reason = request.data.get('reason', 'Document non conforme')
-        
-        # CRÉER UNE NOTIFICATION POUR L'ÉTUDIANT (au lieu de AdminNotification)
-        StudentNotification.create_document_notification(
-            student=document.student,
-            notification_type='document_rejected',
-            title="❌ Document rejeté",
-            message=f"Votre document {document.get_document_type_display()} a été rejeté: {reason}. Veuillez uploader un nouveau document.",
-            related_document=document,
-            is_important=True
-        )
-        
-        # Supprimer le document rejeté
-        document.delete()
-        
-        return Response({
-            "message": "Document rejeté et supprimé",
-            "reason": reason
-        })
-        
-    except StudentDocument.DoesNotExist:
-        return Response({"error": "Document non trouvé"}, status=status.HTTP_404_NOT_FOUND)
-
 # ===== ANALYTICS VIEWS =====
 
+# Jours de la série lue par get_admin_analytics (7 jours affichés + comparaison hebdomadaire)
+ANALYTICS_DAYS = 15
+
 @api_view(['GET'])
+@permission_classes([IsAdminUserType])
+@replica_reads()
 def get_admin_analytics(request):
     """Récupérer les données analytiques pour l'admin"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     try:
-        # Statistiques détaillées
-        total_documents = StudentDocument.objects.count()
-        verified_documents = StudentDocument.objects.filter(is_verified=True).count()
-        unverified_documents = StudentDocument.objects.filter(is_verified=False).count()
+        # Totaux comptés en direct, tendances lues dans les snapshots + delta du jour
+        totals = current_totals()
+        series = load_series(ANALYTICS_DAYS)
+        total_documents = totals['documents']
+        verified_documents = totals['documents_verified']
+        unverified_documents = total_documents - verified_documents
         
         # Documents par type
         documents_by_type = {}
         for doc_type, _ in StudentDocument.DOCUMENT_TYPE_CHOICES:
-            count = StudentDocument.objects.filter(document_type=doc_type).count()
+            count = totals['documents_by_type'].get(doc_type, 0)
             documents_by_type[doc_type] = {
                 'count': count,
                 'percentage': (count / total_documents * 100) if total_documents > 0 else 0
             }
         
         # Activité des 7 derniers jours
-        from datetime import datetime, timedelta
         daily_activity = []
-        for i in range(6, -1, -1):
-            date = timezone.now().date() - timedelta(days=i)
-            count = StudentDocument.objects.filter(uploaded_at__date=date).count()
+        for date, counts in series[-7:]:
             daily_activity.append({
                 'date': date.strftime('%Y-%m-%d'),
                 'day': date.strftime('%a'),
-                'count': count
+                'count': counts['documents_uploaded']
             })
         
         # Métriques de performance
@@ -660,12 +413,9 @@ def get_admin_analytics(request):
         }
         
         # Tendances
-        last_week = timezone.now().date() - timedelta(days=7)
-        documents_last_week = StudentDocument.objects.filter(uploaded_at__date__gte=last_week).count()
-        documents_previous_week = StudentDocument.objects.filter(
-            uploaded_at__date__gte=last_week - timedelta(days=7),
-            uploaded_at__date__lt=last_week
-        ).count()
+        last_week = timezone.localdate() - timedelta(days=7)
+        documents_last_week = sum_series(series, 'documents_uploaded', last_week)
+        documents_previous_week = sum_series(series, 'documents_uploaded', last_week - timedelta(days=7), last_week)
         
         trend_percentage = 0
         if documents_previous_week > 0:
@@ -683,10 +433,10 @@ def get_admin_analytics(request):
             'daily_activity': daily_activity,
             'performance_metrics': performance_metrics,
             'user_stats': {
-                'total_users': CustomUser.objects.count(),
-                'total_students': CustomUser.objects.filter(user_type='student').count(),
-                'total_admins': CustomUser.objects.filter(user_type='admin').count(),
-                'active_today': CustomUser.objects.filter(last_login__date=timezone.now().date()).count()
+                'total_users': totals['users'],
+                'total_students': totals['students'],
+                'total_admins': totals['admins'],
+                'active_today': CustomUser.objects.filter(last_login__gte=day_start(timezone.localdate())).count()
             }
         })
         
@@ -700,103 +450,90 @@ def get_admin_analytics(request):
 # ===== SYSTEM MANAGEMENT VIEWS =====
 
 @api_view(['GET'])
+@permission_classes([IsAdminUserType])
 def get_system_info(request):
-    """Récupérer les informations système"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        import psutil
-        import platform
-        from django.conf import settings
-        
-        # Informations système
-        system_info = {
-            'version': '1.2.0',
-            'last_backup': timezone.now().strftime('%d/%m/%Y %H:%M'),
-            'django_version': '4.2.0',
-            'python_version': platform.python_version(),
-            'database': 'PostgreSQL',
-            'debug_mode': settings.DEBUG
-        }
-        
-        # Utilisation des ressources
-        disk_usage = psutil.disk_usage('/')
-        memory_usage = psutil.virtual_memory()
-        cpu_usage = psutil.cpu_percent(interval=1)
-        
-        resource_usage = {
-            'cpu': round(cpu_usage, 1),
-            'memory': round(memory_usage.percent, 1),
-            'storage': round(disk_usage.percent, 1),
-            'network': 95,  # Mock - à remplacer par des vraies métriques
-            'status': 'healthy' if cpu_usage < 80 and memory_usage.percent < 80 else 'warning'
-        }
-        
-        # Statut des services
-        services_status = {
-            'database': check_database_connection(),
-            'file_system': disk_usage.percent < 90,
-            'api': True,
-            'authentication': True
-        }
-        
-        return Response({
-            'system_info': system_info,
-            'resource_usage': resource_usage,
-            'services_status': services_status,
-            'last_updated': timezone.now().isoformat()
-        })
-        
-    except Exception as e:
-        logger.error(f"Erreur système info: {str(e)}")
-        # Données mockées en cas d'erreur
-        return Response({
-            'system_info': {
-                'version': '1.2.0',
-                'last_backup': timezone.now().strftime('%d/%m/%Y %H:%M'),
-                'django_version': '4.2.0',
-                'python_version': '3.9+',
-                'database': 'PostgreSQL',
-                'debug_mode': settings.DEBUG
-            },
-            'resource_usage': {
-                'cpu': 45,
-                'memory': 68,
-                'storage': 82,
-                'network': 95,
-                'status': 'healthy'
-            },
-            'services_status': {
-                'database': True,
-                'file_system': True,
-                'api': True,
-                'authentication': True
-            },
-            'last_updated': timezone.now().isoformat()
-        })
+    """Récupérer les informations système (relevés de users/sampler.py, sans attente)"""
+    import platform
+
+    latest, history = system_status()
+    system_info = {
+        'version': '1.2.0',
+        'last_backup': timezone.now().strftime('%d/%m/%Y %H:%M'),
+        'django_version': django.get_version(),
+        'python_version': platform.python_version(),
+        'database': connection.vendor,
+        'debug_mode': settings.DEBUG
+    }
+
+    resource_usage = {
+        'cpu': latest['cpu'],
+        'memory': latest['memory'],
+        'storage': latest['storage'],
+        'db_latency_ms': latest['db_latency_ms'],
+        'status': latest['status'],
+        # Sans psutil, CPU et mémoire ne sont pas mesurés
+        'psutil_available': PSUTIL_AVAILABLE,
+    }
+
+    services_status = {
+        'database': latest['database'],
+        'file_system': latest['storage'] is not None and latest['storage'] < STORAGE_WARNING,
+        'api': True,
+        'authentication': True
+    }
 
-def check_database_connection():
-    """Vérifier la connexion à la base de données"""
-    try:
-        from django.db import connection
-        connection.ensure_connection()
-        return True
-    except Exception:
-        return False
+    return Response({
+        'system_info': system_info,
+        'resource_usage': resource_usage,
+        'services_status': services_status,
+        'history': history,
+        'sampled_at': latest['timestamp'],
+        'traffic': traffic_summary(),
+        # Pool psycopg par alias (BOURSES_DB_POOL), vide en connexions persistantes
+        'database_pool': app_metrics.pool_stats(),
+        'last_updated': timezone.now().isoformat()
+    })
+
+def traffic_summary():
+    """Résumé des métriques du processus (users/metrics.py), sans attente"""
+    requests_count, requests_seconds = app_metrics.http_request_duration.summary()
+    _, queries = app_metrics.http_request_queries.summary()
+    server_errors = sum(
+        count for (_, _, status_code), count in app_metrics.http_requests.items()
+        if status_code.startswith('5')
+    )
+    return {
+        'requests': requests_count,
+        'avg_latency_ms': round(requests_seconds / requests_count * 1000, 2) if requests_count else None,
+        'avg_queries': round(queries / requests_count, 2) if requests_count else None,
+        'error_rate': round(server_errors / requests_count, 4) if requests_count else None,
+        'db_connections_opened': app_metrics.db_connections_opened.total(),
+        'upload_bytes': app_metrics.upload_bytes.total(),
+        'download_bytes': app_metrics.download_bytes.total(),
+        'notifications_created': app_metrics.notifications_created.total(),
+        'conditional_get_hit_ratio': app_metrics.cache_hit_ratio(app_metrics.conditional_get),
+        'report_cache_hit_ratio': app_metrics.cache_hit_ratio(app_metrics.report_cache),
+    }
+
+def metrics(request):
+    """
+    Métriques au format texte Prometheus. Accès avec l'en-tête
+    `Authorization: Bearer <BOURSES_METRICS_TOKEN>`, ou sans jeton depuis
+    les adresses de BOURSES_METRICS_ALLOWED_IPS.
+    """
+    token = settings.BOURSES_METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in settings.BOURSES_METRICS_ALLOWED_IPS
+    if not allowed:
+        return HttpResponseForbidden("Accès aux métriques refusé")
+    return HttpResponse(app_metrics.REGISTRY.render(), content_type=app_metrics.CONTENT_TYPE)
 
 @api_view(['POST'])
+@permission_classes([IsAdminUserType])
 def clear_cache(request):
     """Vider le cache"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     try:
         from django.core.cache import cache
         cache.clear()
@@ -810,35 +547,38 @@ def clear_cache(request):
         )
 
 @api_view(['POST'])
+@permission_classes([IsAdminUserType])
 def optimize_database(request):
-    """Optimiser la base de données"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
+    """
+    Programmer la maintenance de la base (VACUUM/ANALYZE, rapport de bloat et
+    d'index inutilisés), exécutée par `manage.py run_maintenance --worker`.
+    Une seule maintenance à la fois; la progression se suit sur status_url.
+    """
+    serializer = MaintenanceRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    job, created = MaintenanceJob.enqueue(request.user, **serializer.validated_data)
+    logger.info(f"Maintenance job {job.pk} requested by admin: {request.user.username} (new={created})")
+    return Response({
+        "message": "Maintenance de la base programmée" if created else "Une maintenance est déjà en cours",
+        "job": MaintenanceJobSerializer(job).data
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUserType])
+def get_maintenance_job(request, pk):
+    """Progression et rapport d'une maintenance"""
     try:
-        from django.core.management import call_command
-        call_command('vacuum')
-        logger.info(f"Database optimized by admin: {request.user.username}")
-        return Response({"message": "Base de données optimisée avec succès"})
-    except Exception as e:
-        logger.error(f"Erreur optimisation BDD: {str(e)}")
-        return Response(
-            {"error": "Erreur lors de l'optimisation de la base de données"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+        job = MaintenanceJob.objects.get(pk=pk)
+    except MaintenanceJob.DoesNotExist:
+        return Response({"error": "Maintenance non trouvée"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(MaintenanceJobSerializer(job).data)
 
 @api_view(['POST'])
+@permission_classes([IsAdminUserType])
 def update_system_settings(request):
     """Mettre à jour les paramètres système"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     try:
         settings = request.data.get('settings', {})
         
@@ -859,229 +599,143 @@ def update_system_settings(request):
 
 # ===== REPORT GENERATION VIEWS =====
 
-@api_view(['POST'])
-def generate_full_report(request):
-    """Générer un rapport complet (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
+def enqueue_report(request, report_type):
+    """
+    Met un rapport en file d'attente (traité par run_report_worker) ou
+    retourne le rapport existant si les données n'ont pas changé.
+    """
     try:
-        from datetime import datetime, timedelta
-        import json
-        from django.http import HttpResponse
-        
-        # Récupérer les données pour le rapport
-        report_data = {
-            'generated_at': timezone.now().isoformat(),
-            'generated_by': request.user.username,
-            'period': 'all_time',
-            'summary': {},
-            'detailed_analytics': {}
-        }
-        
-        # Statistiques générales
-        total_users = CustomUser.objects.count()
-        total_students = CustomUser.objects.filter(user_type='student').count()
-        total_admins = CustomUser.objects.filter(user_type='admin').count()
-        total_documents = StudentDocument.objects.count()
-        verified_documents = StudentDocument.objects.filter(is_verified=True).count()
-        unverified_documents = StudentDocument.objects.filter(is_verified=False).count()
-        
-        report_data['summary'] = {
-            'total_users': total_users,
-            'total_students': total_students,
-            'total_admins': total_admins,
-            'total_documents': total_documents,
-            'verified_documents': verified_documents,
-            'unverified_documents': unverified_documents,
-            'verification_rate': (verified_documents / total_documents * 100) if total_documents > 0 else 0
-        }
-        
-        # Documents par type
-        documents_by_type = {}
-        for doc_type, doc_name in StudentDocument.DOCUMENT_TYPE_CHOICES:
-            count = StudentDocument.objects.filter(document_type=doc_type).count()
-            percentage = (count / total_documents * 100) if total_documents > 0 else 0
-            documents_by_type[doc_type] = {
-                'name': doc_name,
-                'count': count,
-                'percentage': round(percentage, 2)
-            }
-        
-        # Activité récente (30 derniers jours)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_activity = {
-            'new_users': CustomUser.objects.filter(date_joined__gte=thirty_days_ago).count(),
-            'new_documents': StudentDocument.objects.filter(uploaded_at__gte=thirty_days_ago).count(),
-            'documents_verified': StudentDocument.objects.filter(verified_at__gte=thirty_days_ago).count()
-        }
-        
-        # Top étudiants avec le plus de documents
-        from django.db.models import Count
-        top_students = CustomUser.objects.filter(
-            user_type='student',
-            documents__isnull=False
-        ).annotate(
-            doc_count=Count('documents')
-        ).order_by('-doc_count')[:10]
-        
-        top_students_data = []
-        for student in top_students:
-            top_students_data.append({
-                'username': student.username,
-                'full_name': student.get_full_name(),
-                'document_count': student.doc_count,
-                'verified_count': student.documents.filter(is_verified=True).count()
-            })
-        
-        report_data['detailed_analytics'] = {
-            'documents_by_type': documents_by_type,
-            'recent_activity': recent_activity,
-            'top_students': top_students_data,
-            'system_health': {
-                'database_status': 'Operational',
-                'storage_usage': 'Normal',
-                'performance': 'Optimal'
-            }
-        }
-        
-        # Créer une notification pour le rapport généré
-        AdminNotification.objects.create(
-            notification_type='system_alert',
-            title="Rapport généré",
-            message=f"Rapport complet généré par {request.user.username}",
-            related_user=request.user
-        )
-        
-        logger.info(f"Full report generated by admin: {request.user.username}")
-        
+        # Empreinte lue sur la base principale: une réplique en retard
+        # renverrait un rapport périmé; la génération, elle, lit la réplique
+        fingerprint = data_fingerprint()
+        job, created = ReportJob.enqueue(report_type, request.user, fingerprint)
+        report_cache.inc(result='miss' if created else 'hit')
+
+        if created and settings.BOURSES_REPORT_JOBS_EAGER:
+            # Sans worker (développement, tests): exécution immédiate
+            job.mark_running()
+            run_job(job)
+
+        if job.status == 'completed':
+            message = "Rapport disponible"
+            response_status = status.HTTP_200_OK
+        else:
+            message = "Génération du rapport en cours"
+            response_status = status.HTTP_202_ACCEPTED
+
+        logger.info(f"Report job {job.pk} ({report_type}) requested by admin: {request.user.username} (new={created})")
+
         return Response({
-            "message": "Rapport généré avec succès",
-            "report_id": f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "generated_at": report_data['generated_at'],
-            "data": report_data
-        })
-        
+            "message": message,
+            "job": ReportJobSerializer(job).data
+        }, status=response_status)
+
     except Exception as e:
-        logger.error(f"Erreur génération rapport: {str(e)}")
+        logger.error(f"Erreur mise en file du rapport: {str(e)}")
         return Response(
             {"error": f"Erreur lors de la génération du rapport: {str(e)}"}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['POST'])
+@permission_classes([IsAdminUserType])
+def generate_full_report(request):
+    """Générer un rapport complet (admin seulement)"""
+    return enqueue_report(request, 'full')
+
 @api_view(['GET'])
-def export_data(request):
-    """Exporter les données (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
+@permission_classes([IsAdminUserType])
+def get_report_job(request, pk):
+    """Statut d'un rapport en file d'attente"""
+    try:
+        job = ReportJob.objects.get(pk=pk)
+    except ReportJob.DoesNotExist:
+        return Response({"error": "Rapport non trouvé"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ReportJobSerializer(job).data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUserType])
+def download_report(request, pk):
+    """Télécharger un rapport terminé"""
+    try:
+        job = ReportJob.objects.get(pk=pk)
+    except ReportJob.DoesNotExist:
+        return Response({"error": "Rapport non trouvé"}, status=status.HTTP_404_NOT_FOUND)
+
+    if job.status != 'completed':
         return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
+            {"error": "Rapport pas encore disponible", "status": job.status},
+            status=status.HTTP_409_CONFLICT
         )
-    
+    if not job.has_file():
+        return Response({"error": "Fichier du rapport introuvable"}, status=status.HTTP_404_NOT_FOUND)
+
+    content_type = 'application/pdf' if job.report_type == 'pdf' else 'application/json'
+    download_bytes.inc(job.file.size, kind='report')
+    return FileResponse(
+        job.file.open('rb'),
+        as_attachment=True,
+        filename=os.path.basename(job.file.name),
+        content_type=content_type
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAdminUserType])
+@replica_reads()
+def export_data(request):
+    """
+    Exporter les données (admin seulement).
+    ?type=users|documents|notifications|student_notifications|applications|eligibility_rules|daily_snapshots
+    &export_format=csv|jsonl|parquet|arrow|xlsx, plus les filtres propres à chaque type (voir users/exports.py).
+    Le paramètre `format` est réservé par DRF à la négociation de contenu.
+    """
+    export_type = request.GET.get('type', 'users')
+    export_format = request.GET.get('export_format', 'csv')
+
     try:
-        import csv
-        from django.http import HttpResponse
-        from io import StringIO
-        
-        export_type = request.GET.get('type', 'users')
-        
-        # Créer la réponse HTTP avec le bon content-type
-        response = HttpResponse(content_type='text/csv')
-        filename = f"campusbourses_export_{export_type}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        writer = csv.writer(response)
-        
-        if export_type == 'users':
-            # Exporter les utilisateurs
-            writer.writerow(['ID', 'Username', 'Email', 'Prénom', 'Nom', 'Type', 'Téléphone', 'Date de naissance', 'Date inscription'])
-            
-            users = CustomUser.objects.all().order_by('date_joined')
-            for user in users:
-                writer.writerow([
-                    user.id,
-                    user.username,
-                    user.email,
-                    user.first_name or '',
-                    user.last_name or '',
-                    user.get_user_type_display(),
-                    user.phone_number or '',
-                    user.date_of_birth.strftime('%Y-%m-%d') if user.date_of_birth else '',
-                    user.date_joined.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-                
-        elif export_type == 'documents':
-            # Exporter les documents
-            writer.writerow(['ID', 'Étudiant', 'Email étudiant', 'Type document', 'Nom fichier', 'Taille', 'Vérifié', 'Vérifié par', 'Date upload'])
-            
-            documents = StudentDocument.objects.select_related('student', 'verified_by').all().order_by('-uploaded_at')
-            for doc in documents:
-                writer.writerow([
-                    doc.id,
-                    doc.student.get_full_name(),
-                    doc.student.email,
-                    doc.get_document_type_display(),
-                    doc.original_filename,
-                    doc.get_file_size_display(),
-                    'Oui' if doc.is_verified else 'Non',
-                    doc.verified_by.get_full_name() if doc.verified_by else '',
-                    doc.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-                
-        elif export_type == 'notifications':
-            # Exporter les notifications
-            writer.writerow(['ID', 'Type', 'Titre', 'Message', 'Lu', 'Date création'])
-            
-            notifications = AdminNotification.objects.all().order_by('-created_at')
-            for notif in notifications:
-                writer.writerow([
-                    notif.id,
-                    notif.get_notification_type_display(),
-                    notif.title,
-                    notif.message,
-                    'Oui' if notif.is_read else 'Non',
-                    notif.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-        
-        else:
-            return Response({"error": "Type d'export non supporté"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Créer une notification pour l'export
-        AdminNotification.objects.create(
-            notification_type='system_alert',
-            title="Données exportées",
-            message=f"Export {export_type} généré par {request.user.username}",
-            related_user=request.user
+        fmt = get_format(export_format)
+        filters = parse_filters(export_type, request.GET)
+    except ExportError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    path = temporary_export_path(export_format)
+    try:
+        result = export_dataset(
+            export_type, export_format, path, filters=filters, workers=settings.BOURSES_EXPORT_WORKERS
         )
-        
-        logger.info(f"Data export ({export_type}) by admin: {request.user.username}")
-        
-        return response
-        
     except Exception as e:
+        os.remove(path)
         logger.error(f"Erreur export données: {str(e)}")
         return Response(
             {"error": f"Erreur lors de l'export des données: {str(e)}"}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    # Notification pour l'export
+    record_admin_event(
+        notification_type='system_alert',
+        title="Données exportées",
+        message=f"Export {export_type} ({export_format}, {result.rows} lignes) généré par {request.user.username}",
+        related_user=request.user
+    )
+    
+    logger.info(f"Data export ({export_type}, {export_format}) by admin: {request.user.username}")
+
+    filename = f"campusbourses_export_{export_type}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{fmt.extension}"
+    download_bytes.inc(os.path.getsize(path), kind='export')
+    return FileResponse(
+        DeleteOnCloseFile(path, 'r'),
+        as_attachment=True,
+        filename=filename,
+        content_type=fmt.content_type
+    )
+
 # ===== STUDENT VIEWS =====
 
 @api_view(['GET'])
+@permission_classes([IsStudent])
 def get_student_stats(request):
     """Récupérer les statistiques de l'étudiant"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    if request.user.user_type != 'student':
-        return Response(
-            {"error": "Accès réservé aux étudiants"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     try:
         # Statistiques de l'étudiant
         total_applications = 12  # À remplacer par vos modèles réels
@@ -1121,30 +775,27 @@ def get_student_notifications(request):
         return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
     
     try:
+        serializer = LeanStudentNotificationSerializer(request=request)
+        notifications = serializer.values(
+            StudentNotification.objects.filter(student=request.user).order_by('-created_at')
+        )
+        
         # Notifications non lues (prioritaires)
-        unread_notifications = StudentNotification.objects.filter(
-            student=request.user,
-            is_read=False
-        ).order_by('-created_at')[:20]
+        unread_rows = list(notifications.filter(is_read=False)[:20])
         
         # Notifications récentes (toutes)
-        recent_notifications = StudentNotification.objects.filter(
-            student=request.user
-        ).order_by('-created_at')[:50]
-        
-        unread_serializer = StudentNotificationSerializer(unread_notifications, many=True)
-        recent_serializer = StudentNotificationSerializer(recent_notifications, many=True)
+        recent_rows = list(notifications[:50])
         
         # Statistiques
-        unread_count = unread_notifications.count()
-        important_count = unread_notifications.filter(is_important=True).count()
+        unread_count = len(unread_rows)
+        important_count = sum(1 for row in unread_rows if row['is_important'])
         
-        return Response({
-            'unread': unread_serializer.data,
-            'recent': recent_serializer.data,
+        return add_server_now_header(Response({
+            'unread': serializer.serialize(unread_rows),
+            'recent': serializer.serialize(recent_rows),
             'unread_count': unread_count,
             'important_count': important_count
-        })
+        }), serializer.now)
         
     except Exception as e:
         logger.error(f"Erreur chargement notifications étudiant: {str(e)}")
@@ -1156,151 +807,17 @@ def get_student_notifications(request):
         })
     
 @api_view(['POST'])
-def mark_student_notification_read(request, notification_id):
-    """Marquer une notification comme lue (étudiant)"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        notification = StudentNotification.objects.get(
-            id=notification_id, 
-            student=request.user
-        )
-        notification.mark_as_read()
-        
-        return Response({
-            "message": "Notification marquée comme lue",
-            "notification": StudentNotificationSerializer(notification).data
-        })
-        
-    except StudentNotification.DoesNotExist:
-        return Response({"error": "Notification non trouvée"}, status=status.HTTP_404_NOT_FOUND)
-@api_view(['POST'])
+@permission_classes([IsAdminUserType])
 def generate_pdf_report(request):
     """Générer un rapport PDF (admin seulement)"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib import colors
-        from django.http import HttpResponse
-        import io
-        
-        # Créer le buffer PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Titre
-        title_style = styles['Heading1']
-        title_style.alignment = 1
-        story.append(Paragraph("Rapport CampusBourses", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Informations générales
-        story.append(Paragraph(f"Généré le: {timezone.now().strftime('%d/%m/%Y à %H:%M')}", styles['Normal']))
-        story.append(Paragraph(f"Généré par: {request.user.get_full_name()}", styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        # Statistiques
-        story.append(Paragraph("Statistiques Générales", styles['Heading2']))
-        
-        total_users = CustomUser.objects.count()
-        total_students = CustomUser.objects.filter(user_type='student').count()
-        total_documents = StudentDocument.objects.count()
-        verified_documents = StudentDocument.objects.filter(is_verified=True).count()
-        
-        stats_data = [
-            ['Métrique', 'Valeur'],
-            ['Utilisateurs totaux', total_users],
-            ['Étudiants', total_students],
-            ['Documents totaux', total_documents],
-            ['Documents vérifiés', verified_documents],
-            ['Taux de vérification', f"{(verified_documents/total_documents*100) if total_documents > 0 else 0:.1f}%"]
-        ]
-        
-        stats_table = Table(stats_data, colWidths=[200, 100])
-        stats_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(stats_table)
-        story.append(Spacer(1, 20))
-        
-        # Documents par type
-        story.append(Paragraph("Documents par Type", styles['Heading2']))
-        
-        doc_type_data = [['Type de document', 'Quantité']]
-        for doc_type, doc_name in StudentDocument.DOCUMENT_TYPE_CHOICES:
-            count = StudentDocument.objects.filter(document_type=doc_type).count()
-            doc_type_data.append([doc_name, count])
-        
-        doc_type_table = Table(doc_type_data, colWidths=[300, 100])
-        doc_type_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(doc_type_table)
-        
-        # Générer le PDF
-        doc.build(story)
-        
-        # Préparer la réponse
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        filename = f"rapport_campusbourses_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        # Notification
-        AdminNotification.objects.create(
-            notification_type='system_alert',
-            title="Rapport PDF généré",
-            message=f"Rapport PDF généré par {request.user.username}",
-            related_user=request.user
-        )
-        
-        logger.info(f"PDF report generated by admin: {request.user.username}")
-        
-        return response
-        
-    except Exception as e:
-        logger.error(f"Erreur génération PDF: {str(e)}")
-        return Response(
-            {"error": f"Erreur lors de la génération du PDF: {str(e)}"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+    return enqueue_report(request, 'pdf')
 
 # ===== STUDENT DASHBOARD VIEWS =====
 
 @api_view(['GET'])
+@permission_classes([IsStudent])
 def get_student_dashboard_data(request):
     """Récupérer toutes les données du dashboard étudiant"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    if request.user.user_type != 'student':
-        return Response(
-            {"error": "Accès réservé aux étudiants"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
     try:
         # Récupérer l'étudiant connecté
         student = request.user
@@ -1329,19 +846,19 @@ def get_student_dashboard_data(request):
         success_rate = (approved_applications / total_applications * 100) if total_applications > 0 else 0
         
         # 6. Notifications de l'étudiant
-        student_notifications = StudentNotification.objects.filter(
-            student=student
-        ).order_by('-created_at')[:10]
+        notification_serializer = LeanStudentNotificationSerializer(request=request)
+        recent_notifications = notification_serializer.serialize(notification_serializer.values(
+            StudentNotification.objects.filter(student=student).order_by('-created_at')[:10]
+        ))
         
-        unread_notifications = student_notifications.filter(is_read=False)
-        unread_count = unread_notifications.count()
-        
-        # Sérialiser les notifications
-        notification_serializer = StudentNotificationSerializer(student_notifications, many=True)
+        unread_notifications = [n for n in recent_notifications if not n['is_read']]
+        unread_count = len(unread_notifications)
         
         # 7. Documents récents
-        recent_documents = StudentDocument.objects.filter(student=student).order_by('-uploaded_at')[:5]
-        document_serializer = StudentDocumentSerializer(recent_documents, many=True)
+        document_serializer = LeanDocumentSerializer(now=notification_serializer.now, request=request)
+        recent_documents = document_serializer.serialize_queryset(
+            StudentDocument.objects.filter(student=student).order_by('-uploaded_at')[:5]
+        )
         
         return Response({
             'stats': {
@@ -1357,11 +874,11 @@ def get_student_dashboard_data(request):
                 'dossier_completion': round(dossier_completion, 1)
             },
             'notifications': {
-                'unread': StudentNotificationSerializer(unread_notifications, many=True).data,
-                'recent': notification_serializer.data,
+                'unread': unread_notifications,
+                'recent': recent_notifications,
                 'unread_count': unread_count
             },
-            'recent_documents': document_serializer.data
+            'recent_documents': recent_documents
         })
         
     except Exception as e:
@@ -1371,190 +888,6 @@ def get_student_dashboard_data(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-# ===== APPLICATION MANAGEMENT VIEWS =====
-
-@api_view(['GET', 'POST'])
-def manage_applications(request):
-    """Gérer les demandes de bourse de l'étudiant"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    if request.user.user_type != 'student':
-        return Response(
-            {"error": "Accès réservé aux étudiants"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    if request.method == 'GET':
-        try:
-            applications = ScholarshipApplication.objects.filter(student=request.user).order_by('-created_at')
-            serializer = ScholarshipApplicationSerializer(applications, many=True)
-            return Response(serializer.data)
-        except Exception as e:
-            logger.error(f"Erreur chargement demandes: {str(e)}")
-            return Response(
-                {"error": "Erreur lors du chargement des demandes"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
-    elif request.method == 'POST':
-        try:
-            serializer = ScholarshipApplicationCreateSerializer(
-                data=request.data, 
-                context={'request': request}
-            )
-            
-            if serializer.is_valid():
-                application = serializer.save()
-                
-                # Créer une notification pour l'admin
-                AdminNotification.objects.create(
-                    notification_type='application_submitted',
-                    title="Nouvelle demande de bourse",
-                    message=f"L'étudiant {request.user.get_full_name()} a créé une nouvelle demande: {application.title}",
-                    related_user=request.user
-                )
-                
-                return Response(
-                    ScholarshipApplicationSerializer(application).data, 
-                    status=status.HTTP_201_CREATED
-                )
-            
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-        except Exception as e:
-            logger.error(f"Erreur création demande: {str(e)}")
-            return Response(
-                {"error": f"Erreur lors de la création: {str(e)}"}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-@api_view(['GET', 'PUT', 'DELETE'])
-def manage_application(request, application_id):
-    """Gérer une demande spécifique"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        application = ScholarshipApplication.objects.get(id=application_id)
-        
-        # Vérifier que l'utilisateur a accès à cette demande
-        if application.student != request.user and request.user.user_type != 'admin':
-            return Response(
-                {"error": "Accès non autorisé à cette demande"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-    except ScholarshipApplication.DoesNotExist:
-        return Response(
-            {"error": "Demande non trouvée"}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
-    if request.method == 'GET':
-        serializer = ScholarshipApplicationSerializer(application)
-        return Response(serializer.data)
-    
-    elif request.method == 'PUT':
-        # Seuls les brouillons peuvent être modifiés par l'étudiant
-        if request.user.user_type == 'student' and not application.can_be_edited():
-            return Response(
-                {"error": "Cette demande ne peut plus être modifiée"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        serializer = ScholarshipApplicationSerializer(
-            application, 
-            data=request.data, 
-            partial=True,
-            context={'request': request}
-        )
-        
-        if serializer.is_valid():
-            updated_application = serializer.save()
-            
-            # Si l'admin met à jour le statut
-            if request.user.user_type == 'admin' and 'status' in request.data:
-                AdminNotification.objects.create(
-                    notification_type='application_updated',
-                    title="Statut de demande mis à jour",
-                    message=f"Votre demande '{application.title}' est maintenant: {application.get_status_display()}",
-                    related_user=application.student
-                )
-            
-            return Response(ScholarshipApplicationSerializer(updated_application).data)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    elif request.method == 'DELETE':
-        # Seuls les brouillons peuvent être supprimés
-        if application.status != 'draft':
-            return Response(
-                {"error": "Seuls les brouillons peuvent être supprimés"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        application.delete()
-        return Response(
-            {"message": "Demande supprimée avec succès"}, 
-            status=status.HTTP_200_OK
-        )
-
-@api_view(['POST'])
-def submit_application(request, application_id):
-    """Soumettre une demande de bourse"""
-    if not request.user.is_authenticated:
-        return Response({"error": "Non authentifié"}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        application = ScholarshipApplication.objects.get(id=application_id, student=request.user)
-        
-        if not application.can_be_submitted():
-            return Response(
-                {"error": "Cette demande ne peut pas être soumise"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        application.status = 'submitted'
-        application.submitted_at = timezone.now()
-        application.save()
-        
-        # Notification pour l'admin
-        AdminNotification.objects.create(
-            notification_type='application_submitted',
-            title="Demande de bourse soumise",
-            message=f"L'étudiant {request.user.get_full_name()} a soumis une demande: {application.title}",
-            related_user=request.user
-        )
-        
-        return Response({
-            "message": "Demande soumise avec succès",
-            "application": ScholarshipApplicationSerializer(application).data
-        })
-        
-    except ScholarshipApplication.DoesNotExist:
-        return Response({"error": "Demande non trouvée"}, status=status.HTTP_404_NOT_FOUND)
-
-@api_view(['GET'])
-def get_all_applications_admin(request):
-    """Récupérer toutes les demandes pour l'admin"""
-    if not request.user.is_authenticated or request.user.user_type != 'admin':
-        return Response(
-            {"error": "Accès non autorisé"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    try:
-        applications = ScholarshipApplication.objects.select_related('student', 'reviewed_by').all().order_by('-created_at')
-        serializer = ScholarshipApplicationSerializer(applications, many=True)
-        return Response(serializer.data)
-    except Exception as e:
-        logger.error(f"Erreur chargement demandes admin: {str(e)}")
-        return Response(
-            {"error": f"Erreur serveur: {str(e)}"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-    
 # users/views.py - AJOUTER ces vues au début des vues
 
 @api_view(['GET'])
@@ -0,0 +1,502 @@
+# users/viewsets.py
+from rest_framework import status, permissions, viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.utils import timezone
+import os
+import logging
+
+from .lean_serializers import LeanApplicationSerializer, LeanDocumentSerializer, LeanStudentNotificationSerializer
+from .metrics import download_bytes, upload_bytes
+from .models import EligibilityRule, StudentDocument, ScholarshipApplication, StudentNotification
+from .outbox import record_admin_event, record_student_event
+from .permissions import IsAdminUserType, IsStudent, IsOwnerOrAdmin, is_admin, is_student
+from .replicas import replica_reads
+from .serializers import (MarkReadSerializer, EligibilityRuleSerializer, StudentDocumentSerializer, DocumentUploadSerializer,
+                          ScholarshipApplicationSerializer, ScholarshipApplicationCreateSerializer,
+                          StudentNotificationSerializer)
+from .timeformat import add_server_now_header, get_time_format
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = ('1', 'true', 'oui', 'yes')
+FALSE_VALUES = ('0', 'false', 'non', 'no')
+
+
+class StandardResultsPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class BoursesViewSet(viewsets.GenericViewSet):
+    """
+    Base commune des ViewSets: pagination, throttling et filtres simples
+    par paramètres de requête (?status=draft&is_verified=true).
+    """
+    pagination_class = StandardResultsPagination
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'bourses_api'
+    permission_classes = [permissions.IsAuthenticated]
+
+    # Permissions spécifiques par action, prioritaires sur permission_classes
+    action_permissions = {}
+    # Champs filtrables par paramètre de requête
+    filter_fields = ()
+    # Actions dont les lectures vont à la réplique (après authentification et permissions)
+    replica_actions = ('list',)
+
+    # Message renvoyé quand l'objet n'existe pas ou n'est pas accessible
+    not_found_message = "Ressource non trouvée"
+
+    def initial(self, request, *args, **kwargs):
+        # Heure de référence unique de la réponse (time_ago et en-tête X-Server-Now)
+        self.now = timezone.now()
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self.replica_scope = replica_reads()
+            self.replica_scope.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_scope = getattr(self, 'replica_scope', None)
+        if replica_scope is not None:
+            replica_scope.__exit__(None, None, None)
+            self.replica_scope = None
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return add_server_now_header(response, getattr(self, 'now', None))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['now'] = self.now
+        context['time_format'] = get_time_format(self.request)
+        return context
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            raise NotFound(self.not_found_message)
+
+    def get_permissions(self):
+        permission_classes = self.action_permissions.get(self.action, self.permission_classes)
+        return [permission() for permission in permission_classes]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        filters = {}
+        for field in self.filter_fields:
+            value = self.request.query_params.get(field)
+            if value is None:
+                continue
+            if value.lower() in TRUE_VALUES:
+                value = True
+            elif value.lower() in FALSE_VALUES:
+                value = False
+            filters[field] = value
+        return queryset.filter(**filters) if filters else queryset
+
+
+class LeanListModelMixin(mixins.ListModelMixin):
+    """Liste sérialisée via lean_serializer_class (lignes .values(), sans instances de modèles)"""
+    lean_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.lean_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.lean_serializer_class(now=self.now, request=request)
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
+
+
+# ===== DOCUMENTS =====
+
+class DocumentViewSet(LeanListModelMixin,
+                      mixins.RetrieveModelMixin,
+                      BoursesViewSet):
+    """Documents des étudiants (les admins voient tous les documents)"""
+    serializer_class = StudentDocumentSerializer
+    lean_serializer_class = LeanDocumentSerializer
+    permission_classes = [IsOwnerOrAdmin]
+    action_permissions = {
+        'create': [IsStudent],
+        'verify': [IsAdminUserType],
+        'reject': [IsAdminUserType],
+    }
+    filter_fields = ('document_type', 'is_verified')
+    not_found_message = "Document non trouvé"
+    # Limiter la liste aux documents de l'utilisateur, même pour un admin
+    owner_only = False
+
+    def get_queryset(self):
+        queryset = StudentDocument.objects.select_related('student', 'verified_by').order_by('-uploaded_at')
+        if self.owner_only:
+            return queryset.filter(student=self.request.user)
+        return IsOwnerOrAdmin.scope_queryset(self.request, queryset)
+
+    def create(self, request):
+        """Uploader un document (étudiant seulement)"""
+        logger.info(f"Document upload attempt by user: {request.user.username}")
+
+        if 'file' not in request.FILES:
+            return Response(
+                {"error": "Aucun fichier fourni"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = DocumentUploadSerializer(data=request.data, context={'request': request})
+
+        if not serializer.is_valid():
+            logger.warning(f"Document upload validation failed: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            document = serializer.save()
+
+            # Notification pour les administrateurs (outbox, même transaction)
+            record_admin_event(
+                notification_type='document_upload',
+                title="Nouveau document uploadé",
+                message=f"L'étudiant {request.user.get_full_name()} a uploadé un document: {document.get_document_type_display()}",
+                related_document=document,
+                related_user=request.user
+            )
+
+        upload_bytes.inc(document.file_size)
+        logger.info(f"Document uploaded successfully: {document.original_filename}")
+        return Response(StudentDocumentSerializer(document).data, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, pk=None):
+        """Supprimer un document"""
+        document = self.get_object()
+        document.delete()
+        logger.info(f"Document {pk} deleted by user {request.user.username}")
+        return Response({"message": "Document supprimé avec succès"}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Téléchargement direct d'un document"""
+        document = self.get_object()
+
+        if not document.file:
+            return Response(
+                {"error": "Fichier non trouvé dans la base de données"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        file_path = document.file.path
+
+        if not os.path.exists(file_path):
+            logger.error(f"File not found on disk: {file_path}")
+            return Response(
+                {"error": "Fichier non trouvé sur le serveur"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        logger.info(f"Serving file: {file_path}")
+
+        response = FileResponse(
+            open(file_path, 'rb'),
+            as_attachment=True,
+            filename=document.original_filename
+        )
+        response['Content-Length'] = document.file_size
+        download_bytes.inc(document.file_size, kind='document')
+        return response
+
+    @action(detail=True, methods=['post'])
+    def verify(self, request, pk=None):
+        """Vérifier un document (admin seulement)"""
+        document = self.get_object()
+        document.is_verified = True
+        document.verified_by = request.user
+        document.verified_at = timezone.now()
+
+        with transaction.atomic():
+            document.save()
+            record_student_event(
+                student=document.student,
+                notification_type='document_verified',
+                title="✅ Document vérifié",
+                message=f"Votre document {document.get_document_type_display()} a été vérifié et approuvé par l'administration.",
+                related_document=document,
+                is_important=True
+            )
+
+        return Response({
+            "message": "Document vérifié avec succès",
+            "document": StudentDocumentSerializer(document).data
+        })
+
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        """Rejeter un document (admin seulement)"""
+        document = self.get_object()
+        reason = request.data.get('reason', 'Document non conforme')
+
+        with transaction.atomic():
+            record_student_event(
+                student=document.student,
+                notification_type='document_rejected',
+                title="❌ Document rejeté",
+                message=f"Votre document {document.get_document_type_display()} a été rejeté: {reason}. Veuillez uploader un nouveau document.",
+                is_important=True
+            )
+
+            # Supprimer le document rejeté
+            document.delete()
+
+        return Response({
+            "message": "Document rejeté et supprimé",
+            "reason": reason
+        })
+
+
+# ===== SCHOLARSHIP APPLICATIONS =====
+
+class ApplicationViewSet(LeanListModelMixin,
+                         mixins.RetrieveModelMixin,
+                         BoursesViewSet):
+    """Demandes de bourse (les admins voient toutes les demandes)"""
+    serializer_class = ScholarshipApplicationSerializer
+    lean_serializer_class = LeanApplicationSerializer
+    permission_classes = [IsOwnerOrAdmin]
+    action_permissions = {
+        'create': [IsStudent],
+        'submit': [IsStudent],
+    }
+    filter_fields = ('status', 'scholarship_type')
+    not_found_message = "Demande non trouvée"
+
+    def get_queryset(self):
+        queryset = ScholarshipApplication.objects.select_related('student', 'reviewed_by').order_by('-created_at')
+        return IsOwnerOrAdmin.scope_queryset(self.request, queryset)
+
+    def create(self, request):
+        """Créer une demande de bourse (étudiant seulement)"""
+        serializer = ScholarshipApplicationCreateSerializer(data=request.data, context={'request': request})
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            application = serializer.save()
+
+            # Notification pour l'admin
+            record_admin_event(
+                notification_type='application_submitted',
+                title="Nouvelle demande de bourse",
+                message=f"L'étudiant {request.user.get_full_name()} a créé une nouvelle demande: {application.title}",
+                related_user=request.user
+            )
+
+        return Response(ScholarshipApplicationSerializer(application).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, pk=None):
+        """Modifier une demande (mise à jour partielle)"""
+        application = self.get_object()
+
+        # Seuls les brouillons peuvent être modifiés par l'étudiant
+        if is_student(request.user) and not application.can_be_edited():
+            return Response(
+                {"error": "Cette demande ne peut plus être modifiée"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = ScholarshipApplicationSerializer(
+            application,
+            data=request.data,
+            partial=True,
+            context={'request': request}
+        )
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            updated_application = serializer.save()
+
+            # Si l'admin met à jour le statut
+            if is_admin(request.user) and 'status' in request.data:
+                record_admin_event(
+                    notification_type='application_updated',
+                    title="Statut de demande mis à jour",
+                    message=f"Votre demande '{application.title}' est maintenant: {application.get_status_display()}",
+                    related_user=application.student
+                )
+
+        return Response(ScholarshipApplicationSerializer(updated_application).data)
+
+    def partial_update(self, request, pk=None):
+        return self.update(request, pk)
+
+    def destroy(self, request, pk=None):
+        """Supprimer une demande (brouillons seulement)"""
+        application = self.get_object()
+
+        if application.status != 'draft':
+            return Response(
+                {"error": "Seuls les brouillons peuvent être supprimés"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        application.delete()
+        return Response({"message": "Demande supprimée avec succès"}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def submit(self, request, pk=None):
+        """Soumettre une demande de bourse"""
+        application = self.get_object()
+
+        if not application.can_be_submitted():
+            return Response(
+                {"error": "Cette demande ne peut pas être soumise"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        application.status = 'submitted'
+        application.submitted_at = timezone.now()
+
+        with transaction.atomic():
+            application.save()
+
+            # Notification pour l'admin
+            record_admin_event(
+                notification_type='application_submitted',
+                title="Demande de bourse soumise",
+                message=f"L'étudiant {request.user.get_full_name()} a soumis une demande: {application.title}",
+                related_user=request.user
+            )
+
+        return Response({
+            "message": "Demande soumise avec succès",
+            "application": ScholarshipApplicationSerializer(application).data
+        })
+
+
+# ===== STUDENT NOTIFICATIONS =====
+
+class StudentNotificationViewSet(LeanListModelMixin,
+                                 mixins.RetrieveModelMixin,
+                                 BoursesViewSet):
+    """Notifications de l'étudiant connecté"""
+    serializer_class = StudentNotificationSerializer
+    lean_serializer_class = LeanStudentNotificationSerializer
+    filter_fields = ('is_read', 'is_important', 'notification_type')
+    not_found_message = "Notification non trouvée"
+
+    def get_queryset(self):
+        return StudentNotification.objects.filter(
+            student=self.request.user
+        ).select_related('related_document', 'related_application').order_by('-created_at')
+
+    def destroy(self, request, pk=None):
+        """Supprimer une notification"""
+        self.get_object().delete()
+        return Response({"message": "Notification supprimée avec succès"})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Marquer une notification comme lue"""
+        notification = self.get_object()
+        notification.mark_as_read()
+
+        return Response({
+            "message": "Notification marquée comme lue",
+            "notification": StudentNotificationSerializer(notification).data
+        })
+
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        """Marquer toutes les notifications comme lues"""
+        updated_count = StudentNotification.objects.filter(
+            student=request.user,
+            is_read=False
+        ).update(is_read=True, read_at=timezone.now())
+
+        return Response({
+            "message": f"{updated_count} notifications marquées comme lues",
+            "updated_count": updated_count
+        })
+
+    @action(detail=False, methods=['post'], url_path='read-bulk')
+    def read_bulk(self, request):
+        """Marquer comme lues une liste d'ids ou toutes les notifications jusqu'à une borne"""
+        serializer = MarkReadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        updated_count = serializer.filter(
+            StudentNotification.objects.filter(student=request.user)
+        ).update(is_read=True, read_at=timezone.now())
+
+        return Response({
+            "message": f"{updated_count} notifications marquées comme lues",
+            "updated_count": updated_count
+        })
+
+    @action(detail=False, methods=['post'], url_path='delete-all')
+    def delete_all(self, request):
+        """Supprimer toutes les notifications"""
+        deleted_count, _ = StudentNotification.objects.filter(student=request.user).delete()
+
+        return Response({
+            "message": f"{deleted_count} notifications supprimées",
+            "deleted_count": deleted_count
+        })
+
+
+# ===== ELIGIBILITY RULES =====
+
+class EligibilityRuleViewSet(mixins.ListModelMixin,
+                             mixins.RetrieveModelMixin,
+                             BoursesViewSet):
+    """Règles d'éligibilité (lecture pour tous, écriture pour les admins)"""
+    serializer_class = EligibilityRuleSerializer
+    action_permissions = {
+        'create': [IsAdminUserType],
+        'update': [IsAdminUserType],
+        'partial_update': [IsAdminUserType],
+        'destroy': [IsAdminUserType],
+    }
+    filter_fields = ('rule_type',)
+    not_found_message = "Règle non trouvée"
+
+    def get_queryset(self):
+        queryset = EligibilityRule.objects.select_related('created_by')
+        if self.action == 'list':
+            queryset = queryset.filter(is_active=True)
+        return queryset.order_by('id')
+
+    def create(self, request):
+        """Créer une nouvelle règle d'éligibilité"""
+        serializer = EligibilityRuleSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(created_by=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, pk=None):
+        """Modifier une règle d'éligibilité (mise à jour partielle)"""
+        serializer = EligibilityRuleSerializer(self.get_object(), data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data)
+
+    def partial_update(self, request, pk=None):
+        return self.update(request, pk)
+
+    def destroy(self, request, pk=None):
+        """Supprimer une règle d'éligibilité"""
+        self.get_object().delete()
+        return Response({"message": "Règle supprimée avec succès"}, status=status.HTTP_200_OK)
@@ -40,13 +40,13 @@ const AdminDashboard = ({ user, onLogout }) => {
       setUnreadCount(notifResponse.data.unread_count || 0);
       setRecentActivity(notifResponse.data.recent || []);
       
-      setSystemHealth({
-        cpu: 45,
-        memory: 68,
-        storage: 82,
-        network: 95,
-        status: 'healthy'
-      });
+      try {
+        const systemResponse = await api.get('/users/admin/system/info/');
+        setSystemHealth(systemResponse.data.resource_usage || {});
+      } catch (systemError) {
+        console.error('Error loading system info:', systemError);
+        setSystemHealth({});
+      }
       
       const newAlerts = [];
       if (statsResponse.data.unverified_documents > 10) {
@@ -174,14 +174,34 @@ const AdminDashboard = ({ user, onLogout }) => {
     }
   };
 
+  // Reports are generated by a background worker: poll the job, then download the file
+  const waitForReportJob = async (job) => {
+    let current = job;
+    for (let attempt = 0; current.status === 'pending' || current.status === 'running'; attempt++) {
+      if (attempt >= 150) {
+        throw new Error('Report generation timed out');
+      }
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const statusResponse = await api.get(`/users/admin/reports/${current.id}/`);
+      current = statusResponse.data;
+    }
+    if (current.status !== 'completed') {
+      throw new Error(current.error || 'Report generation failed');
+    }
+    return api.get(`/users/admin/reports/${current.id}/download/`, {
+      responseType: 'blob'
+    });
+  };
+
   const generateReport = async () => {
     try {
       setLoading(true);
       
-      const response = await api.post('/users/admin/generate-report/');
+      const jobResponse = await api.post('/users/admin/generate-report/');
+      const response = await waitForReportJob(jobResponse.data.job);
       
       if (response.data) {
-        const blob = new Blob([JSON.stringify(response.data, null, 2)], { 
+        const blob = new Blob([response.data], { 
           type: 'application/json' 
         });
         const url = window.URL.createObjectURL(blob);
@@ -266,9 +286,8 @@ const AdminDashboard = ({ user, onLogout }) => {
     try {
       setLoading(true);
       
-      const response = await api.post('/users/admin/generate-pdf-report/', {}, {
-        responseType: 'blob'
-      });
+      const jobResponse = await api.post('/users/admin/generate-pdf-report/');
+      const response = await waitForReportJob(jobResponse.data.job);
       
       const blob = new Blob([response.data], { 
         type: 'application/pdf' 
@@ -349,10 +368,10 @@ const AdminDashboard = ({ user, onLogout }) => {
 
   const markAllAsRead = async () => {
     try {
-      const promises = notifications.map(notification => 
-        api.post(`/users/admin/notifications/${notification.id}/read/`)
-      );
-      await Promise.all(promises);
+      // Un seul appel pour toutes les notifications affichées
+      await api.post('/users/admin/notifications/read/', {
+        ids: notifications.map(notification => notification.id)
+      });
       setNotifications([]);
       setUnreadCount(0);
     } catch (error) {
@@ -507,12 +526,12 @@ const AdminDashboard = ({ user, onLogout }) => {
     <div className="health-metric-light">
       <div className="health-label-light">
         <span>{label}</span>
-        <span className="health-value-light">{value}%</span>
+        <span className="health-value-light">{value == null ? 'N/A' : `${value}%`}</span>
       </div>
       <div className="health-bar-light">
         <div 
           className={`health-fill-light ${color}`}
-          style={{width: `${(value / max) * 100}%`}}
+          style={{width: `${((value || 0) / max) * 100}%`}}
         ></div>
       </div>
     </div>
@@ -571,20 +590,22 @@ const AdminDashboard = ({ user, onLogout }) => {
     const exportTypes = [
       { value: 'users', label: '👥 Users', description: 'Complete user list' },
       { value: 'documents', label: '📁 Documents', description: 'All uploaded documents' },
-      { value: 'notifications', label: '🔔 Notifications', description: 'Notification history' }
+      { value: 'notifications', label: '🔔 Notifications', description: 'Notification history' },
+      { value: 'applications', label: '🎓 Applications', description: 'Scholarship applications' }
     ];
+    const exportValues = exportTypes.map(type => type.value);
     
     const selectedType = window.prompt(
       'Choose data type to export:\n\n' +
       exportTypes.map(type => `${type.value}: ${type.label} - ${type.description}`).join('\n') +
-      '\n\nEnter type (users, documents, notifications):',
+      `\n\nEnter type (${exportValues.join(', ')}):`,
       'users'
     );
     
-    if (selectedType && ['users', 'documents', 'notifications'].includes(selectedType.toLowerCase())) {
+    if (selectedType && exportValues.includes(selectedType.toLowerCase())) {
       exportData(selectedType.toLowerCase());
     } else if (selectedType) {
-      alert('Invalid export type. Choose from: users, documents, notifications');
+      alert(`Invalid export type. Choose from: ${exportValues.join(', ')}`);
     }
   };
 
@@ -847,7 +868,14 @@ const AdminDashboard = ({ user, onLogout }) => {
                 <HealthMetric label="CPU" value={systemHealth.cpu} color="primary" />
                 <HealthMetric label="Memory" value={systemHealth.memory} color="warning" />
                 <HealthMetric label="Storage" value={systemHealth.storage} color="danger" />
-                <HealthMetric label="Network" value={systemHealth.network} color="success" />
+                <div className="health-metric-light">
+                  <div className="health-label-light">
+                    <span>Database</span>
+                    <span className="health-value-light">
+                      {systemHealth.db_latency_ms == null ? 'Down' : `${systemHealth.db_latency_ms} ms`}
+                    </span>
+                  </div>
+                </div>
               </div>
               
               <div className="system-alerts-light">
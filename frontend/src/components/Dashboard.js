@@ -171,11 +171,8 @@ const Dashboard = ({ user, onLogout }) => {
   try {
     const unreadIds = notifications.map(n => n.id);
     
-    // Marquer chaque notification comme lue via l'API
-    const promises = unreadIds.map(id => 
-      api.post(`/users/student/notifications/${id}/read/`)
-    );
-    await Promise.all(promises);
+    // Marquer les notifications affichées comme lues en un seul appel
+    await api.post('/users/student/notifications/read-bulk/', { ids: unreadIds });
     
     // Mettre à jour l'état local
     setNotifications([]);
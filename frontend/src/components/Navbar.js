@@ -113,9 +113,10 @@ const loadNotifications = async () => {
   const markAllAsRead = async () => {
     try {
       if (user.user_type === 'admin') {
-        for (const notification of notifications) {
-          await api.post(`/users/admin/notifications/${notification.id}/read/`);
-        }
+        // Un seul appel pour toutes les notifications affichées
+        await api.post('/users/admin/notifications/read/', {
+          ids: notifications.map(notification => notification.id)
+        });
       } else {
         await api.post('/users/student/notifications/read-all/');
       }